@@ -0,0 +1,151 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.http import JsonResponse
+from django.utils.translation import override
+from django.views.generic import View
+from modeltranslation import settings as mt_settings
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from .site_patch import get_lang_root_paths
+from .utils import get_url_from_url_parts, get_url_parts_for_url_path
+
+__all__ = ['get_api_fields', 'serialize_pages', 'TranslatedPagesView']
+
+
+def get_api_fields(model):
+    """
+    Returns names of translated fields registered for `model` (including inherited ones)
+    which can be requested through the API. url_path is left out, urls are returned instead.
+    """
+    try:
+        opts = translator.get_options_for_model(model)
+    except NotRegistered:
+        return []
+    return [field_name for field_name in opts.fields if field_name != 'url_path']
+
+
+def _to_json_value(value):
+    # StreamField values
+    if hasattr(value, 'stream_block'):
+        return value.stream_block.get_prep_value(value)
+    return value
+
+
+def serialize_pages(queryset, languages=None, fields=None, request=None):
+    """
+    Returns a list of dicts with translations of `fields` in `languages`
+    and localized urls for every page of `queryset`.
+
+    Only requested translation columns are fetched, in a single query.
+    Urls are resolved from `url_path_<lang>` columns and cached site root paths,
+    without loading page objects.
+    """
+    languages = languages or mt_settings.AVAILABLE_LANGUAGES
+    if fields is None:
+        fields = get_api_fields(queryset.model)
+
+    columns = ['id', 'content_type_id']
+    for field_name in fields:
+        columns.extend(build_localized_fieldname(field_name, lang_code) for lang_code in languages)
+    url_path_columns = [build_localized_fieldname('url_path', lang_code) for lang_code in languages]
+    columns.extend(url_path_columns)
+
+    root_paths = get_lang_root_paths(languages)
+    site = getattr(request, 'site', None)
+    current_site_id = site.pk if site is not None else None
+
+    items = []
+    for row in queryset.values(*columns):
+        content_type = ContentType.objects.get_for_id(row['content_type_id'])
+        item = {
+            'id': row['id'],
+            'type': '{}.{}'.format(content_type.app_label, content_type.model_class().__name__),
+        }
+        for field_name in fields:
+            item[field_name] = {
+                lang_code: _to_json_value(row[build_localized_fieldname(field_name, lang_code)])
+                for lang_code in languages
+            }
+
+        item['url'] = {}
+        for lang_code, url_path_column in zip(languages, url_path_columns):
+            with override(lang_code):
+                url_parts = get_url_parts_for_url_path(
+                    row[url_path_column], root_paths[lang_code], current_site_id)
+                item['url'][lang_code] = get_url_from_url_parts(
+                    url_parts, root_paths[lang_code], current_site_id)
+        items.append(item)
+
+    return items
+
+
+class TranslatedPagesView(View):
+    """
+    Lists live public pages with translated fields.
+
+    Query parameters:
+    - `langs`: comma separated language codes (all languages by default)
+    - `fields`: comma separated translated field names (all registered fields by default)
+    - `type`: page model as `app_label.ModelName`, gives access to its translated fields
+    - `child_of` / `descendant_of`: page id
+    - `limit` (20 by default, at most `max_limit`) and `offset`, pages are ordered by tree path
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def error(self, message):
+        return JsonResponse({'message': message}, status=400)
+
+    def get(self, request):
+        model = Page
+        if request.GET.get('type'):
+            try:
+                model = apps.get_model(request.GET['type'])
+            except (LookupError, ValueError):
+                model = None
+            if model is None or not issubclass(model, Page):
+                return self.error('type not found')
+
+        languages = mt_settings.AVAILABLE_LANGUAGES
+        if request.GET.get('langs'):
+            languages = request.GET['langs'].split(',')
+            unknown = set(languages) - set(mt_settings.AVAILABLE_LANGUAGES)
+            if unknown:
+                return self.error('unknown languages: {}'.format(', '.join(sorted(unknown))))
+
+        fields = get_api_fields(model)
+        if request.GET.get('fields'):
+            requested = request.GET['fields'].split(',')
+            unknown = set(requested) - set(fields)
+            if unknown:
+                return self.error('unknown fields: {}'.format(', '.join(sorted(unknown))))
+            fields = requested
+
+        try:
+            limit = min(int(request.GET.get('limit', self.default_limit)), self.max_limit)
+            offset = int(request.GET.get('offset', 0))
+        except ValueError:
+            return self.error('limit and offset must be integers')
+        if limit < 0 or offset < 0:
+            return self.error('limit and offset must not be negative')
+
+        # stable order, so that pages aren't repeated or skipped across offsets
+        queryset = model.objects.live().public().order_by('path')
+        for param, method in (('child_of', 'child_of'), ('descendant_of', 'descendant_of')):
+            if request.GET.get(param):
+                try:
+                    parent = Page.objects.get(id=int(request.GET[param]))
+                except (ValueError, Page.DoesNotExist):
+                    return self.error('{} page not found'.format(param))
+                queryset = getattr(queryset, method)(parent)
+
+        items = serialize_pages(
+            queryset[offset:offset + limit], languages=languages, fields=fields, request=request)
+        return JsonResponse({
+            'meta': {'total_count': queryset.count()},
+            'items': items,
+        })
@@ -20,7 +20,7 @@ class WagtailTranslationAppConfig(AppConfig):
         )
 
         # patch Site and Page models here
-        from wagtail.core.models import AbstractPage, Page, Site
+        from wagtail.core.models import AbstractPage, Page, PageRevision, Site
         from wagtail.core.query import PageQuerySet
         from wagtail.admin.views.pages import copy
         from .manager import MultilingualPageManager
@@ -36,6 +36,7 @@ class WagtailTranslationAppConfig(AppConfig):
         site_patch = import_module("wagtail_translation.site_patch")
         query_patch = import_module("wagtail_translation.query_patch")
         views_patch = import_module("wagtail_translation.views_patch")
+        revision_patch = import_module("wagtail_translation.revision_patch")
 
         for name in page_patch.__all__:
             setattr(Page, name, getattr(page_patch, name))
@@ -46,5 +47,12 @@ class WagtailTranslationAppConfig(AppConfig):
         for name in views_patch.__all__:
             # FIXME make generic again
             setattr(copy, name, getattr(views_patch, name))
+        for name in revision_patch.__all__:
+            setattr(PageRevision, name, getattr(revision_patch, name))
+
+        # replace wagtail search signal handler (wagtail.search app may be ready before or after this app)
+        from .search import replace_signal_handlers
+        replace_signal_handlers()
 
         import wagtail_translation.signal_handlers
+        import wagtail_translation.checks
@@ -0,0 +1,85 @@
+from __future__ import absolute_import, unicode_literals
+
+from asgiref.sync import sync_to_async
+from django.utils.translation import get_language, override
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+from .site_patch import get_lang_root_paths
+from .switcher import get_lang_url, get_lang_url_paths, get_lang_urls
+from .utils import get_url_from_url_parts, get_url_parts_for_url_path
+
+__all__ = [
+    'aget_lang_root_paths',
+    'aget_site_root_paths',
+    'aget_urls',
+    'aget_lang_url_paths',
+    'aget_lang_urls',
+    'achange_lang',
+]
+
+# Cache backends and the ORM are sync, so every helper reads cache (and computes misses)
+# in a single sync_to_async call of its sync counterpart. Building urls from cached
+# url paths and root paths doesn't need a worker thread.
+
+
+def _get_current_site_id(request):
+    site = getattr(request, 'site', None)
+    return site.pk if site is not None else None
+
+
+async def aget_lang_root_paths(languages=None):
+    """
+    Async counterpart of `site_patch.get_lang_root_paths`, sharing its cache.
+    """
+    return await sync_to_async(get_lang_root_paths)(languages or mt_settings.AVAILABLE_LANGUAGES)
+
+
+async def aget_site_root_paths(lang_code=None):
+    """
+    Async counterpart of `Site.get_site_root_paths` for the given (or active) language.
+    """
+    lang_code = lang_code or get_language()
+    return (await aget_lang_root_paths([lang_code]))[lang_code]
+
+
+async def aget_urls(pages, request=None, lang_code=None):
+    """
+    Returns a list of urls (or None for pages not routable) of `pages`
+    in the given (or active) language, reading root paths from cache once.
+    `url_path_<lang>` of pages has to be loaded already (database is not used here).
+    """
+    lang_code = lang_code or get_language()
+    root_paths = await aget_site_root_paths(lang_code)
+    current_site_id = _get_current_site_id(request)
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+
+    urls = []
+    with override(lang_code):
+        for page in pages:
+            url_parts = get_url_parts_for_url_path(
+                getattr(page, url_path_field), root_paths, current_site_id)
+            urls.append(get_url_from_url_parts(url_parts, root_paths, current_site_id))
+    return urls
+
+
+async def aget_lang_url_paths(page):
+    """
+    Async counterpart of `switcher.get_lang_url_paths`, sharing its cache.
+    """
+    return await sync_to_async(get_lang_url_paths)(page)
+
+
+async def aget_lang_urls(page, request=None, languages=None):
+    """
+    Async counterpart of `switcher.get_lang_urls`, returning urls of all language
+    switcher links at once.
+    """
+    return await sync_to_async(get_lang_urls)(page, request, languages)
+
+
+async def achange_lang(page, lang_code, request=None):
+    """
+    Async counterpart of `change_lang` template tag for pages.
+    """
+    return await sync_to_async(get_lang_url)(page, lang_code, request) or ''
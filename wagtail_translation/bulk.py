@@ -0,0 +1,437 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+import re
+from collections import defaultdict
+
+from django import VERSION as DJANGO_VERSION
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.text import slugify
+from django.utils.translation import get_language
+from django.utils.translation import ugettext_lazy as _
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from modelcluster.models import get_all_child_relations
+from wagtail.core.models import Page, PageRevision, Site
+from wagtail.core.signals import page_published
+
+try:
+    from wagtail.core.models import COMMENTS_RELATION_NAME
+except ImportError:  # wagtail < 2.13
+    COMMENTS_RELATION_NAME = None
+
+from .menu import delete_menu_cache
+from .page_patch import PREFIX
+from .render_cache import delete_render_cache
+from .revision_patch import encode_content_json, get_compact_revisions_mode
+from .route_table import schedule_route_table_compile
+from .search import schedule_index_update
+from .site_patch import delete_root_path_cache
+from .switcher import delete_lang_urls_cache
+
+logger = logging.getLogger('wagtail.core')
+
+__all__ = ['bulk_add_children', 'rebuild_lang_url_paths', 'bulk_publish', 'bulk_publish_subtree']
+
+
+def _get_unique_slug(base_slug, taken_slugs):
+    candidate_slug = base_slug
+    suffix = 1
+
+    while candidate_slug in taken_slugs:
+        suffix += 1
+        candidate_slug = '%s-%d' % (base_slug, suffix)
+
+    return candidate_slug
+
+
+def _slugify(title):
+    if DJANGO_VERSION >= (1, 9):
+        return slugify(title, allow_unicode=True)
+    return slugify(title)
+
+
+def _set_slugs(page, taken_slugs):
+    """
+    In-memory counterpart of `Page.full_clean` slug autogeneration
+    and `Page.clean` slug validation.
+    `taken_slugs` maps language codes to sets of slugs used by siblings.
+    """
+    errors = {}
+    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+        title_field = build_localized_fieldname('title', lang_code)
+        slug_field = build_localized_fieldname('slug', lang_code)
+
+        title = getattr(page, title_field)
+        slug = getattr(page, slug_field)
+        if title and not slug:
+            base_slug = _slugify(title)
+            if base_slug:
+                slug = _get_unique_slug(base_slug, taken_slugs[lang_code])
+                setattr(page, slug_field, slug)
+        elif slug and slug in taken_slugs[lang_code]:
+            errors[slug_field] = _('This slug is already in use')
+
+        if slug:
+            taken_slugs[lang_code].add(slug)
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def _insert_pages(pages, using):
+    # insert wagtailcore_page rows first
+    page_fields = [f for f in Page._meta.local_concrete_fields if not f.primary_key]
+    Page._base_manager._insert(pages, fields=page_fields, using=using)
+
+    # bulk inserts don't return primary keys on every database,
+    # but paths are unique so use them to find out ids
+    ids = dict(
+        Page._base_manager.using(using)
+        .filter(path__in=[page.path for page in pages])
+        .values_list('path', 'id')
+    )
+    pages_by_model = defaultdict(list)
+    for page in pages:
+        page.id = ids[page.path]
+        pages_by_model[page._meta.concrete_model].append(page)
+
+    # insert rows of multi-table inherited models from top to bottom
+    for model, objs in pages_by_model.items():
+        for concrete_model in reversed([model] + model._meta.get_parent_list()):
+            if concrete_model is Page:
+                continue
+            for obj in objs:
+                for link_field in concrete_model._meta.parents.values():
+                    if link_field:
+                        setattr(obj, link_field.attname, obj.id)
+            concrete_model._base_manager._insert(
+                objs, fields=concrete_model._meta.local_concrete_fields, using=using)
+
+    for page in pages:
+        page._state.adding = False
+        page._state.db = using
+
+
+@transaction.atomic
+def bulk_add_children(parent, pages, batch_size=500):
+    """
+    Adds `pages` (unsaved instances of any Page models) as last children of `parent`.
+
+    Produces the same tree paths, localized slugs and url paths as calling
+    `parent.add_child(instance=page)` for every page, but computes them in memory
+    against a single snapshot of existing siblings and inserts pages in batches.
+    Model signals are not sent and pages are not added to the search index.
+    """
+    using = router.db_for_write(Page)
+    # lock parent row, so that concurrent writers don't allocate the same paths
+    parent_obj = parent
+    parent = Page._base_manager.using(using).select_for_update().get(pk=parent_obj.pk)
+    pages = list(pages)
+    if not pages:
+        return pages
+
+    taken_slugs = defaultdict(set)
+    slug_fields = [build_localized_fieldname('slug', lang_code)
+                   for lang_code in mt_settings.AVAILABLE_LANGUAGES]
+    for slugs in parent.get_children().values_list(*slug_fields):
+        for lang_code, slug in zip(mt_settings.AVAILABLE_LANGUAGES, slugs):
+            if slug:
+                taken_slugs[lang_code].add(slug)
+
+    last_child = parent.get_last_child()
+    step = Page._str2int(last_child.path[-Page.steplen:]) if last_child else 0
+    depth = parent.depth + 1
+
+    lang_code = get_language() or mt_settings.DEFAULT_LANGUAGE
+    current_fields = [
+        build_localized_fieldname('title', lang_code),
+        build_localized_fieldname('slug', lang_code),
+    ]
+    for page in pages:
+        if page.pk is not None:
+            raise ValueError('Only unsaved pages can be added: %r' % page)
+
+        step += 1
+        # same as wagtail's pre_save handler setting locale of new pages (wagtail 2.11+)
+        if getattr(page, 'locale_id', False) is None:
+            page.locale_id = parent.locale_id
+        page.depth = depth
+        page.path = Page._get_path(parent.path, depth, step)
+        page.numchild = 0
+
+        _set_slugs(page, taken_slugs)
+        page.set_url_path(parent)
+
+        # same as stripping uuid placeholders in Page.save
+        for field in current_fields:
+            if getattr(page, field) is None:
+                setattr(page, field, '')
+
+        if not page.draft_title:
+            for title_lang in mt_settings.AVAILABLE_LANGUAGES:
+                title = getattr(page, build_localized_fieldname('title', title_lang))
+                if title:
+                    page.draft_title = title
+                    break
+
+    for start in range(0, len(pages), batch_size):
+        _insert_pages(pages[start:start + batch_size], using)
+
+    Page._base_manager.using(using).filter(pk=parent.pk).update(
+        numchild=F('numchild') + len(pages))
+    parent_obj.numchild += len(pages)
+
+    transaction.on_commit(delete_menu_cache, using=using)
+    schedule_route_table_compile()
+
+    logger.info('Pages created: %d pages under id=%d path=%s',
+                len(pages), parent.id, parent.url_path)
+
+    return pages
+
+
+@transaction.atomic
+def rebuild_lang_url_paths(lang_code, autogenerate_slugs=False, batch_size=500):
+    """
+    Recomputes `url_path_<lang>` of every page in a single pass over the tree
+    and writes changed rows with bulk updates.
+    When `autogenerate_slugs` is set, missing slugs of pages having a title
+    in that language are autogenerated the same way `Page.full_clean` does.
+    Returns number of updated pages.
+    """
+    title_field = build_localized_fieldname('title', lang_code)
+    slug_field = build_localized_fieldname('slug', lang_code)
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+
+    rows = list(
+        Page._base_manager.order_by('path')
+        .values_list('id', 'path', title_field, slug_field, url_path_field)
+    )
+
+    taken_slugs = defaultdict(set)
+    for page_id, path, title, slug, url_path in rows:
+        if slug:
+            taken_slugs[path[:-Page.steplen]].add(slug)
+
+    url_paths = {}
+    changed = []
+    for page_id, path, title, slug, old_url_path in rows:
+        parent_path = path[:-Page.steplen]
+        new_slug = slug
+        if autogenerate_slugs and title and not slug:
+            base_slug = _slugify(title)
+            if base_slug:
+                new_slug = _get_unique_slug(base_slug, taken_slugs[parent_path])
+                taken_slugs[parent_path].add(new_slug)
+
+        # same as Page.set_url_path
+        if parent_path in url_paths:
+            url_path = url_paths[parent_path] + (new_slug or '') + '/'
+        else:
+            url_path = '/'
+        url_paths[path] = url_path
+
+        if new_slug != slug or url_path != old_url_path:
+            changed.append(Page(id=page_id, **{slug_field: new_slug, url_path_field: url_path}))
+
+    Page._base_manager.bulk_update(changed, [slug_field, url_path_field], batch_size=batch_size)
+
+    if changed:
+        transaction.on_commit(delete_root_path_cache)
+        transaction.on_commit(delete_menu_cache)
+        transaction.on_commit(delete_lang_urls_cache)
+        delete_render_cache([page.id for page in changed], [lang_code])
+        schedule_route_table_compile()
+
+    return len(changed)
+
+
+# fields which are maintained by tree operations and Page.save, not by revisions
+_NON_REVISION_FIELDS = {'path', 'depth', 'numchild', 'url_path', 'content_type',
+                        'locked', 'locked_by', 'locked_at'}
+_publish_fields = {}
+
+
+def _get_publish_fields(model):
+    if model not in _publish_fields:
+        url_path_fields = {build_localized_fieldname('url_path', lang_code)
+                           for lang_code in mt_settings.AVAILABLE_LANGUAGES}
+        _publish_fields[model] = [
+            f.name for f in model._meta.concrete_fields
+            if not f.primary_key and f.name not in _NON_REVISION_FIELDS and
+            f.name not in url_path_fields
+        ]
+    return _publish_fields[model]
+
+
+def _has_child_objects(model):
+    # comments are kept from the live page on publishing, only their positions change
+    return any(relation.get_accessor_name() != COMMENTS_RELATION_NAME
+               for relation in get_all_child_relations(model))
+
+
+def _scrub_placeholders(content_json, lang_code):
+    """
+    In-memory counterpart of PageRevision pre_save signal handler.
+    Returns scrubbed content dict.
+    """
+    content = json.loads(content_json)
+    xp = re.compile(r"{}[0-9a-f]+".format(PREFIX))
+    field_list = [build_localized_fieldname(field, lang_code) for field in ('title', 'slug', 'url_path')]
+    for field in field_list + ['title', 'slug', 'url_path']:
+        if content.get(field):
+            content[field] = xp.sub('', content[field])
+    return content
+
+
+def _get_latest_revisions(pages):
+    # revisions with unpublished changes, newest per page
+    page_ids = [page.pk for page in pages if page.has_unpublished_changes]
+    if not page_ids:
+        return {}
+    latest_ids = PageRevision.objects.filter(page_id=OuterRef('page_id')).order_by(
+        '-created_at', '-id').values('id')[:1]
+    return {
+        revision.page_id: revision
+        for revision in PageRevision.objects.filter(page_id__in=page_ids, id=Subquery(latest_ids))
+    }
+
+
+def _create_revisions(pages, user, now, lang_code):
+    mode = get_compact_revisions_mode()
+    revisions = []
+    plain_contents = []
+    for page in pages:
+        content = _scrub_placeholders(page.to_json(), lang_code)
+        content_json = json.dumps(content, cls=DjangoJSONEncoder)
+        plain_contents.append(content_json)
+        revisions.append(PageRevision(
+            page=page,
+            content_json=encode_content_json(content_json, content, mode),
+            user=user,
+            submitted_for_moderation=False,
+            created_at=now,
+        ))
+    PageRevision.objects.bulk_create(revisions)
+    for revision, content_json in zip(revisions, plain_contents):
+        revision.content_json = content_json
+
+    if any(revision.pk is None for revision in revisions):
+        # primary keys are not returned by bulk_create on every database
+        ids = dict(
+            PageRevision.objects.filter(page_id__in=[page.pk for page in pages], created_at=now)
+            .order_by('id').values_list('page_id', 'id')
+        )
+        for revision in revisions:
+            revision.id = ids[revision.page_id]
+    return {revision.page_id: revision for revision in revisions}
+
+
+@transaction.atomic
+def _publish_batch(page_ids, user):
+    now = timezone.now()
+    lang_code = get_language() or mt_settings.DEFAULT_LANGUAGE
+    # all translation fields are needed for revisions
+    pages = list(Page.objects.filter(pk__in=page_ids).defer(None).order_by('path').specific())
+
+    revisions = _get_latest_revisions(pages)
+    revisions.update(_create_revisions(
+        [page for page in pages if page.pk not in revisions], user, now, lang_code))
+
+    slug_fields = [build_localized_fieldname('slug', lang)
+                   for lang in mt_settings.AVAILABLE_LANGUAGES]
+    title_slug_fields = [(build_localized_fieldname('title', lang), build_localized_fieldname('slug', lang))
+                         for lang in mt_settings.AVAILABLE_LANGUAGES]
+    objs_by_model = defaultdict(list)
+    published = []
+    published_one_by_one = []
+    comments = []
+    for page in pages:
+        revision = revisions[page.pk]
+        revision.page = page
+        obj = revision.as_page_object()
+
+        if obj.go_live_at and obj.go_live_at > now:
+            # scheduled pages are left for publish_scheduled_pages
+            continue
+
+        if (_has_child_objects(type(obj)) or
+                any(getattr(obj, f) != getattr(page, f) for f in slug_fields) or
+                any(getattr(obj, title_field) and not getattr(obj, slug_field)
+                    for title_field, slug_field in title_slug_fields)):
+            # child objects, slug autogeneration and url path changes are handled by Page.save
+            revision.publish()
+            published_one_by_one.append(obj)
+            continue
+
+        obj.live = True
+        obj.has_unpublished_changes = False
+        obj.live_revision = revision
+        obj.expired = False
+        obj.draft_title = obj.title
+        obj.latest_revision_created_at = max(
+            obj.latest_revision_created_at or revision.created_at, revision.created_at)
+        obj.last_published_at = now
+        if obj.first_published_at is None:
+            obj.first_published_at = now
+        objs_by_model[type(obj)].append(obj)
+        published.append((obj, revision))
+        if COMMENTS_RELATION_NAME:
+            comments.extend(getattr(obj, COMMENTS_RELATION_NAME).all())
+
+    for model, objs in objs_by_model.items():
+        model._base_manager.bulk_update(objs, _get_publish_fields(model))
+    if comments:
+        type(comments[0])._base_manager.bulk_update(comments, ['position'])
+
+    published_ids = [obj.pk for obj, revision in published]
+    PageRevision.objects.filter(page_id__in=published_ids, submitted_for_moderation=True).update(
+        submitted_for_moderation=False)
+
+    schedule_index_update(published_ids)
+    transaction.on_commit(delete_menu_cache)
+    transaction.on_commit(delete_lang_urls_cache)
+    delete_render_cache(published_ids)
+    if Site.objects.filter(root_page_id__in=published_ids).exists():
+        transaction.on_commit(delete_root_path_cache)
+    schedule_route_table_compile()
+
+    for obj, revision in published:
+        page_published.send(sender=obj.specific_class, instance=obj, revision=revision)
+
+    return [obj for obj, revision in published] + published_one_by_one
+
+
+def bulk_publish(pages, user=None, batch_size=100):
+    """
+    Publishes `pages` (or page ids): the latest revision of pages having unpublished
+    changes, otherwise a new revision created from current state of the page.
+
+    Revisions are created in batches and live fields are written with bulk updates.
+    Search index, cache and route table updates happen once per batch.
+    Pages whose slugs change or have to be autogenerated or which have child objects (inline panels)
+    are published one by one the usual way, pages scheduled to go live later are skipped.
+    Returns published page objects.
+    """
+    page_ids = [getattr(page, 'pk', page) for page in pages]
+    published = []
+    for start in range(0, len(page_ids), batch_size):
+        published.extend(_publish_batch(page_ids[start:start + batch_size], user))
+
+    logger.info('Pages published: %d pages', len(published))
+    return published
+
+
+def bulk_publish_subtree(page, user=None, inclusive=True, batch_size=100):
+    """
+    Publishes `page` and all its descendants, see `bulk_publish`.
+    """
+    page_ids = list(
+        page.get_descendants(inclusive=inclusive).order_by('path').values_list('pk', flat=True))
+    return bulk_publish(page_ids, user=user, batch_size=batch_size)
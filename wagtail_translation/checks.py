@@ -0,0 +1,52 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+from .indexes import UNIQUE_SLUG_INDEX_VENDORS, get_missing_unique_slug_indexes
+from .utils import optimistic_slugs_enabled
+
+
+@register(Tags.compatibility)
+def check_optimistic_slugs(app_configs, **kwargs):
+    """
+    Optimistic slug mode relies on unique indexes, which are only supported on some databases.
+    """
+    if not optimistic_slugs_enabled():
+        return []
+    return [
+        Error(
+            'WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS is not supported on {} (database {!r}).'.format(
+                connections[alias].vendor, alias),
+            hint='Supported databases: {}.'.format(', '.join(UNIQUE_SLUG_INDEX_VENDORS)),
+            id='wagtail_translation.E001',
+        )
+        for alias in connections
+        if connections[alias].vendor not in UNIQUE_SLUG_INDEX_VENDORS
+    ]
+
+
+@register(Tags.database)
+def check_unique_slug_indexes(app_configs, databases=None, **kwargs):
+    """
+    Without unique indexes optimistic slug mode doesn't keep sibling slugs unique.
+    Run by `migrate` and `check --database`.
+    """
+    from wagtail.core.models import Page
+
+    if not optimistic_slugs_enabled():
+        return []
+    errors = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor not in UNIQUE_SLUG_INDEX_VENDORS:
+            continue
+        missing = get_missing_unique_slug_indexes(connection, Page)
+        if missing:
+            errors.append(Error(
+                'Unique slug indexes are missing for languages {} (database {!r}), '
+                'required by WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS.'.format(', '.join(missing), alias),
+                hint='Run ./manage.py create_translation_indexes --unique-slugs.',
+                id='wagtail_translation.E002',
+            ))
+    return errors
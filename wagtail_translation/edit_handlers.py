@@ -1,11 +1,18 @@
 from django import forms
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.http import urlencode
+from django.utils.translation import get_language
 from django.utils.translation import ugettext_lazy as _
 from modeltranslation import settings as mt_settings
 from modeltranslation.utils import build_localized_fieldname
-from wagtail.admin.edit_handlers import FieldPanel, MultiFieldPanel
+from wagtail.admin.edit_handlers import FieldPanel, MultiFieldPanel, ObjectList
 from wagtail.admin.forms import WagtailAdminPageForm
 
+from .tree_cache import tree_cache
 from .utils import deprecated, get_lang_obj, obj_per_lang, page_slug_is_available
 
 
@@ -32,11 +39,109 @@ promote_panels = [
 ]
 
 
+# name of hidden input telling that fields of a language were rendered and submitted
+LOADED_LANGUAGE_FIELD_FMT = 'wagtail_translation_loaded_{}'
+
+
+def get_active_language():
+    lang_code = get_language()
+    if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+    return lang_code
+
+
+class LanguageObjectList(ObjectList):
+    """
+    Tab with fields of a single language.
+
+    Only the tab of active language (or tabs submitted with a bound form) is rendered,
+    other tabs are rendered as placeholders and loaded on demand by
+    `wagtail_translation/js/language_tabs.js`.
+    """
+    def __init__(self, children=(), lang_code=None, *args, **kwargs):
+        if lang_code is not None and not kwargs.get('heading'):
+            kwargs['heading'] = dict(settings.LANGUAGES).get(lang_code, lang_code)
+        super(LanguageObjectList, self).__init__(children, *args, **kwargs)
+        self.lang_code = lang_code
+
+    def clone(self):
+        new = super(LanguageObjectList, self).clone()
+        new.lang_code = self.lang_code
+        return new
+
+    @property
+    def is_loaded(self):
+        loaded_languages = getattr(getattr(self, 'form', None), 'loaded_languages', None)
+        return loaded_languages is None or self.lang_code in loaded_languages
+
+    def on_form_bound(self):
+        # fields of languages which were not submitted are left out of the form
+        if self.is_loaded:
+            super(LanguageObjectList, self).on_form_bound()
+
+    def get_fragment_url(self):
+        if self.instance.pk:
+            query = {'page': self.instance.pk}
+        else:
+            query = {
+                'content_type': ContentType.objects.get_for_model(self.instance).pk,
+                'parent': self.form.parent_page.pk,
+            }
+        return '{}?{}'.format(
+            reverse('wagtail_translation_language_panel', args=(self.lang_code,)), urlencode(query))
+
+    def render(self):
+        if self.is_loaded:
+            return format_html(
+                '<input type="hidden" name="{}" value="1">{}',
+                LOADED_LANGUAGE_FIELD_FMT.format(self.lang_code),
+                super(LanguageObjectList, self).render())
+        return format_html(
+            '<div class="wagtail-translation-lazy-panel" data-url="{}"><p>{}</p></div>',
+            self.get_fragment_url(), _('Loading...'))
+
+
+def language_tabs(field_names, languages=None):
+    """
+    Returns a `LanguageObjectList` tab per language with panels of translated `field_names`.
+    Use them as tabs of page `edit_handler`, at most one tab per language.
+    """
+    return [
+        LanguageObjectList(
+            [FieldPanel(build_localized_fieldname(field_name, lang_code))
+             for field_name in field_names],
+            lang_code=lang_code)
+        for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES
+    ]
+
+
+def iter_language_panels(edit_handler):
+    for child in getattr(edit_handler, 'children', []):
+        if isinstance(child, LanguageObjectList):
+            yield child
+        else:
+            for panel in iter_language_panels(child):
+                yield panel
+
+
+def find_language_panel(edit_handler, lang_code):
+    for panel in iter_language_panels(edit_handler):
+        if panel.lang_code == lang_code:
+            return panel
+    return None
+
+
 # replacement base form for pages
 class WagtailAdminTranslatablePageForm(WagtailAdminPageForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.loaded_languages = self.get_loaded_languages()
+        if self.is_bound and self.loaded_languages is not None:
+            # bind and validate only languages which were rendered and submitted
+            self.drop_language_fields(
+                set(mt_settings.AVAILABLE_LANGUAGES) - self.loaded_languages)
+
         required_fields = getattr(
             self.instance, "required_translation_fields", [])
         if not required_fields:
@@ -52,6 +157,32 @@ class WagtailAdminTranslatablePageForm(WagtailAdminPageForm):
                     self.fields[localized].label = "{}*".format(
                         self.fields[localized].label)
 
+    def get_loaded_languages(self):
+        """
+        Returns languages whose fields are rendered by `LanguageObjectList` tabs,
+        or None when all of them are (a form submitted without language tabs).
+        """
+        if not self.is_bound:
+            return {get_active_language()}
+        submitted = {
+            lang_code for lang_code in mt_settings.AVAILABLE_LANGUAGES
+            if LOADED_LANGUAGE_FIELD_FMT.format(lang_code) in self.data
+        }
+        return submitted or None
+
+    def drop_language_fields(self, languages):
+        # only fields of language tabs which were not rendered,
+        # translated fields of other panels are always submitted
+        for panel in iter_language_panels(type(self.instance).get_edit_handler()):
+            if panel.lang_code in languages:
+                for field_name in panel.required_fields():
+                    self.fields.pop(field_name, None)
+
+    def full_clean(self):
+        # share parent and sibling lookups between form and model validation
+        with tree_cache():
+            super(WagtailAdminTranslatablePageForm, self).full_clean()
+
     def clean(self):
         cleaned_data = super(WagtailAdminTranslatablePageForm, self).clean()
 
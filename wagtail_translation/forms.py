@@ -8,6 +8,8 @@ from modeltranslation.utils import build_localized_fieldname
 from wagtail.admin import widgets
 from wagtail.core.models import Page
 
+from .utils import copy_preflight, get_copy_slug_conflicts
+
 
 class CopyForm(forms.Form):
     def __init__(self, *args, **kwargs):
@@ -16,11 +18,14 @@ class CopyForm(forms.Form):
         self.user = kwargs.pop('user', None)
         can_publish = kwargs.pop('can_publish')
         super(CopyForm, self).__init__(*args, **kwargs)
+        # initial slugs, as found in cleaned data when they're not changed
+        self.preflight_slugs = {}
         for lang in mt_settings.AVAILABLE_LANGUAGES:
             new_title_field = build_localized_fieldname("new_title", lang)
             title_field = build_localized_fieldname("title", lang)
             new_slug_field = build_localized_fieldname("new_slug", lang)
             slug_field = build_localized_fieldname("slug", lang)
+            self.preflight_slugs[lang] = None
             if getattr(self.page, title_field):
                 self.fields[new_title_field] = forms.CharField(
                     initial=getattr(self.page, title_field),
@@ -28,16 +33,20 @@ class CopyForm(forms.Form):
                 self.fields[new_slug_field] = forms.SlugField(
                     initial=getattr(self.page, slug_field),
                     label=_("New slug [{}]".format(lang)))
+                self.preflight_slugs[lang] = getattr(self.page, slug_field)
 
+        self.parent_page = self.page.get_parent()
         self.fields['new_parent_page'] = forms.ModelChoiceField(
-            initial=self.page.get_parent(),
+            initial=self.parent_page,
             queryset=Page.objects.all(),
             widget=widgets.AdminPageChooser(can_choose_root=True, user_perms='copy_to'),
             label=_("New parent page"),
             help_text=_("This copy will be a child of this given parent page.")
         )
-        pages_to_copy = self.page.get_descendants(inclusive=True)
-        subpage_count = pages_to_copy.count() - 1
+        # subtree and live page counts and slug conflicts at the source parent
+        # in a single query, reused by clean and the copy view
+        self.preflight = copy_preflight(self.page, self.parent_page, self.preflight_slugs)
+        subpage_count = self.preflight['subpage_count']
         if subpage_count > 0:
             self.fields['copy_subpages'] = forms.BooleanField(
                 required=False, initial=True, label=_("Copy subpages"),
@@ -47,7 +56,7 @@ class CopyForm(forms.Form):
                     subpage_count) % {'count': subpage_count})
 
         if can_publish:
-            pages_to_publish_count = pages_to_copy.live().count()
+            pages_to_publish_count = self.preflight['live_count']
             if pages_to_publish_count > 0:
                 # In the specific case that there are no subpages, customise the field label and help text
                 if subpage_count == 0:
@@ -68,7 +77,7 @@ class CopyForm(forms.Form):
         cleaned_data = super(CopyForm, self).clean()
 
         # New parent page given in form or parent of source, if parent_page is empty
-        parent_page = cleaned_data.get('new_parent_page') or self.page.get_parent()
+        parent_page = cleaned_data.get('new_parent_page') or self.parent_page
 
         # check if user is allowed to create a page at given location.
         if not parent_page.permissions_for_user(self.user).can_add_subpage():
@@ -77,19 +86,23 @@ class CopyForm(forms.Form):
             ])
 
         # Make sure the slug isn't already in use
-        for lang in mt_settings.AVAILABLE_LANGUAGES:
+        # within the context of our copy's parent page
+        slugs = {
+            lang: cleaned_data.get(build_localized_fieldname("new_slug", lang))
+            for lang in mt_settings.AVAILABLE_LANGUAGES
+        }
+        if parent_page != self.parent_page or slugs != self.preflight_slugs:
+            self.preflight.update(get_copy_slug_conflicts(parent_page, slugs))
+        conflicts = self.preflight['conflicts']
+        autogenerated_slugs = self.preflight['autogenerated_slugs']
+        for lang in conflicts:
             new_slug_field = build_localized_fieldname("new_slug", lang)
-            slug_field = build_localized_fieldname("slug", lang)
-
-            slug = cleaned_data.get(new_slug_field)
-
-            # Count the pages with the same slug within the context of our copy's parent page
-            if slug and parent_page.get_children().filter(**{slug_field: slug}).count():
-                self._errors[new_slug_field] = self.error_class(
-                    [_("This slug is already in use within the context of its parent page \"%s\"" % parent_page)]
-                )
-                # The slug is no longer valid, hence remove it from cleaned_data
-                del cleaned_data[new_slug_field]
+            self._errors[new_slug_field] = self.error_class([
+                _("This slug is already in use within the context of its parent page \"%(parent)s\", "
+                  "\"%(slug)s\" is available") % {'parent': parent_page, 'slug': autogenerated_slugs[lang]}
+            ])
+            # The slug is no longer valid, hence remove it from cleaned_data
+            del cleaned_data[new_slug_field]
 
         # Don't allow recursive copies into self
         if cleaned_data.get('copy_subpages') and (self.page == parent_page or parent_page.is_descendant_of(self.page)):
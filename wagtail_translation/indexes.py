@@ -0,0 +1,191 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+
+from django.db import models
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+__all__ = [
+    'get_lang_indexes', 'get_routable_sql', 'create_lang_indexes', 'drop_lang_indexes',
+    'create_unique_slug_indexes', 'get_missing_unique_slug_indexes', 'drop_unique_slug_indexes',
+]
+
+
+def _shorten_index_name(name):
+    # index names are limited to 30 characters,
+    # longer ones are cut and made unique by a hash of the full name
+    if len(name) <= 30:
+        return name
+    return '{}_{}'.format(name[:21], hashlib.md5(name.encode('utf-8')).hexdigest()[:8])
+
+
+def _get_index_name(field_name):
+    return _shorten_index_name('wtt_{}_idx'.format(field_name))
+
+
+# vendors supporting indexes on text columns without a prefix length
+# (MySQL requires one, SQL Server can't index nvarchar(max) at all)
+URL_PATH_INDEX_VENDORS = ('postgresql', 'sqlite')
+
+
+def get_lang_indexes(lang_code, vendor=None):
+    """
+    Returns Page indexes used by queries on `lang_code` translation fields:
+    sibling slug lookups (depth, slug, children path range) and url_path lookups
+    (both exact and prefix ones). url_path is a text column, so its index is only
+    returned for `vendor` in URL_PATH_INDEX_VENDORS (or when `vendor` is not given).
+    Operator classes are only used on PostgreSQL.
+    """
+    slug_field = build_localized_fieldname('slug', lang_code)
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+    indexes = [
+        models.Index(
+            fields=['depth', slug_field, 'path'],
+            name=_get_index_name(slug_field),
+            opclasses=['int4_ops', 'varchar_ops', 'varchar_ops']),
+    ]
+    if vendor is None or vendor in URL_PATH_INDEX_VENDORS:
+        indexes.append(models.Index(
+            fields=[url_path_field],
+            name=_get_index_name(url_path_field),
+            opclasses=['text_pattern_ops']))
+    return indexes
+
+
+# vendors supporting indexes on expressions
+ROUTABLE_INDEX_VENDORS = ('postgresql', 'sqlite')
+
+
+def _get_routable_expression_sql(vendor, column):
+    # url_path has an empty segment ('//') when the page or its ancestor has no slug
+    function = 'STRPOS' if vendor == 'postgresql' else 'INSTR'
+    return "(COALESCE({}({}, '//'), 1) = 0)".format(function, column)
+
+
+def get_routable_sql(vendor, column, routable=True):
+    """
+    Returns SQL condition matching rows which url_path `column` is (or isn't) routable.
+    It compares the same expression which routable indexes are built on, with literal values
+    only, so that the index can be used instead of a `LIKE '%//%'` scan.
+    """
+    if vendor == 'postgresql':
+        value = 'true' if routable else 'false'
+    else:
+        value = '1' if routable else '0'
+    return '({} = {})'.format(_get_routable_expression_sql(vendor, column), value)
+
+
+def _get_routable_index_sql(schema_editor, model, lang_code):
+    quote_name = schema_editor.quote_name
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+    return 'CREATE INDEX {name} ON {table} ({expression}, {path})'.format(
+        name=quote_name(_get_index_name(url_path_field + '_routable')),
+        table=quote_name(model._meta.db_table),
+        expression=_get_routable_expression_sql(
+            schema_editor.connection.vendor,
+            quote_name(model._meta.get_field(url_path_field).column)),
+        path=quote_name(model._meta.get_field('path').column),
+    )
+
+
+def _get_existing_index_names(connection, model):
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+
+def create_lang_indexes(schema_editor, model, languages=None):
+    """
+    Creates missing translation field indexes of `model` (Page) for `languages`
+    (all available languages by default). Returns names of created indexes.
+    """
+    existing = _get_existing_index_names(schema_editor.connection, model)
+    created = []
+    for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES:
+        for index in get_lang_indexes(lang_code, schema_editor.connection.vendor):
+            if index.name not in existing:
+                schema_editor.add_index(model, index)
+                created.append(index.name)
+        name = _get_index_name(build_localized_fieldname('url_path', lang_code) + '_routable')
+        if name not in existing and schema_editor.connection.vendor in ROUTABLE_INDEX_VENDORS:
+            schema_editor.execute(_get_routable_index_sql(schema_editor, model, lang_code))
+            created.append(name)
+    return created
+
+
+def drop_lang_indexes(schema_editor, model, languages=None):
+    existing = _get_existing_index_names(schema_editor.connection, model)
+    for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES:
+        for index in get_lang_indexes(lang_code, schema_editor.connection.vendor):
+            if index.name in existing:
+                schema_editor.remove_index(model, index)
+        name = _get_index_name(build_localized_fieldname('url_path', lang_code) + '_routable')
+        if name in existing:
+            schema_editor.execute('DROP INDEX {}'.format(schema_editor.quote_name(name)))
+
+
+# vendors supporting unique indexes on expressions with a condition
+UNIQUE_SLUG_INDEX_VENDORS = ('postgresql', 'sqlite')
+
+
+def _get_unique_slug_index_name(slug_field):
+    return _shorten_index_name('wtt_uniq_{}'.format(slug_field))
+
+
+def _get_unique_slug_index_sql(schema_editor, model, lang_code):
+    """
+    Unique index on (parent path, slug_<lang>) ignoring empty slugs.
+    Parent path is the page path without its last step.
+    """
+    quote_name = schema_editor.quote_name
+    slug_field = build_localized_fieldname('slug', lang_code)
+    slug_column = quote_name(model._meta.get_field(slug_field).column)
+    path_column = quote_name(model._meta.get_field('path').column)
+    return (
+        'CREATE UNIQUE INDEX {name} ON {table} (substr({path}, 1, length({path}) - {steplen}), {slug}) '
+        "WHERE {slug} IS NOT NULL AND {slug} <> ''".format(
+            name=quote_name(_get_unique_slug_index_name(slug_field)),
+            table=quote_name(model._meta.db_table),
+            path=path_column,
+            steplen=int(model.steplen),
+            slug=slug_column,
+        )
+    )
+
+
+def create_unique_slug_indexes(schema_editor, model, languages=None):
+    """
+    Creates missing unique sibling slug indexes of `model` (Page) for `languages`
+    (all available languages by default), used by optimistic slug mode.
+    Existing duplicate slugs have to be fixed before. Nothing is created on unsupported
+    databases (see `checks.check_optimistic_slugs`).
+    Returns names of created indexes.
+    """
+    if schema_editor.connection.vendor not in UNIQUE_SLUG_INDEX_VENDORS:
+        return []
+
+    created = []
+    for lang_code in get_missing_unique_slug_indexes(schema_editor.connection, model, languages):
+        schema_editor.execute(_get_unique_slug_index_sql(schema_editor, model, lang_code))
+        created.append(_get_unique_slug_index_name(build_localized_fieldname('slug', lang_code)))
+    return created
+
+
+def get_missing_unique_slug_indexes(connection, model, languages=None):
+    """
+    Returns codes of `languages` (all available languages by default)
+    which unique sibling slug indexes of `model` (Page) don't exist.
+    """
+    existing = _get_existing_index_names(connection, model)
+    return [
+        lang_code for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES
+        if _get_unique_slug_index_name(build_localized_fieldname('slug', lang_code)) not in existing
+    ]
+
+
+def drop_unique_slug_indexes(schema_editor, model, languages=None):
+    existing = _get_existing_index_names(schema_editor.connection, model)
+    for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES:
+        name = _get_unique_slug_index_name(build_localized_fieldname('slug', lang_code))
+        if name in existing:
+            schema_editor.execute('DROP INDEX {}'.format(schema_editor.quote_name(name)))
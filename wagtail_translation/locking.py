@@ -0,0 +1,111 @@
+from __future__ import absolute_import, unicode_literals
+
+import logging
+import threading
+import zlib
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from wagtail.core.models import Page
+
+logger = logging.getLogger('wagtail.core')
+
+__all__ = ['lock_subtrees', 'subtree_locks']
+
+
+# first key of every advisory lock taken by wagtail-translation
+LOCK_NAMESPACE = 0x7774
+
+# SQLite serializes writing transactions by itself
+SERIALIZED_VENDORS = ('sqlite',)
+
+_held = threading.local()
+_warned_vendors = set()
+
+
+def _get_lock_key(path):
+    key = zlib.crc32(path.encode('utf-8'))
+    # postgres expects signed integers
+    if key >= 1 << 31:
+        key -= 1 << 32
+    return key
+
+
+def _is_held(using, path):
+    return any(
+        held_using == using and path.startswith(held_path)
+        for held_using, held_path in getattr(_held, 'paths', ())
+    )
+
+
+def get_subtree_locks(paths, using=DEFAULT_DB_ALIAS):
+    """
+    Returns a list of (path, is_exclusive) locks to take for subtrees rooted at `paths`
+    in the order they have to be taken. Subtrees already locked by enclosing
+    `subtree_locks` are left out.
+    """
+    exclusive = set(path for path in paths if path and not _is_held(using, path))
+    shared = set()
+    for path in exclusive:
+        for end in range(Page.steplen, len(path), Page.steplen):
+            shared.add(path[:end])
+    shared -= exclusive
+
+    return sorted([(path, False) for path in shared] + [(path, True) for path in exclusive])
+
+
+def lock_subtrees(*paths, **kwargs):
+    """
+    Takes transaction level advisory locks for page subtrees rooted at `paths`.
+
+    Every subtree is locked exclusively while all its ancestors are locked in shared mode.
+    This way operations on overlapping subtrees queue up, while the ones in unrelated
+    subtrees run in parallel. Locks are always taken in path order (ancestors first),
+    so that concurrent transactions don't deadlock.
+
+    Only PostgreSQL is supported. SQLite serializes writes anyway,
+    on other databases a warning is logged once and nothing is locked.
+    Must be called inside a transaction. Returns whether any locks were taken
+    (rows read before may have been changed while waiting for them).
+    """
+    using = kwargs.get('using') or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        if connection.vendor not in SERIALIZED_VENDORS and connection.vendor not in _warned_vendors:
+            _warned_vendors.add(connection.vendor)
+            logger.warning(
+                'Page subtree locks are not supported on %s, concurrent page moves '
+                'and slug changes may deadlock', connection.vendor)
+        return False
+
+    locks = get_subtree_locks(paths, using)
+    if not locks:
+        return False
+    # select list is evaluated in order, so one query takes all locks in path order
+    params = []
+    for path, is_exclusive in locks:
+        params.extend([LOCK_NAMESPACE, _get_lock_key(path)])
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT {}'.format(', '.join(
+            'pg_advisory_xact_lock{}(%s, %s)'.format('' if is_exclusive else '_shared')
+            for path, is_exclusive in locks)), params)
+    return True
+
+
+@contextmanager
+def subtree_locks(*paths, **kwargs):
+    """
+    Same as `lock_subtrees`, but lets `lock_subtrees` calls made within the block
+    (e.g. by `save()` called from `move()`) skip subtrees locked already,
+    instead of taking more locks out of path order.
+    Yields whether any locks were taken (see `lock_subtrees`).
+    Must be used inside a transaction.
+    """
+    using = kwargs.get('using') or DEFAULT_DB_ALIAS
+    locked = lock_subtrees(*paths, using=using)
+    previous = getattr(_held, 'paths', ())
+    _held.paths = previous + tuple((using, path) for path in paths if path)
+    try:
+        yield locked
+    finally:
+        _held.paths = previous
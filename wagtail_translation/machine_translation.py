@@ -0,0 +1,180 @@
+from __future__ import absolute_import, unicode_literals
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from modeltranslation import settings as mt_settings
+from modeltranslation.translator import translator
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from .bulk import rebuild_lang_url_paths
+from .search import get_indexed_fields, schedule_index_update
+
+logger = logging.getLogger('wagtail.core')
+
+__all__ = [
+    'BaseTranslationBackend',
+    'DummyTranslationBackend',
+    'get_translation_backend',
+    'get_machine_translatable_fields',
+    'fill_empty_translations',
+]
+
+
+class BaseTranslationBackend(object):
+    """
+    Base class for machine translation backends.
+    `translate` is called from worker threads, so it should not use the database.
+    """
+    def translate(self, texts, source_lang, target_lang):
+        """
+        Returns a list of translations of `texts` in the same order.
+        """
+        raise NotImplementedError
+
+
+class DummyTranslationBackend(BaseTranslationBackend):
+    """
+    Deterministic backend for development and tests.
+    Prefixes every text with target language code.
+    """
+    def translate(self, texts, source_lang, target_lang):
+        return ['[{}] {}'.format(target_lang, text) for text in texts]
+
+
+def get_translation_backend(backend=None):
+    backend = backend or getattr(settings, 'WAGTAIL_TRANSLATION_MT_BACKEND', None)
+    if not backend:
+        raise ImproperlyConfigured(
+            'WAGTAIL_TRANSLATION_MT_BACKEND setting must be set to use machine translation')
+    return import_string(backend)()
+
+
+def get_machine_translatable_fields(model):
+    """
+    Returns names of text fields registered for translation
+    directly on `model` (not inherited).
+    Slugs and non editable fields (like url_path) are derived, so they are left out.
+    """
+    opts = translator.get_options_for_model(model)
+    ret = []
+    for field_name in opts.local_fields:
+        field = model._meta.get_field(field_name)
+        if (field.editable and isinstance(field, (models.CharField, models.TextField)) and
+                not isinstance(field, models.SlugField)):
+            ret.append(field_name)
+    return ret
+
+
+def _find_empty_fields(model, field_names, source_lang, target_lang):
+    """
+    Yields (pk, target field, source text) for every empty target language field
+    that has a value in source language.
+    """
+    for field_name in field_names:
+        source_field = build_localized_fieldname(field_name, source_lang)
+        target_field = build_localized_fieldname(field_name, target_lang)
+        qs = model._base_manager.filter(
+            Q(**{target_field + '__isnull': True}) | Q(**{target_field: ''})
+        ).exclude(
+            Q(**{source_field + '__isnull': True}) | Q(**{source_field: ''})
+        ).values_list('pk', source_field)
+        for pk, text in qs.iterator():
+            yield pk, target_field, text
+
+
+def _translate_all(backend, texts_by_lang, source_lang, batch_size, workers):
+    translations = defaultdict(dict)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for target_lang, texts in texts_by_lang.items():
+            texts = sorted(texts)
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                future = executor.submit(backend.translate, batch, source_lang, target_lang)
+                futures[future] = (target_lang, batch)
+
+        for future in as_completed(futures):
+            target_lang, batch = futures[future]
+            translations[target_lang].update(zip(batch, future.result()))
+
+    return translations
+
+
+def fill_empty_translations(source_lang=None, target_langs=None, models=None, fields=None,
+                            backend=None, batch_size=50, workers=4, dry_run=False):
+    """
+    Fills empty translation fields using machine translation of source language values.
+
+    Texts are deduplicated, split into batches per target language and translated
+    concurrently. Results are written with bulk updates. When Page titles get translated,
+    missing slugs and url paths are derived for the whole tree in a single pass per language.
+    Pages with filled search fields are added to search index after commit.
+    Returns a dict mapping target language codes to numbers of filled fields.
+    """
+    source_lang = source_lang or mt_settings.DEFAULT_LANGUAGE
+    if target_langs is None:
+        target_langs = [lang_code for lang_code in mt_settings.AVAILABLE_LANGUAGES
+                        if lang_code != source_lang]
+    if models is None:
+        models = [model for model in translator.get_registered_models(abstract=False)
+                  if not model._meta.proxy]
+    if not isinstance(backend, BaseTranslationBackend):
+        backend = get_translation_backend(backend)
+
+    # (model, target_lang) -> [(pk, target field, source text)]
+    empty_fields = defaultdict(list)
+    texts_by_lang = defaultdict(set)
+    for model in models:
+        field_names = [f for f in get_machine_translatable_fields(model)
+                       if fields is None or f in fields]
+        if not field_names:
+            continue
+        for target_lang in target_langs:
+            for pk, target_field, text in _find_empty_fields(
+                    model, field_names, source_lang, target_lang):
+                empty_fields[(model, target_lang)].append((pk, target_field, text))
+                texts_by_lang[target_lang].add(text)
+
+    translations = _translate_all(backend, texts_by_lang, source_lang, batch_size, workers)
+
+    counts = defaultdict(int)
+    indexed_pks = set()
+    with transaction.atomic():
+        for (model, target_lang), items in empty_fields.items():
+            # other fields of the same objects may not be empty,
+            # so every field gets its own bulk update
+            objs_by_field = defaultdict(list)
+            for pk, target_field, text in items:
+                translation = translations[target_lang].get(text)
+                if not translation:
+                    continue
+                obj = model(pk=pk)
+                setattr(obj, target_field, translation)
+                objs_by_field[target_field].append(obj)
+                counts[target_lang] += 1
+
+            if not dry_run:
+                indexed_fields = get_indexed_fields(model) if issubclass(model, Page) else {}
+                for target_field, objs in objs_by_field.items():
+                    model._base_manager.bulk_update(objs, [target_field], batch_size=500)
+                    # bulk updates don't send post_save, which updates search index
+                    if indexed_fields is None or target_field in indexed_fields:
+                        indexed_pks.update(obj.pk for obj in objs)
+
+            if (model is Page and not dry_run and
+                    build_localized_fieldname('title', target_lang) in objs_by_field):
+                rebuild_lang_url_paths(target_lang, autogenerate_slugs=True)
+
+        if indexed_pks:
+            schedule_index_update(indexed_pks)
+        logger.info('Machine translation filled: %s', dict(counts))
+
+    return dict(counts)
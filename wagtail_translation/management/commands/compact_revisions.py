@@ -0,0 +1,91 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from wagtail.core.models import PageRevision
+
+from wagtail_translation.revision_patch import (
+    decode_content, encode_content_json, get_compact_revisions_mode, get_delta_base_id,
+    is_compact)
+
+
+class Command(BaseCommand):
+    help = ('Rewrites stored page revisions in the format set by WAGTAIL_TRANSLATION_COMPACT_REVISIONS '
+            '(or --mode) and reports storage size and decoding time before and after.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=['plain', 'compress', 'delta'],
+            help='Storage format (defaults to WAGTAIL_TRANSLATION_COMPACT_REVISIONS setting).')
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Only report sizes, do not write anything.')
+        parser.add_argument(
+            '--batch-size', type=int, default=200, help='Revisions written at once.')
+
+    def _write(self, revisions):
+        with transaction.atomic():
+            # bulk update doesn't send signals, so stored content is written as is
+            PageRevision.objects.bulk_update(revisions, ['content_json'])
+
+    def handle(self, *args, **options):
+        mode = options['mode'] or get_compact_revisions_mode()
+        if mode is None:
+            raise CommandError('WAGTAIL_TRANSLATION_COMPACT_REVISIONS setting or --mode must be set')
+        if mode == 'plain':
+            mode = None
+
+        stats = {'count': 0, 'size_before': 0, 'size_after': 0, 'decode_before': 0.0, 'decode_after': 0.0}
+        changed = []
+        changed_count = 0
+        page_id = None
+        contents = {}
+        base = None
+
+        rows = PageRevision.objects.order_by('page_id', 'created_at', 'id').values_list(
+            'id', 'page_id', 'content_json')
+        for revision_id, revision_page_id, stored in rows.iterator():
+            if revision_page_id != page_id:
+                # delta bases always belong to the same page
+                page_id = revision_page_id
+                contents = {}
+                base = None
+
+            start = time.perf_counter()
+            content = decode_content(stored, contents=contents)
+            stats['decode_before'] += time.perf_counter() - start
+            contents[revision_id] = content
+
+            if mode is None and not is_compact(stored):
+                new_stored = stored
+            else:
+                new_stored = encode_content_json(json.dumps(content), content, mode, base)
+            if get_delta_base_id(new_stored) is None:
+                base = (revision_id, content)
+
+            start = time.perf_counter()
+            decode_content(new_stored, contents=contents)
+            stats['decode_after'] += time.perf_counter() - start
+
+            stats['count'] += 1
+            stats['size_before'] += len(stored)
+            stats['size_after'] += len(new_stored)
+            if new_stored != stored:
+                changed_count += 1
+                changed.append(PageRevision(id=revision_id, content_json=new_stored))
+            if len(changed) >= options['batch_size']:
+                if not options['dry_run']:
+                    self._write(changed)
+                changed = []
+
+        if not options['dry_run'] and changed:
+            self._write(changed)
+
+        count = stats['count'] or 1
+        self.stdout.write('Revisions: {} ({} {})'.format(
+            stats['count'], changed_count, 'to change' if options['dry_run'] else 'changed'))
+        self.stdout.write('Stored size: {} -> {} bytes ({:.1%})'.format(
+            stats['size_before'], stats['size_after'],
+            float(stats['size_after']) / (stats['size_before'] or 1)))
+        self.stdout.write('Average decoding time: {:.3f} ms -> {:.3f} ms'.format(
+            stats['decode_before'] * 1000 / count, stats['decode_after'] * 1000 / count))
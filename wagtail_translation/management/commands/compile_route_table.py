@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wagtail_translation.route_table import compile_route_table, get_route_table_path
+
+
+class Command(BaseCommand):
+    help = 'Compiles localized route table file used for page lookups by worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', help='Route table file (defaults to WAGTAIL_TRANSLATION_ROUTE_TABLE).')
+
+    def handle(self, *args, **options):
+        path = options['path'] or get_route_table_path()
+        if not path:
+            raise CommandError('WAGTAIL_TRANSLATION_ROUTE_TABLE setting or --path must be set')
+        compile_route_table(path)
+        self.stdout.write('Route table written to {}'.format(path))
@@ -0,0 +1,31 @@
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.core.models import Page
+
+from wagtail_translation.indexes import (
+    UNIQUE_SLUG_INDEX_VENDORS, create_lang_indexes, create_unique_slug_indexes)
+from wagtail_translation.utils import optimistic_slugs_enabled
+
+
+class Command(BaseCommand):
+    help = ('Creates missing per-language Page indexes, '
+            'e.g. after languages were added to settings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unique-slugs', action='store_true',
+            help='Also create unique sibling slug indexes (always done when '
+                 'WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS is set).')
+
+    def handle(self, *args, **options):
+        unique_slugs = options['unique_slugs'] or optimistic_slugs_enabled()
+        if unique_slugs and connection.vendor not in UNIQUE_SLUG_INDEX_VENDORS:
+            raise CommandError('Unique slug indexes are not supported on {}'.format(connection.vendor))
+        with connection.schema_editor() as schema_editor:
+            created = create_lang_indexes(schema_editor, Page)
+            if unique_slugs:
+                created += create_unique_slug_indexes(schema_editor, Page)
+        for name in created:
+            self.stdout.write('Created index {}'.format(name))
+        if not created:
+            self.stdout.write('All indexes already exist')
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wagtail_translation.sync import apply_diff, diff_trees, get_tree_state, write_diff
+
+
+class Command(BaseCommand):
+    help = ('Computes a diff of translated fields, created and deleted pages and tree positions '
+            'between page trees of two databases (--source and --target), or applies such a diff (--apply) '
+            'to the default database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Database alias to read the up to date tree from.')
+        parser.add_argument('--target', help='Database alias of the tree to be updated.')
+        parser.add_argument('--output', help='Diff file to write (stdout by default).')
+        parser.add_argument('--apply', metavar='DIFF_FILE', help='Diff file to apply.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500, help='Records applied in a single transaction.')
+
+    def handle(self, *args, **options):
+        if options['apply']:
+            with open(options['apply']) as f:
+                try:
+                    counts = apply_diff(f, batch_size=options['batch_size'])
+                except ValueError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(
+                'Updated: {update}, created: {create}, moved: {move}, deleted: {delete}'.format(**counts))
+            return
+
+        if not options['source'] or not options['target']:
+            raise CommandError('--source and --target or --apply must be given')
+
+        source = get_tree_state(using=options['source'])
+        target = get_tree_state(using=options['target'])
+        records = diff_trees(source, target, using=options['source'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                count = write_diff(records, f)
+            self.stdout.write('{} changes written to {}'.format(count, options['output']))
+        else:
+            count = write_diff(records, sys.stdout)
+            self.stderr.write('{} changes'.format(count))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from modeltranslation import settings as mt_settings
+
+from wagtail_translation.machine_translation import fill_empty_translations
+
+
+class Command(BaseCommand):
+    help = 'Fills empty translation fields using machine translation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default=mt_settings.DEFAULT_LANGUAGE,
+            help='Language to translate from (defaults to modeltranslation default language).')
+        parser.add_argument(
+            '--target', action='append', dest='targets',
+            help='Language to translate to. Can be used multiple times (defaults to all other languages).')
+        parser.add_argument(
+            '--field', action='append', dest='fields',
+            help='Translated field name to fill. Can be used multiple times (defaults to all text fields).')
+        parser.add_argument(
+            '--backend',
+            help='Dotted path to translation backend class (defaults to WAGTAIL_TRANSLATION_MT_BACKEND).')
+        parser.add_argument('--batch-size', type=int, default=50, help='Texts per backend request.')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent backend requests.')
+        parser.add_argument('--dry-run', action='store_true', help='Translate but don\'t save anything.')
+
+    def handle(self, *args, **options):
+        counts = fill_empty_translations(
+            source_lang=options['source'],
+            target_langs=options['targets'],
+            fields=options['fields'],
+            backend=options['backend'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        for lang_code, count in sorted(counts.items()):
+            self.stdout.write('{}: {} fields filled'.format(lang_code, count))
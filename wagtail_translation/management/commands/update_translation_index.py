@@ -0,0 +1,224 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
+from wagtail.core.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+
+from wagtail_translation.search import get_indexed_fields
+
+ROOT_PARTITION = '<root>'
+
+
+def _init_worker():
+    # needed when worker processes are spawned instead of forked
+    django.setup()
+
+
+def _filter_partition(qs, partition, subtree_paths):
+    """
+    Subtree partitions are named by their root path, root partition holds
+    all pages outside of them (the tree above split points).
+    """
+    if partition != ROOT_PARTITION:
+        return qs.filter(path__startswith=partition)
+    for path in subtree_paths:
+        qs = qs.exclude(path__startswith=path)
+    return qs
+
+
+def _count_subtrees(parent_paths, depth):
+    """
+    Returns a dict mapping paths of pages at `depth` below `parent_paths`
+    to page counts of their subtrees, with a single query.
+    """
+    if not parent_paths:
+        return {}
+    condition = Q()
+    for path in parent_paths:
+        condition |= Q(path__startswith=path)
+    rows = (
+        Page._base_manager.filter(condition, depth__gte=depth)
+        .annotate(subtree_path=Substr('path', 1, depth * Page.steplen))
+        .order_by().values('subtree_path').annotate(count=Count('id'))
+        .values_list('subtree_path', 'count')
+    )
+    return dict(rows)
+
+
+def get_partitions(workers, split_depth=None):
+    """
+    Returns a list of (partition, page count) tuples, largest first.
+
+    Pages are split into subtrees below each Site root page (or below
+    every page at `split_depth` - 1). Subtrees having more than their share of pages
+    (all pages divided by `workers`) are split into child subtrees, so that workers
+    get similar amounts of work. Pages above split points form the root partition.
+    """
+    if split_depth is None:
+        site_root_paths = list(Page._base_manager.filter(
+            sites_rooted_here__isnull=False).order_by().values_list('path', 'depth').distinct())
+        # top level pages not containing sites are partitions too
+        subtrees = {
+            path: count for path, count in _count_subtrees([''], 2).items()
+            if not any(site_root_path.startswith(path) for site_root_path, depth in site_root_paths)
+        }
+        for depth in set(depth for path, depth in site_root_paths):
+            subtrees.update(_count_subtrees(
+                [path for path, path_depth in site_root_paths if path_depth == depth], depth + 1))
+    else:
+        subtrees = _count_subtrees([''], split_depth)
+
+    share = Page._base_manager.count() / max(workers, 1)
+    while subtrees:
+        path = max(subtrees, key=subtrees.get)
+        if subtrees[path] <= share or subtrees[path] == 1:
+            break
+        children = _count_subtrees([path], len(path) // Page.steplen + 1)
+        if not children:
+            break
+        del subtrees[path]
+        subtrees.update(children)
+
+    root_count = _filter_partition(Page._base_manager.all(), ROOT_PARTITION, subtrees).count()
+    partitions = sorted(subtrees.items(), key=lambda item: (-item[1], item[0]))
+    if root_count:
+        partitions.insert(0, (ROOT_PARTITION, root_count))
+    return partitions
+
+
+def index_partition(partition, backend_name, batch_size, subtree_paths=()):
+    """
+    Adds all pages of a subtree partition (or of the root partition, which is
+    everything outside `subtree_paths`) to the search index.
+    Runs in a worker process.
+    """
+    backend = get_search_backend(backend_name)
+    content_types = (
+        _filter_partition(Page._base_manager.all(), partition, subtree_paths)
+        .order_by().values_list('content_type', flat=True).distinct()
+    )
+
+    count = 0
+    for content_type in list(content_types):
+        model = ContentType.objects.get_for_id(content_type).model_class()
+        qs = _filter_partition(model.get_indexed_objects(), partition, subtree_paths).order_by('path')
+        # only load columns used by search fields
+        fields = get_indexed_fields(model)
+        if fields is not None:
+            qs = qs.only(*fields)
+
+        batch = []
+        for obj in qs.iterator():
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                backend.add_bulk(model, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            backend.add_bulk(model, batch)
+            count += len(batch)
+
+    return count
+
+
+class Command(BaseCommand):
+    help = ('Adds all pages to the search index using multiple processes, one subtree '
+            'at a time. Pages are split below each site root page (or at --split-depth) '
+            'and large subtrees are split further. Can resume after a failure.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', default='default', help='Search backend to update.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes, 1 indexes in this process.')
+        parser.add_argument(
+            '--split-depth', type=int,
+            help='Depth of subtree roots to split pages at (children of site root pages by default).')
+        parser.add_argument(
+            '--batch-size', type=int, default=500, help='Pages sent to search backend at once.')
+        parser.add_argument(
+            '--state-file', default='.update_translation_index.json',
+            help='File to keep progress in, used by --resume.')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip subtrees which were indexed by the previous (failed) run.')
+
+    def _write_state(self, state_file, partitions, completed):
+        with open(state_file, 'w') as f:
+            json.dump({'partitions': partitions, 'completed': sorted(completed)}, f)
+
+    def _run(self, partitions, subtree_paths, options):
+        """
+        Yields (partition, page count or exception) as partitions get indexed.
+        """
+        args = (options['backend'], options['batch_size'], subtree_paths)
+        if options['workers'] == 1:
+            for partition in partitions:
+                try:
+                    yield partition, index_partition(partition, *args)
+                except Exception as e:
+                    yield partition, e
+            return
+
+        # connections must not be shared with worker processes
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(index_partition, partition, *args): partition
+                for partition in partitions
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+    def handle(self, *args, **options):
+        state_file = options['state_file']
+        if options['resume'] and os.path.exists(state_file):
+            # partitions of the previous run are kept, the tree may have changed since
+            with open(state_file) as f:
+                state = json.load(f)
+            partitions = state['partitions']
+            completed = set(state['completed'])
+        else:
+            partitions = [partition for partition, count in get_partitions(
+                options['workers'], options['split_depth'])]
+            completed = set()
+        subtree_paths = [partition for partition in partitions if partition != ROOT_PARTITION]
+
+        backend = get_search_backend(options['backend'])
+        for model in get_indexed_models():
+            if issubclass(model, Page):
+                backend.add_type(model)
+
+        pending = [partition for partition in partitions if partition not in completed]
+        self.stdout.write('{} subtrees to index, {} already done'.format(len(pending), len(completed)))
+        self._write_state(state_file, partitions, completed)
+
+        failed = False
+        total = 0
+        for partition, result in self._run(pending, subtree_paths, options):
+            if isinstance(result, Exception):
+                failed = True
+                self.stderr.write('Failed to index subtree {}: {}'.format(partition, result))
+                continue
+            total += result
+            completed.add(partition)
+            self._write_state(state_file, partitions, completed)
+            self.stdout.write('Subtree {}: {} pages indexed'.format(partition, result))
+
+        self.stdout.write('{} pages indexed'.format(total))
+        if failed:
+            self.stderr.write('Some subtrees failed, run again with --resume to retry them.')
+        else:
+            os.remove(state_file)
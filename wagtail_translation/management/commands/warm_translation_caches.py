@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils.translation import get_language_from_path
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site
+
+from wagtail_translation.menu import get_menu_tree
+from wagtail_translation.site_patch import get_lang_root_paths
+from wagtail_translation.switcher import get_lang_url_paths
+
+
+def _warm_pages(page_ids):
+    try:
+        for page in Page.objects.filter(id__in=page_ids):
+            get_lang_url_paths(page)
+    finally:
+        # every worker thread has its own connection
+        connection.close()
+    return len(page_ids)
+
+
+class Command(BaseCommand):
+    help = ('Populates site root path, menu and language switcher caches for every site and language. '
+            'Pages listed in --pages-file are warmed first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages-file',
+            help='File with most requested pages first, one page id or URL path (e.g. /en/about/) per line.')
+        parser.add_argument(
+            '--concurrency', type=int, default=4, help='Number of concurrent database workers.')
+        parser.add_argument(
+            '--batch-size', type=int, default=200, help='Pages loaded by a worker at once.')
+        parser.add_argument(
+            '--listed-only', action='store_true', help='Only warm pages listed in --pages-file.')
+
+    def _resolve(self, line, root_paths):
+        if line.isdigit():
+            return int(line)
+
+        lang_code = get_language_from_path(line) or mt_settings.DEFAULT_LANGUAGE
+        path = line
+        prefix = '/{}/'.format(lang_code)
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        path = path.strip('/')
+        path = path + '/' if path else ''
+
+        url_path_field = build_localized_fieldname('url_path', lang_code)
+        candidates = [root_path + path for site_id, root_path, root_url in root_paths[lang_code]]
+        return Page.objects.filter(**{url_path_field + '__in': candidates}).values_list('id', flat=True).first()
+
+    def handle(self, *args, **options):
+        root_paths = get_lang_root_paths()
+        self.stdout.write('Root paths warmed')
+
+        for site in Site.objects.select_related('root_page'):
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+                get_menu_tree(site, lang_code)
+        self.stdout.write('Menus warmed')
+
+        page_ids = []
+        listed = set()
+        if options['pages_file']:
+            with open(options['pages_file']) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    page_id = self._resolve(line, root_paths)
+                    if page_id is None:
+                        self.stderr.write('Page not found: {}'.format(line))
+                    elif page_id not in listed:
+                        listed.add(page_id)
+                        page_ids.append(page_id)
+
+        if not options['listed_only']:
+            page_ids.extend(
+                page_id for page_id in Page.objects.live().values_list('id', flat=True)
+                if page_id not in listed)
+
+        batch_size = options['batch_size']
+        batches = [page_ids[i:i + batch_size] for i in range(0, len(page_ids), batch_size)]
+        # batches are started in order, so listed pages are warmed first
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            count = sum(executor.map(_warm_pages, batches))
+        self.stdout.write('Language switcher warmed for {} pages'.format(count))
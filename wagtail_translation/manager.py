@@ -1,3 +1,4 @@
+from django.conf import settings
 from modeltranslation.manager import MultilingualManager
 from wagtail.core.models import PageManager
 
@@ -9,5 +10,14 @@ class MultilingualPageManager(MultilingualManager, PageManager):
 
     While Page.objects is patched automatically, any Page models with custom managers
     should use this or do the same manually.
+
+    When `defer_translations` is set (defaults to `WAGTAIL_TRANSLATION_DEFER_TRANSLATIONS` setting),
+    every translation field except current language and its fallback languages is deferred.
     """
-    pass
+    defer_translations = getattr(settings, 'WAGTAIL_TRANSLATION_DEFER_TRANSLATIONS', False)
+
+    def get_queryset(self):
+        qs = super(MultilingualPageManager, self).get_queryset()
+        if self.defer_translations:
+            qs = qs.defer_translations()
+        return qs
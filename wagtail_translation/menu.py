@@ -0,0 +1,108 @@
+from __future__ import absolute_import, unicode_literals
+
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import get_language, override
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site
+
+from .utils import get_serve_path
+
+__all__ = ['get_menu_tree', 'delete_menu_cache']
+
+
+MENU_CACHE_KEY_FMT = 'wagtail_translation_menu_{}_{}_{}'
+MENU_CACHE_GENERATION_KEY = 'wagtail_translation_menu_generation'
+
+
+def _get_generation():
+    generation = cache.get(MENU_CACHE_GENERATION_KEY)
+    if generation is None:
+        cache.add(MENU_CACHE_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(MENU_CACHE_GENERATION_KEY)
+    return generation
+
+
+def get_menu_tree(site, lang_code=None):
+    """
+    Returns a tree of live pages shown in menus under `site` root page
+    for the given (or currently active) language.
+
+    Every node is a dict with `id`, `title`, `url`, `depth` (relative to
+    site root page) and `children` keys. Pages not translated in the language
+    are left out together with their descendants.
+    Result is cached per site and language.
+    """
+    if lang_code is None:
+        lang_code = get_language()
+    # fallback to default language if current language not in translated ones
+    if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+
+    cache_key = MENU_CACHE_KEY_FMT.format(_get_generation(), site.id, lang_code)
+    result = cache.get(cache_key)
+
+    if result is None:
+        result = _build_menu_tree(site, lang_code)
+        cache.set(cache_key, result, 3600)
+
+    return result
+
+
+def _build_menu_tree(site, lang_code):
+    root_page = site.root_page
+    title_field = build_localized_fieldname('title', lang_code)
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+    root_path = getattr(root_page, url_path_field) or ''
+
+    # load the whole menu-visible part of the tree at once,
+    # only using current language columns
+    rows = (
+        Page.objects.descendant_of(root_page).live().in_menu()
+        .order_by('path')
+        .values_list('id', 'path', 'depth', title_field, url_path_field)
+    )
+
+    root = {'children': []}
+    nodes = {root_page.path: root}
+    with override(lang_code):
+        for page_id, path, depth, title, url_path in rows:
+            parent = nodes.get(path[:-Page.steplen])
+            if parent is None:
+                # some ancestor is either not in menus or not translated
+                continue
+            # '//' in url_path means that this page (or its ancestor)
+            # is not routable in this language
+            if not title or not url_path or '//' in url_path:
+                continue
+            node = {
+                'id': page_id,
+                'title': title,
+                'url': get_serve_path(url_path, root_path),
+                'depth': depth - root_page.depth,
+                'children': [],
+            }
+            nodes[path] = node
+            parent['children'].append(node)
+
+    return root['children']
+
+
+def delete_menu_cache():
+    """
+    Drops menu trees of all sites and languages by changing cache key generation,
+    so that invalidation doesn't need to look up sites.
+    """
+    cache.set(MENU_CACHE_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _delete_menu_cache_receiver(sender, instance, **kwargs):
+    delete_menu_cache()
+
+
+post_save.connect(_delete_menu_cache_receiver, sender=Site)
+post_delete.connect(_delete_menu_cache_receiver, sender=Site)
+post_delete.connect(_delete_menu_cache_receiver, sender=Page)
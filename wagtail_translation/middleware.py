@@ -0,0 +1,138 @@
+from __future__ import absolute_import, unicode_literals
+
+from urllib.parse import urlparse
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import NoReverseMatch, reverse
+from django.utils import translation
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, get_page_models
+
+from .render_cache import get_cached_response, is_cacheable_request, render_cache_enabled
+from .route_table import lookup_route
+from .site_patch import get_lang_root_paths
+
+__all__ = ['TranslatedPageMiddleware']
+
+
+def _find_site_root_path(request, root_paths):
+    if len(root_paths) == 1:
+        return root_paths[0]
+
+    hostname = request.get_host().rsplit(':', 1)[0].lower()
+    port = int(request.get_port())
+    for site_id, root_path, root_url in root_paths:
+        parsed = urlparse(root_url)
+        site_port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        if parsed.hostname == hostname and site_port == port:
+            return site_id, root_path, root_url
+    # leave default site fallback to Site.find_for_request
+    return None
+
+
+_custom_route_models = None
+
+
+def _get_custom_route_models():
+    global _custom_route_models
+    if _custom_route_models is None:
+        # e.g. RoutablePageMixin
+        _custom_route_models = [model for model in get_page_models() if model.route is not Page.route]
+    return _custom_route_models
+
+
+def _is_routed_by_ancestors(page):
+    """
+    Returns whether `page` or any of its ancestors has its own `route()`,
+    which may serve the page's url differently.
+    """
+    models = _get_custom_route_models()
+    if not models:
+        return False
+    if type(page) in models:
+        return True
+    paths = [page.path[:end] for end in range(page.steplen, len(page.path), page.steplen)]
+    content_types = ContentType.objects.get_for_models(*models).values()
+    return Page._base_manager.filter(path__in=paths, content_type__in=content_types).exists()
+
+
+def _get_live_page(site_id, lang_code, url_path):
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+    route = lookup_route(site_id, lang_code, url_path)
+    if route is None:
+        route = Page.objects.live().filter(**{url_path_field: url_path}).values_list(
+            'id', 'content_type_id').first()
+        if route is None:
+            return None
+
+    page_id, content_type_id = route
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    # route table may be older than the page tree, stale entries are left to routing
+    return model.objects.live().filter(id=page_id, **{url_path_field: url_path}).first()
+
+
+class TranslatedPageMiddleware(object):
+    """
+    Resolves language and page of requests to language prefixed page urls in one step:
+    language is taken from the prefix, site and root path from cached site root paths
+    and the page is looked up by `url_path_<lang>` (in route table, if compiled).
+    Pages under a page with its own `route()` (e.g. `RoutablePageMixin`) are routed as usual.
+
+    Sets `request.LANGUAGE_CODE` and `request.translated_page`, which is used by
+    `wagtail_translation.views.serve` instead of routing. Responses from the render
+    cache are returned right away. Other requests are left untouched, so it can be used
+    in place of, or after `LocaleMiddleware` (and after `AuthenticationMiddleware`).
+    """
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request):
+        request.translated_page = None
+
+        lang_code = translation.get_language_from_path(request.path_info)
+        if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+            return None
+
+        translation.activate(lang_code)
+        request.LANGUAGE_CODE = lang_code
+
+        try:
+            serve_root = reverse('wagtail_serve', args=('',))
+        except NoReverseMatch:
+            return None
+        if not request.path_info.startswith(serve_root) or not request.path_info.endswith('/'):
+            # slash appending is left to wagtail
+            return None
+
+        root_paths = get_lang_root_paths([lang_code])[lang_code]
+        site_root_path = _find_site_root_path(request, root_paths)
+        if site_root_path is None or not site_root_path[1] or '//' in site_root_path[1]:
+            return None
+        site_id, root_path, root_url = site_root_path
+        url_path = root_path + request.path_info[len(serve_root):]
+
+        if render_cache_enabled() and is_cacheable_request(request):
+            response = get_cached_response(site_id, lang_code, url_path)
+            if response is not None:
+                return response
+
+        page = _get_live_page(site_id, lang_code, url_path)
+        if page is not None and _is_routed_by_ancestors(page):
+            # left to routing
+            page = None
+        request.translated_page = page
+        request.translated_site_id = site_id
+        request.translated_url_path = url_path
+        return None
+
+    def process_response(self, request, response):
+        if getattr(request, 'LANGUAGE_CODE', None):
+            response.setdefault('Content-Language', request.LANGUAGE_CODE)
+        return response
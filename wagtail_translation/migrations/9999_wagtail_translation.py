@@ -12,6 +12,8 @@ from django.db.migrations.loader import MigrationLoader
 from modeltranslation import settings as mt_settings
 from modeltranslation.utils import build_localized_fieldname
 
+from wagtail_translation.indexes import create_lang_indexes, drop_lang_indexes
+
 
 def get_add_field_for_langs(name, **kwargs):
     ret = []
@@ -23,6 +25,14 @@ def get_add_field_for_langs(name, **kwargs):
     return ret
 
 
+def add_lang_indexes(apps, schema_editor):
+    create_lang_indexes(schema_editor, apps.get_model('wagtailcore', 'Page'))
+
+
+def remove_lang_indexes(apps, schema_editor):
+    drop_lang_indexes(schema_editor, apps.get_model('wagtailcore', 'Page'))
+
+
 class Migration(migrations.Migration):
     def __init__(self, name, app_label):
         # by changing app_label here to 'wagtailcore' we trick Django migrations system
@@ -90,4 +100,9 @@ class Migration(migrations.Migration):
         model_name='page',
         field=models.TextField(blank=True, editable=False, null=True, verbose_name='URL path'))
 
-    operations = _search_description + _seo_title + _slug + _title + _url_path
+    # Indexes are created without changing migration state (Page model itself has no such indexes),
+    # otherwise `makemigrations` would try to remove them.
+    # Use `create_translation_indexes` command when languages are added later.
+    _indexes = [migrations.RunPython(add_lang_indexes, remove_lang_indexes)]
+
+    operations = _search_description + _seo_title + _slug + _title + _url_path + _indexes
@@ -3,23 +3,38 @@ from __future__ import absolute_import, unicode_literals
 import logging
 import re
 import uuid
+from functools import partial
 
 from django import VERSION as DJANGO_VERSION
 from django.core.exceptions import ValidationError
-from django.db import connection, transaction
-from django.urls import reverse
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
 from django.utils.text import slugify
 from django.utils.translation import get_language
 from django.utils.translation import ugettext_lazy as _
 from modeltranslation import settings as mt_settings
 from modeltranslation.utils import build_localized_fieldname, get_translation_fields
 from wagtail.core.models import Page, Site
-from wagtail.core.utils import WAGTAIL_APPEND_SLASH
 
 from . import edit_handlers
+from .locking import lock_subtrees, subtree_locks
+from .menu import delete_menu_cache
+from .query_patch import get_deferrable_translation_fields
+from .redirects import create_url_path_redirects, redirects_enabled
+from .render_cache import delete_render_cache, render_cache_enabled
+from .route_table import schedule_route_table_compile
+from .search import has_indexed_field_changes
 from .search import search_fields as _search_fields
 from .site_patch import delete_root_path_cache
-from .utils import page_slug_is_available
+from .switcher import delete_lang_urls_cache
+from .tree_cache import clear as clear_tree_cache
+from .tree_cache import forget_children, forget_parent, get_children_slugs, get_parent, tree_cache
+from .utils import (
+    get_url_parts_for_url_path,
+    has_route_changes,
+    optimistic_slugs_enabled,
+    page_slug_is_available,
+)
 
 logger = logging.getLogger("wagtail.core")
 
@@ -30,8 +45,10 @@ __all__ = [
     "clean",
     "save",
     "_update_descendant_lang_url_paths",
+    "_resolve_slug_conflicts",
     "get_url_parts",
     "move",
+    "from_db",
     "search_fields",
     "content_panels",
     "promote_panels",
@@ -62,9 +79,14 @@ def set_url_path(self, parent):
 
 
 def _get_autogenerated_lang_slug(self, base_slug, lang_code):
+    if optimistic_slugs_enabled():
+        # conflicts are resolved when saving, see _save_optimistic
+        self.__dict__.setdefault("_autogenerated_slugs", {})[lang_code] = base_slug
+        return base_slug
+
     candidate_slug = base_slug
     suffix = 1
-    parent_page = self.get_parent()
+    parent_page = get_parent(self)
 
     while not page_slug_is_available(candidate_slug, lang_code, parent_page, self):
         suffix += 1
@@ -73,64 +95,163 @@ def _get_autogenerated_lang_slug(self, base_slug, lang_code):
     return candidate_slug
 
 
+def _load_deferred_translation_fields(self):
+    """
+    Loads translation fields deferred by `defer_translations` with a single query,
+    as cleaning and saving reads all of them (one query per field otherwise).
+    """
+    if self.pk is None:
+        return
+    deferred_fields = self.get_deferred_fields().intersection(
+        get_deferrable_translation_fields(type(self), [])
+    )
+    if deferred_fields:
+        self.refresh_from_db(fields=deferred_fields)
+
+
 def full_clean(self, *args, **kwargs):
-    # autogenerate slugs for non-empty title translation
+    _load_deferred_translation_fields(self)
+    # slug availability of all languages is checked against a single query of siblings
+    with tree_cache():
+        # autogenerate slugs for non-empty title translation
 
-    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            title_field = build_localized_fieldname("title", lang_code)
+            slug_field = build_localized_fieldname("slug", lang_code)
+
+            title = getattr(self, title_field)
+            slug = getattr(self, slug_field)
+            if title and not slug:
+                if DJANGO_VERSION >= (1, 9):
+                    base_slug = slugify(title, allow_unicode=True)
+                else:
+                    base_slug = slugify(title)
+
+                if base_slug:
+                    setattr(
+                        self,
+                        slug_field,
+                        self._get_autogenerated_lang_slug(base_slug, lang_code),
+                    )
+
+        # force setting fallback fields to uuid if current language is not set
+        # these will not be saved, but will allow us to save the form
+        lang_code = get_language() or mt_settings.DEFAULT_LANGUAGE
         title_field = build_localized_fieldname("title", lang_code)
         slug_field = build_localized_fieldname("slug", lang_code)
+        if not getattr(self, title_field) or not getattr(self, slug_field):
+            dummy_val = "{}{}".format(PREFIX, uuid.uuid4().hex)
+            setattr(self, "title", dummy_val)
+            setattr(self, "slug", dummy_val)
 
-        title = getattr(self, title_field)
-        slug = getattr(self, slug_field)
-        if title and not slug:
-            if DJANGO_VERSION >= (1, 9):
-                base_slug = slugify(title, allow_unicode=True)
-            else:
-                base_slug = slugify(title)
-
-            if base_slug:
-                setattr(
-                    self,
-                    slug_field,
-                    self._get_autogenerated_lang_slug(base_slug, lang_code),
-                )
-
-    # force setting fallback fields to uuid if current language is not set
-    # these will not be saved, but will allow us to save the form
-    lang_code = get_language() or mt_settings.DEFAULT_LANGUAGE
-    title_field = build_localized_fieldname("title", lang_code)
-    slug_field = build_localized_fieldname("slug", lang_code)
-    if not getattr(self, title_field) or not getattr(self, slug_field):
-        dummy_val = "{}{}".format(PREFIX, uuid.uuid4().hex)
-        setattr(self, "title", dummy_val)
-        setattr(self, "slug", dummy_val)
-
-    kwargs.pop("clean", "")
-    super(Page, self).full_clean(*args, **kwargs)
+        kwargs.pop("clean", "")
+        super(Page, self).full_clean(*args, **kwargs)
 
 
 def clean(self):
+    if optimistic_slugs_enabled():
+        # unique indexes take care of sibling slugs
+        return
+
+    _load_deferred_translation_fields(self)
+    with tree_cache():
+        errors = {}
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            slug_field = build_localized_fieldname("slug", lang_code)
+            slug = getattr(self, slug_field)
+            if slug and not page_slug_is_available(
+                slug, lang_code, get_parent(self), self
+            ):
+                errors[slug_field] = _("This slug is already in use")
+        if errors:
+            raise ValidationError(errors)
+
+
+@transaction.atomic
+def save(self, *args, **kwargs):
+    _load_deferred_translation_fields(self)
+    # parent and sibling lookups are shared by full_clean, clean and save
+    with tree_cache():
+        if optimistic_slugs_enabled():
+            result = _save_optimistic(self, *args, **kwargs)
+        else:
+            result = _save(self, *args, **kwargs)
+    # page slugs may have changed
+    forget_children(self.path[: -self.steplen])
+    return result
+
+
+def _resolve_slug_conflicts(self):
+    """
+    Replaces autogenerated slugs already used by siblings with the next free ones.
+    Returns whether any slug was changed, raises ValidationError
+    when slugs set explicitly are in use.
+    """
+    parent = get_parent(self)
+    if parent is None:
+        return False
+    forget_children(parent.path)
+    children_slugs = get_children_slugs(parent)
+
+    autogenerated_slugs = self.__dict__.get("_autogenerated_slugs", {})
+    changed = False
     errors = {}
     for lang_code in mt_settings.AVAILABLE_LANGUAGES:
         slug_field = build_localized_fieldname("slug", lang_code)
         slug = getattr(self, slug_field)
-        if slug and not page_slug_is_available(
-            slug, lang_code, self.get_parent(), self
-        ):
+        taken_slugs = {
+            child_slug
+            for child_slug, child_ids in children_slugs[lang_code].items()
+            if child_ids - {self.pk}
+        }
+        if slug not in taken_slugs:
+            continue
+
+        if lang_code in autogenerated_slugs:
+            base_slug = autogenerated_slugs[lang_code]
+            suffix = 1
+            candidate_slug = base_slug
+            while candidate_slug in taken_slugs:
+                suffix += 1
+                candidate_slug = "%s-%d" % (base_slug, suffix)
+            setattr(self, slug_field, candidate_slug)
+            changed = True
+        else:
             errors[slug_field] = _("This slug is already in use")
+
     if errors:
         raise ValidationError(errors)
-
-
-@transaction.atomic
-def save(self, *args, **kwargs):
+    return changed
+
+
+def _save_optimistic(self, *args, **kwargs):
+    # slugs are written without checking siblings first,
+    # unique indexes reject duplicates and the save is retried with free slugs.
+    # Free slugs are only taken again by writers committing in the meantime,
+    # so retries are not limited while conflicts resolve to other slugs.
+    try:
+        while True:
+            try:
+                with transaction.atomic():
+                    return _save(self, *args, **kwargs)
+            except IntegrityError:
+                if not self._resolve_slug_conflicts():
+                    raise
+    finally:
+        self.__dict__.pop("_autogenerated_slugs", None)
+
+
+def _save(self, *args, **kwargs):
     self.full_clean()
 
     update_descendant_url_paths = False
     is_new = self.id is None
 
     if is_new:
-        self.set_url_path(self.get_parent())
+        # parent url paths must not change until this page is saved
+        if lock_subtrees(self.path):
+            forget_parent(self)
+        self.set_url_path(get_parent(self))
     else:
         # update url paths if:
         # a) update_fields is specified and it includes any slug field
@@ -140,11 +261,22 @@ def save(self, *args, **kwargs):
         update_fields = kwargs.get("update_fields", slug_fields)
         updated_slug_fields = [f for f in slug_fields if f in update_fields]
         if updated_slug_fields:
-            old_record = Page.objects.get(id=self.id)
+            # url paths of the whole subtree may change
+            if lock_subtrees(self.path):
+                # parent may have been read (by full_clean) before it was locked
+                forget_parent(self)
+            # base manager makes sure no translation fields are deferred
+            old_record = Page._base_manager.get(id=self.id)
+            # tree fields are only changed by treebeard, keep the ones read after locking;
+            # treebeard deletes save parents with decremented numchild, that change is kept
+            numchild_change = self.numchild - self.__dict__.get("_loaded_numchild", self.numchild)
+            for f in ("path", "depth", "numchild"):
+                setattr(self, f, getattr(old_record, f))
+            self.numchild += numchild_change
             if any(
                 getattr(old_record, f) != getattr(self, f) for f in updated_slug_fields
             ):
-                self.set_url_path(self.get_parent())
+                self.set_url_path(get_parent(self))
                 update_descendant_url_paths = True
 
     # current language fields may have been set to our uuid,
@@ -172,14 +304,29 @@ def save(self, *args, **kwargs):
                 self.draft_title = getattr(self, title_field)
                 break
 
+    # search index is updated only if indexed values change
+    self._indexed_fields_changed = is_new or has_indexed_field_changes(
+        self, kwargs.get("update_fields")
+    )
+    # route table and language switcher entries change only with live url paths (not for drafts)
+    routes_changed = update_descendant_url_paths or has_route_changes(
+        self, kwargs.get("update_fields")
+    )
+
     kwargs.pop("clean", "")
     result = super(Page, self).save(*args, **kwargs)
+    self._loaded_numchild = self.numchild
 
     if update_descendant_url_paths:
         self._update_descendant_lang_url_paths(old_record)
 
     if Site.objects.filter(root_page=self).exists():
         delete_root_path_cache()
+    transaction.on_commit(delete_menu_cache)
+    delete_render_cache([self.pk])
+    if routes_changed:
+        transaction.on_commit(partial(delete_lang_urls_cache, self.path))
+        schedule_route_table_compile()
 
     if is_new:
         cls = type(self)
@@ -208,6 +355,7 @@ def _update_descendant_lang_url_paths(self, old_page):
 
     exec_args = []
     update_fields_sql = []
+    changed_langs = []
     for lang_code in mt_settings.AVAILABLE_LANGUAGES:
         url_path_attr = build_localized_fieldname("url_path", lang_code)
         new_url_path = getattr(self, url_path_attr)
@@ -216,12 +364,25 @@ def _update_descendant_lang_url_paths(self, old_page):
             update_fields_sql.append(field_update_fmt.format(url_path_attr))
             exec_args.append(new_url_path)
             exec_args.append(len(old_url_path) + 1)
+            changed_langs.append(lang_code)
 
     if not update_fields_sql:
         # in case page was moved but parent did not change
         # nothing has to be updated
         return
 
+    create_redirects = redirects_enabled()
+    if create_redirects:
+        # old url paths of live descendants are needed for redirects
+        old_descendant_url_paths = list(
+            Page._base_manager.filter(path__startswith=self.path, live=True)
+            .exclude(id=self.id)
+            .values_list(
+                "id",
+                *[build_localized_fieldname("url_path", l) for l in changed_langs]
+            )
+        )
+
     update_sql = """
     UPDATE wagtailcore_page
     SET {} WHERE path LIKE %s AND id <> %s
@@ -232,62 +393,120 @@ def _update_descendant_lang_url_paths(self, old_page):
     exec_args.append(self.id)
     cursor.execute(update_sql, exec_args)
 
+    if create_redirects:
+        create_url_path_redirects(
+            self, old_page, changed_langs, old_descendant_url_paths
+        )
 
-def get_url_parts(self, request=None):
-    # if '//' exists in url_path, it means that some
-    # page in the path is not translated, therefore
-    # this page is not routable in current language
-    if "//" in self.url_path:
-        return
-
-    # copy of original implementation:
-    possible_sites = [
-        (pk, path, url)
-        for pk, path, url in self._get_site_root_paths(request)
-        if self.url_path.startswith(path)
-    ]
-
-    if not possible_sites:
-        return None
-
-    site_id, root_path, root_url = possible_sites[0]
+    if render_cache_enabled():
+        delete_render_cache(
+            Page._base_manager.filter(path__startswith=self.path, live=True)
+            .values_list("id", flat=True),
+            changed_langs,
+        )
 
-    if hasattr(request, "site"):
-        for site_id, root_path, root_url in possible_sites:
-            if site_id == request.site.pk:
-                break
-        else:
-            site_id, root_path, root_url = possible_sites[0]
 
-    page_path = reverse("wagtail_serve", args=(self.url_path[len(root_path) :],))
+def get_url_parts(self, request=None):
+    site = getattr(request, "site", None)
+    return get_url_parts_for_url_path(
+        self.url_path,
+        self._get_site_root_paths(request),
+        current_site_id=site.pk if site is not None else None,
+    )
 
-    # Remove the trailing slash from the URL reverse generates if
-    # WAGTAIL_APPEND_SLASH is False and we're not trying to serve
-    # the root path
-    if not WAGTAIL_APPEND_SLASH and page_path != "/":
-        page_path = page_path.rstrip("/")
 
-    return (site_id, root_url, page_path)
+def _refresh_tree_fields(*pages):
+    rows = Page._base_manager.filter(id__in=[page.id for page in pages]).values(
+        "id", "path", "depth", "numchild"
+    )
+    values = {row.pop("id"): row for row in rows}
+    for page in pages:
+        page.__dict__.update(values[page.id], _loaded_numchild=values[page.id]["numchild"])
+
+
+@classmethod
+def from_db(cls, db, field_names, values):
+    instance = super(Page, cls).from_db(db, field_names, values)
+    # save() applies numchild changes made since loading to the current numchild
+    if "numchild" in instance.__dict__:
+        instance._loaded_numchild = instance.numchild
+    return instance
+
+
+def _clear_taken_slugs(page, parent_path):
+    """
+    Empties slugs of `page` used by children of `parent_path`, as unique slug indexes
+    would reject treebeard moving the page there. Saving the moved page sets free ones.
+    Returns whether any slug was emptied.
+    """
+    slug_fields = [f for f in get_translation_fields("slug") if getattr(page, f)]
+    if not slug_fields:
+        return False
+    conditions = Q()
+    for f in slug_fields:
+        conditions |= Q(**{f: getattr(page, f)})
+    siblings = Page._base_manager.filter(
+        path__startswith=parent_path, depth=len(parent_path) // page.steplen + 1
+    ).exclude(id=page.id)
+    taken_fields = {
+        f
+        for row in siblings.filter(conditions).values_list(*slug_fields)
+        for f, slug in zip(slug_fields, row)
+        if slug == getattr(page, f)
+    }
+    if taken_fields:
+        Page._base_manager.filter(id=page.id).update(**{f: "" for f in taken_fields})
+    return bool(taken_fields)
 
 
 @transaction.atomic
 def move(self, target, pos=None):
-    old_self = Page.objects.get(id=self.id)
-    kwargs.pop("clean", "")
-    super(Page, self).move(target, pos=pos)
-
-    new_self = Page.objects.get(id=self.id)
-    # go through slugs to make sure they're available in new parent
-    # and auto-update if necessary
-    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
-        slug_attr = build_localized_fieldname("slug", lang_code)
-        slug = getattr(new_self, slug_attr)
-        if slug:
-            slug = new_self._get_autogenerated_lang_slug(slug, lang_code)
-            setattr(new_self, slug_attr, slug)
-    new_self.set_url_path(new_self.get_parent())
-    new_self.save()
-    new_self._update_descendant_lang_url_paths(old_self)
+    if pos and pos.endswith("child"):
+        new_parent_path = target.path
+    else:
+        new_parent_path = target.path[: -self.steplen]
+    # save() of the moved page is covered by these locks
+    with subtree_locks(self.path, new_parent_path) as locked:
+        if locked:
+            # treebeard computes new paths from these, other moves may have changed them
+            _refresh_tree_fields(self, target)
+        old_self = Page._base_manager.get(id=self.id)
+        slugs_cleared = optimistic_slugs_enabled() and _clear_taken_slugs(
+            old_self, new_parent_path
+        )
+        super(Page, self).move(target, pos=pos)
+
+        new_self = Page._base_manager.get(id=self.id)
+        with tree_cache():
+            # parents and siblings have changed
+            clear_tree_cache()
+            # go through slugs to make sure they're available in new parent
+            # and auto-update if necessary
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+                slug_attr = build_localized_fieldname("slug", lang_code)
+                slug = getattr(old_self, slug_attr)
+                if slug:
+                    slug = new_self._get_autogenerated_lang_slug(slug, lang_code)
+                    setattr(new_self, slug_attr, slug)
+            if slugs_cleared:
+                new_self._resolve_slug_conflicts()
+            new_self.set_url_path(get_parent(new_self))
+            new_self.save()
+            # when slugs are changed (also by save), save takes care of descendant url paths
+            slugs_changed = any(
+                getattr(new_self, f) != getattr(old_self, f)
+                for f in get_translation_fields("slug")
+            )
+    if not slugs_changed:
+        new_self._update_descendant_lang_url_paths(old_self)
+    transaction.on_commit(delete_menu_cache)
+    if any(
+        getattr(new_self, f) != getattr(old_self, f)
+        for f in get_translation_fields("url_path")
+    ):
+        # live descendants may have moved even when this page is not live
+        transaction.on_commit(partial(delete_lang_urls_cache, new_self.path))
+        schedule_route_table_compile()
 
     logger.info('Page moved: "%s" id=%d path=%s', self.title, self.id, self.url_path)
 
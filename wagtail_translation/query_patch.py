@@ -1,11 +1,23 @@
 from __future__ import absolute_import, unicode_literals
 
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import BooleanField, F, Func
+from django.db.models.query import BaseIterable
 from django.utils.translation import get_language
 from modeltranslation import settings as mt_settings
-from modeltranslation.utils import build_localized_fieldname
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname, resolution_order
+from wagtail.core.query import PageQuerySet
 from wagtail.search.queryset import SearchableQuerySetMixin
 
-__all__ = ['search']
+from .indexes import get_routable_sql
+
+__all__ = ['search', 'translated', 'untranslated', 'defer_translations', 'specific']
+
+# keep reference to original implementation before it gets patched
+_specific = PageQuerySet.specific
 
 
 def search(self, *args, **kwargs):
@@ -21,3 +33,147 @@ def search(self, *args, **kwargs):
         kwargs['fields'] = fields
     return SearchableQuerySetMixin.search(self, *args, **kwargs)
 
+
+def _get_url_path_field(lang_code=None):
+    if lang_code is None:
+        lang_code = get_language()  # default to current language
+    # fallback to default language if current language not in translated ones
+    if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+    return build_localized_fieldname('url_path', lang_code)
+
+
+class Routable(Func):
+    """
+    Condition on url_path field being routable (or not), see `indexes.get_routable_sql`.
+    """
+    output_field = BooleanField()
+
+    def __init__(self, url_path_field, routable=True):
+        super(Routable, self).__init__(F(url_path_field))
+        self.routable = routable
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column_sql, params = compiler.compile(self.source_expressions[0])
+        return get_routable_sql(connection.vendor, column_sql, self.routable), params
+
+
+def translated(self, lang_code=None):
+    """
+    Filters pages which are routable in given (or current) language.
+    Page is not routable when it or any of its ancestors has no slug
+    in that language, which makes '//' appear in it's url_path.
+    """
+    return self.filter(Routable(_get_url_path_field(lang_code)))
+
+
+def untranslated(self, lang_code=None):
+    """
+    Filters pages which are not routable in given (or current) language.
+    """
+    return self.filter(Routable(_get_url_path_field(lang_code), routable=False))
+
+
+def get_deferrable_translation_fields(model, languages):
+    """
+    Returns names of all translation fields registered for `model`
+    except the ones in `languages`.
+    """
+    try:
+        opts = translator.get_options_for_model(model)
+    except NotRegistered:
+        return []
+
+    return [
+        build_localized_fieldname(field_name, lang_code)
+        for field_name in opts.fields
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES
+        if lang_code not in languages
+    ]
+
+
+def _get_loaded_languages(qs):
+    """
+    Returns languages which translation fields are loaded by `qs`
+    or None if translation fields are not deferred.
+    """
+    deferred_fields, defer = qs.query.deferred_loading
+    if not defer or not deferred_fields:
+        return None
+    languages = [
+        lang_code for lang_code in mt_settings.AVAILABLE_LANGUAGES
+        if build_localized_fieldname('url_path', lang_code) not in deferred_fields
+    ]
+    if len(languages) == len(mt_settings.AVAILABLE_LANGUAGES):
+        return None
+    return languages
+
+
+def defer_translations(self, languages=None):
+    """
+    Defers loading of every translation field except the ones in `languages`,
+    which default to the current language and its fallback languages.
+    Deferring is carried over to `specific()` querysets.
+    """
+    if languages is None:
+        lang_code = get_language()
+        if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+            lang_code = mt_settings.DEFAULT_LANGUAGE
+        languages = resolution_order(lang_code)
+
+    fields = get_deferrable_translation_fields(self.model, languages)
+    if not fields:
+        return self
+    return self.defer(*fields)
+
+
+def specific(self, *args, **kwargs):
+    clone = _specific(self, *args, **kwargs)
+    if not args and not kwargs.get('defer') and _get_loaded_languages(self) is not None:
+        clone._iterable_class = TranslationDeferredSpecificIterable
+    return clone
+
+
+class TranslationDeferredSpecificIterable(BaseIterable):
+    def __iter__(self):
+        return translation_deferred_specific_iterator(self.queryset)
+
+
+def translation_deferred_specific_iterator(qs):
+    """
+    Same as wagtail `specific_iterator` except that specific pages
+    are loaded with the same translation fields deferred as in `qs`.
+    """
+    languages = _get_loaded_languages(qs)
+    annotation_aliases = qs.query.annotation_select.keys()
+    values = qs.values('pk', 'content_type', *annotation_aliases)
+
+    annotations_by_pk = defaultdict(list)
+    if annotation_aliases:
+        for value in values:
+            annotations_by_pk[value['pk']] = {
+                k: v for k, v in value.items() if k in annotation_aliases}
+
+    pks_and_types = [[v['pk'], v['content_type']] for v in values]
+    pks_by_type = defaultdict(list)
+    for pk, content_type in pks_and_types:
+        pks_by_type[content_type].append(pk)
+
+    pages_by_type = {}
+    for content_type, pks in pks_by_type.items():
+        model = ContentType.objects.get_for_id(content_type).model_class()
+        pages = model.objects.filter(pk__in=pks)
+        fields = get_deferrable_translation_fields(model, languages)
+        if fields:
+            pages = pages.defer(*fields)
+        pages_by_type[content_type] = pages.in_bulk(pks)
+
+    for pk, content_type in pks_and_types:
+        try:
+            page = pages_by_type[content_type][pk]
+        except KeyError:
+            # page was deleted in the meantime
+            continue
+        for annotation, value in annotations_by_pk.get(pk, {}).items():
+            setattr(page, annotation, value)
+        yield page
@@ -0,0 +1,139 @@
+from __future__ import absolute_import, unicode_literals
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.translation import override
+from modeltranslation.utils import build_localized_fieldname
+
+from .site_patch import get_lang_root_paths
+from .utils import get_serve_path
+
+__all__ = ['redirects_enabled', 'create_url_path_redirects']
+
+# keeps `__in` lookups below database parameter limits (999 on older SQLite)
+LOOKUP_BATCH_SIZE = 500
+
+
+def redirects_enabled():
+    return getattr(settings, 'WAGTAIL_TRANSLATION_CREATE_REDIRECTS', False)
+
+
+def _chunked(items):
+    items = list(items)
+    for start in range(0, len(items), LOOKUP_BATCH_SIZE):
+        yield items[start:start + LOOKUP_BATCH_SIZE]
+
+
+def _get_link_variants(path, root_url):
+    """
+    Returns raw `redirect_link` values which point to normalized site `path`:
+    with and without trailing slash, relative and absolute.
+    """
+    paths = [path] if path.endswith('/') else [path, path + '/']
+    return paths + [root_url + p for p in paths if root_url]
+
+
+def _get_site_path(url_path, root_paths):
+    """
+    Returns (site id, normalized path) under which a page with `url_path`
+    is served in current language or None if it's not routable.
+    """
+    from wagtail.contrib.redirects.models import Redirect
+
+    if not url_path or '//' in url_path:
+        return None
+    for site_id, root_path, root_url in root_paths:
+        if url_path.startswith(root_path):
+            return site_id, Redirect.normalise_path(get_serve_path(url_path, root_path))
+    return None
+
+
+def create_url_path_redirects(page, old_page, lang_codes, descendants):
+    """
+    Creates permanent redirects from old to new localized URLs of `page` and its
+    live descendants after their url paths changed in `lang_codes`.
+
+    `descendants` are (page id, old url path for each of `lang_codes`) rows.
+    Redirects always point to pages (not to links), so that repeated renames don't build
+    redirect chains. Existing redirects from the new URLs are removed and redirects
+    pointing to old URLs as links are changed to point to pages.
+    """
+    from wagtail.contrib.redirects.models import Redirect
+
+    rows = list(descendants)
+    if page.live:
+        rows.insert(0, (page.id,) + tuple(
+            getattr(old_page, build_localized_fieldname('url_path', lang_code))
+            for lang_code in lang_codes))
+
+    redirect_to = {}  # (site id, old path) -> page id
+    root_urls = {}  # site id -> root url
+    new_paths = defaultdict(set)  # site id -> new paths
+    lang_root_paths = get_lang_root_paths(lang_codes)
+    for i, lang_code in enumerate(lang_codes):
+        url_path_field = build_localized_fieldname('url_path', lang_code)
+        old_prefix = getattr(old_page, url_path_field)
+        new_prefix = getattr(page, url_path_field)
+        with override(lang_code):
+            root_paths = lang_root_paths[lang_code]
+            root_urls.update((site_id, root_url) for site_id, root_path, root_url in root_paths)
+            for row in rows:
+                page_id, old_url_path = row[0], row[i + 1]
+                old_site_path = _get_site_path(old_url_path, root_paths)
+                if old_site_path is None:
+                    continue
+                redirect_to[old_site_path] = page_id
+                new_site_path = _get_site_path(
+                    new_prefix + old_url_path[len(old_prefix):], root_paths)
+                if new_site_path is not None:
+                    new_paths[new_site_path[0]].add(new_site_path[1])
+
+    for site_id, paths in new_paths.items():
+        # page may be renamed back to one of it's former urls
+        for path in paths:
+            redirect_to.pop((site_id, path), None)
+        for chunk in _chunked(paths):
+            Redirect.objects.filter(site_id=site_id, old_path__in=chunk).delete()
+
+    if not redirect_to:
+        return
+
+    old_paths_by_site = defaultdict(list)
+    for site_id, path in redirect_to:
+        old_paths_by_site[site_id].append(path)
+    for site_id, paths in old_paths_by_site.items():
+        for chunk in _chunked(paths):
+            Redirect.objects.filter(site_id=site_id, old_path__in=chunk).delete()
+
+    # collapse redirect chains: redirects to old urls now point to pages directly.
+    # Links are stored as entered, so they are looked up in every form
+    # normalizing to an old path (absolute ones only on the site of that path).
+    link_targets = {}  # (site id, link) -> page id
+    any_site_link_targets = {}  # link -> page id
+    for (site_id, path), page_id in redirect_to.items():
+        for link in _get_link_variants(path, root_urls.get(site_id)):
+            link_targets[site_id, link] = page_id
+            if link.startswith('/'):
+                any_site_link_targets.setdefault(link, page_id)
+
+    chained = []
+    links = {link for site_id, link in link_targets}
+    for chunk in _chunked(links):
+        chained.extend(Redirect.objects.filter(redirect_page__isnull=True, redirect_link__in=chunk))
+    for redirect in chained:
+        page_id = link_targets.get((redirect.site_id, redirect.redirect_link))
+        if page_id is None:
+            # redirect not bound to the same site, use any page with this path
+            page_id = any_site_link_targets.get(redirect.redirect_link)
+        if page_id is None:
+            page_id = next(pid for (site_id, link), pid in link_targets.items()
+                           if link == redirect.redirect_link)
+        redirect.redirect_page_id = page_id
+        redirect.redirect_link = ''
+    Redirect.objects.bulk_update(chained, ['redirect_page', 'redirect_link'])
+
+    Redirect.objects.bulk_create([
+        Redirect(old_path=path, site_id=site_id, redirect_page_id=page_id, is_permanent=True)
+        for (site_id, path), page_id in redirect_to.items()
+    ])
@@ -0,0 +1,151 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from modeltranslation import settings as mt_settings
+from wagtail.core.models import Page, PageViewRestriction, Site
+
+__all__ = [
+    'render_cache_enabled',
+    'is_cacheable_request',
+    'get_render_tokens',
+    'get_cached_response',
+    'cache_response',
+    'delete_render_cache',
+]
+
+# entries are keyed by site, language and url path,
+# and are valid as long as token of their page and language is unchanged
+RENDER_CACHE_KEY_FMT = 'wagtail_translation_render_{}_{}_{}'
+RENDER_TOKEN_KEY_FMT = 'wagtail_translation_render_token_{}_{}'
+RENDER_GENERATION_KEY = 'wagtail_translation_render_generation'
+
+
+def render_cache_enabled():
+    return getattr(settings, 'WAGTAIL_TRANSLATION_RENDER_CACHE', False)
+
+
+def is_cacheable_request(request):
+    user = getattr(request, 'user', None)
+    return (
+        request.method == 'GET' and
+        not request.GET and
+        (user is None or not user.is_authenticated)
+    )
+
+
+def _get_timeout():
+    return getattr(settings, 'WAGTAIL_TRANSLATION_RENDER_CACHE_TIMEOUT', 300)
+
+
+def _get_entry_key(site_id, lang_code, url_path):
+    return RENDER_CACHE_KEY_FMT.format(
+        site_id, lang_code, hashlib.md5(url_path.encode('utf-8')).hexdigest())
+
+
+def get_render_tokens(page_id, lang_code):
+    """
+    Returns (page token, generation) which a response rendered from now on is valid for.
+    Has to be called before rendering, so that changes made during rendering invalidate it.
+    """
+    token_key = RENDER_TOKEN_KEY_FMT.format(page_id, lang_code)
+    values = cache.get_many([token_key, RENDER_GENERATION_KEY])
+    if token_key not in values:
+        cache.add(token_key, uuid.uuid4().hex, None)
+    if RENDER_GENERATION_KEY not in values:
+        cache.add(RENDER_GENERATION_KEY, uuid.uuid4().hex, None)
+    if len(values) < 2:
+        values = cache.get_many([token_key, RENDER_GENERATION_KEY])
+    return values.get(token_key), values.get(RENDER_GENERATION_KEY)
+
+
+def get_cached_response(site_id, lang_code, url_path):
+    """
+    Returns cached response of page with `url_path` in `lang_code` on a site, or None.
+    """
+    entry = cache.get(_get_entry_key(site_id, lang_code, url_path))
+    if entry is None:
+        return None
+
+    token_key = RENDER_TOKEN_KEY_FMT.format(entry['page_id'], lang_code)
+    values = cache.get_many([token_key, RENDER_GENERATION_KEY])
+    if (values.get(token_key) != entry['token'] or
+            values.get(RENDER_GENERATION_KEY) != entry['generation']):
+        return None
+
+    response = HttpResponse(entry['content'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response['Content-Language'] = lang_code
+    return response
+
+
+def cache_response(site_id, lang_code, url_path, page, response, tokens):
+    """
+    Stores rendered `response` of `page` (see `get_render_tokens` for `tokens`)
+    with all its headers.
+    """
+    token, generation = tokens
+    if token is None or generation is None:
+        return
+    cache.set(_get_entry_key(site_id, lang_code, url_path), {
+        'page_id': page.pk,
+        'revision_id': page.live_revision_id,
+        'token': token,
+        'generation': generation,
+        'headers': list(response.items()),
+        'content': response.content,
+    }, _get_timeout())
+
+
+def _delete_tokens(page_ids, languages):
+    cache.delete_many([
+        RENDER_TOKEN_KEY_FMT.format(page_id, lang_code)
+        for page_id in page_ids
+        for lang_code in languages
+    ])
+
+
+def delete_render_cache(page_ids, languages=None):
+    """
+    Invalidates cached responses of pages with `page_ids` in `languages`
+    (all by default) after current transaction is committed.
+    """
+    if not render_cache_enabled():
+        return
+    page_ids = list(page_ids)
+    if page_ids:
+        transaction.on_commit(partial(
+            _delete_tokens, page_ids, list(languages or mt_settings.AVAILABLE_LANGUAGES)))
+
+
+def _delete_render_cache_receiver(sender, instance, **kwargs):
+    delete_render_cache([instance.pk])
+
+
+def _delete_all_render_cache_receiver(sender, instance, **kwargs):
+    # site root pages and hostnames decide which page an url path belongs to
+    if render_cache_enabled():
+        cache.set(RENDER_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _delete_restricted_render_cache_receiver(sender, instance, **kwargs):
+    # restrictions apply to the whole subtree, cache hits are served without checking them
+    if not render_cache_enabled():
+        return
+    for path in Page._base_manager.filter(id=instance.page_id).values_list('path', flat=True):
+        delete_render_cache(Page._base_manager.filter(path__startswith=path, live=True).values_list('id', flat=True))
+
+
+post_delete.connect(_delete_render_cache_receiver, sender=Page)
+post_save.connect(_delete_restricted_render_cache_receiver, sender=PageViewRestriction)
+post_delete.connect(_delete_restricted_render_cache_receiver, sender=PageViewRestriction)
+post_save.connect(_delete_all_render_cache_receiver, sender=Site)
+post_delete.connect(_delete_all_render_cache_receiver, sender=Site)
@@ -0,0 +1,173 @@
+from __future__ import absolute_import, unicode_literals
+
+import base64
+import json
+import zlib
+
+from django.conf import settings
+from django.db.models.query_utils import DeferredAttribute
+from wagtail.core.models import PageRevision
+
+__all__ = ['from_db', 'content_json']
+
+# Stored formats of PageRevision.content_json:
+#   plain JSON (default)
+#   'wtz:' + base64 encoded zlib compressed JSON
+#   'wtd:<base revision id>:' + base64 encoded zlib compressed JSON of
+#       {'set': {field: value}, 'del': [field]} relative to the base revision,
+#       which is always stored in one of the formats above
+COMPRESSED_PREFIX = 'wtz:'
+DELTA_PREFIX = 'wtd:'
+
+
+def get_compact_revisions_mode():
+    """
+    Returns None, 'compress' or 'delta' according to
+    `WAGTAIL_TRANSLATION_COMPACT_REVISIONS` setting (True means 'compress').
+    """
+    mode = getattr(settings, 'WAGTAIL_TRANSLATION_COMPACT_REVISIONS', None)
+    if mode is True:
+        return 'compress'
+    return mode or None
+
+
+def _compress(text):
+    return base64.b64encode(zlib.compress(text.encode('utf-8'))).decode('ascii')
+
+
+def _decompress(data):
+    return zlib.decompress(base64.b64decode(data)).decode('utf-8')
+
+
+def is_compact(content_json):
+    return content_json.startswith(COMPRESSED_PREFIX) or content_json.startswith(DELTA_PREFIX)
+
+
+def get_delta_base_id(content_json):
+    if content_json.startswith(DELTA_PREFIX):
+        return int(content_json[len(DELTA_PREFIX):].split(':', 1)[0])
+    return None
+
+
+def _get_stored_content_json(revision_id, using=None):
+    return PageRevision.objects.using(using).filter(pk=revision_id).values_list(
+        'content_json', flat=True).get()
+
+
+def decode_content(content_json, using=None, contents=None):
+    """
+    Returns revision content dict of stored `content_json` in any format.
+    `contents` may map revision ids to already decoded contents of delta base revisions.
+    """
+    if content_json.startswith(COMPRESSED_PREFIX):
+        return json.loads(_decompress(content_json[len(COMPRESSED_PREFIX):]))
+    if content_json.startswith(DELTA_PREFIX):
+        base_id, data = content_json[len(DELTA_PREFIX):].split(':', 1)
+        base_id = int(base_id)
+        if contents is not None and base_id in contents:
+            content = dict(contents[base_id])
+        else:
+            content = decode_content(_get_stored_content_json(base_id, using))
+        delta = json.loads(_decompress(data))
+        content.update(delta['set'])
+        for field in delta['del']:
+            content.pop(field, None)
+        return content
+    return json.loads(content_json)
+
+
+def decode_content_json(content_json, using=None):
+    """
+    Returns plain JSON of stored `content_json` in any format.
+    """
+    if content_json.startswith(COMPRESSED_PREFIX):
+        return _decompress(content_json[len(COMPRESSED_PREFIX):])
+    if content_json.startswith(DELTA_PREFIX):
+        return json.dumps(decode_content(content_json, using))
+    return content_json
+
+
+def encode_content_json(content_json, content, mode, base=None):
+    """
+    Returns `content_json` (with `content` being its decoded dict) in storage format of `mode`.
+    In 'delta' mode `base` is a tuple of (revision id, content dict) of a revision
+    not stored as delta. Delta is only used when it is clearly smaller than full content.
+    """
+    if not mode:
+        return content_json
+
+    compressed = COMPRESSED_PREFIX + _compress(content_json)
+    if mode != 'delta' or base is None:
+        return compressed
+
+    base_id, base_content = base
+    delta = {
+        'set': {field: value for field, value in content.items()
+                if field not in base_content or base_content[field] != value},
+        'del': [field for field in base_content if field not in content],
+    }
+    encoded = '{}{}:{}'.format(DELTA_PREFIX, base_id, _compress(json.dumps(delta)))
+    # changes accumulate against the same base, so store full content
+    # (making it base of next revisions) once delta gets too big
+    if len(encoded) * 2 > len(compressed):
+        return compressed
+    return encoded
+
+
+def get_delta_base(page_id, using=None):
+    """
+    Returns (revision id, content dict) of a revision which a new revision
+    of page can be stored as a delta of, or None.
+    """
+    previous = PageRevision.objects.using(using).filter(page_id=page_id).order_by(
+        '-created_at', '-id').values_list('id', 'content_json').first()
+    if previous is None:
+        return None
+
+    base_id, content_json = previous
+    delta_base_id = get_delta_base_id(content_json)
+    if delta_base_id is not None:
+        base_id = delta_base_id
+        content_json = _get_stored_content_json(base_id, using)
+    return base_id, decode_content(content_json)
+
+
+class ContentJsonAttribute(DeferredAttribute):
+    """
+    Decodes compact `content_json` of revisions loaded from the database when it's first read,
+    so that revisions which are only listed or deleted don't query their delta bases.
+    Values set in code are kept as they are.
+    """
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        content_json = super(ContentJsonAttribute, self).__get__(instance, cls)
+        if instance.__dict__.pop('_content_json_stored', False) and content_json and is_compact(content_json):
+            content_json = instance.__dict__[self.field.attname] = decode_content_json(
+                content_json, using=instance._state.db)
+        return content_json
+
+    def __set__(self, instance, value):
+        instance.__dict__.pop('_content_json_stored', None)
+        instance.__dict__[self.field.attname] = value
+
+
+def get_stored_content_json(revision):
+    """
+    Returns `content_json` of a revision loaded from the database without decoding it
+    (or its plain content when it was read already).
+    """
+    if 'content_json' not in revision.__dict__:
+        return _get_stored_content_json(revision.pk, revision._state.db)
+    return revision.__dict__['content_json']
+
+
+content_json = ContentJsonAttribute(PageRevision._meta.get_field('content_json'))
+
+
+@classmethod
+def from_db(cls, db, field_names, values):
+    instance = super(PageRevision, cls).from_db(db, field_names, values)
+    if 'content_json' in instance.__dict__:
+        instance._content_json_stored = True
+    return instance
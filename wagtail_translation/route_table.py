@@ -0,0 +1,261 @@
+from __future__ import absolute_import, unicode_literals
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site
+
+__all__ = [
+    'compile_route_table',
+    'schedule_route_table_compile',
+    'get_route_table',
+    'lookup_route',
+]
+
+# Route table file layout:
+#   header: magic, generation, number of entries
+#   entries sorted by key: key offset, key length, page id, content type id
+#   keys: utf-8 encoded '<site id>\0<language>\0<url path>'
+MAGIC = b'WTROUTE1'
+HEADER = struct.Struct('<8sQI')
+ENTRY = struct.Struct('<IIII')
+
+
+def get_route_table_path():
+    return getattr(settings, 'WAGTAIL_TRANSLATION_ROUTE_TABLE', None)
+
+
+def _make_key(site_id, lang_code, url_path):
+    return '{}\0{}\0{}'.format(site_id, lang_code, url_path).encode('utf-8')
+
+
+def _read_generation(path):
+    try:
+        with open(path, 'rb') as f:
+            magic, generation, count = HEADER.unpack(f.read(HEADER.size))
+    except (IOError, OSError, struct.error):
+        return 0
+    return generation if magic == MAGIC else 0
+
+
+_compile_lock = threading.Lock()
+
+
+@contextmanager
+def _compile_locked(path):
+    """
+    Serializes compiles of the table at `path` between threads and (where `fcntl`
+    is available) processes, so that an older table never replaces a newer one.
+    """
+    with _compile_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _get_entries():
+    languages = mt_settings.AVAILABLE_LANGUAGES
+    url_path_fields = [build_localized_fieldname('url_path', lang_code) for lang_code in languages]
+    site_roots = [
+        (site.id, [getattr(site.root_page, field) for field in url_path_fields])
+        for site in Site.objects.select_related('root_page')
+    ]
+
+    entries = {}
+    rows = Page._base_manager.filter(live=True).values_list(
+        'id', 'content_type_id', *url_path_fields)
+    for row in rows.iterator():
+        page_id, content_type_id = row[:2]
+        for i, url_path in enumerate(row[2:]):
+            # '//' in url_path means that the page is not routable in this language
+            if not url_path or '//' in url_path:
+                continue
+            for site_id, root_paths in site_roots:
+                if root_paths[i] and url_path.startswith(root_paths[i]):
+                    entries[_make_key(site_id, languages[i], url_path)] = (page_id, content_type_id)
+    return entries
+
+
+def compile_route_table(path=None):
+    """
+    Writes a sorted, read-only table of (site, language, url_path_<lang>) to
+    (page id, content type id) for all live routable pages.
+    The file is replaced atomically, processes having it mapped pick it up on next lookup.
+    Compiles are serialized, pages are read only after the previous compile has finished
+    and the file is not replaced when its generation changed in the meantime.
+    """
+    path = path or get_route_table_path()
+    if not path:
+        return
+
+    with _compile_locked(path):
+        while not _write_route_table(path):
+            # written by a process not sharing the lock, its table may be newer
+            pass
+
+
+def _write_route_table(path):
+    """
+    Writes route table to `path` unless its generation changes while
+    entries are read. Returns whether the table was written.
+    """
+    generation = _read_generation(path)
+    entries = _get_entries()
+
+    keys = sorted(entries)
+    keys_offset = HEADER.size + ENTRY.size * len(keys)
+    index = []
+    offset = keys_offset
+    for key in keys:
+        index.append(ENTRY.pack(offset, len(key), *entries[key]))
+        offset += len(key)
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.route_table')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, generation + 1, len(keys)))
+            f.write(b''.join(index))
+            f.write(b''.join(keys))
+        os.chmod(tmp_path, 0o644)
+        if _read_generation(path) != generation:
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return True
+
+
+_pending = threading.local()
+
+
+def _compile_pending():
+    if getattr(_pending, 'dirty', False):
+        _pending.dirty = False
+        compile_route_table()
+
+
+def schedule_route_table_compile():
+    """
+    Recompiles route table after current transaction is committed
+    (once per transaction). Does nothing when route table is not configured.
+    """
+    if not get_route_table_path():
+        return
+    _pending.dirty = True
+    transaction.on_commit(_compile_pending)
+
+
+class RouteTable(object):
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.file_id = (stat.st_ino, stat.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError('%s is not a route table file' % path)
+
+    def lookup(self, site_id, lang_code, url_path):
+        key = _make_key(site_id, lang_code, url_path)
+        mm = self._mm
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, length, page_id, content_type_id = ENTRY.unpack_from(
+                mm, HEADER.size + mid * ENTRY.size)
+            candidate = mm[offset:offset + length]
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return page_id, content_type_id
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+_table = None
+_table_checked_at = 0
+_table_lock = threading.Lock()
+
+
+def get_route_table():
+    """
+    Returns route table of this process. The file is checked for changes at most
+    every `WAGTAIL_TRANSLATION_ROUTE_TABLE_CHECK_INTERVAL` seconds (1 by default)
+    and mapped again when it was replaced.
+    Returns None when route table is not configured or not compiled yet.
+    """
+    global _table, _table_checked_at
+
+    path = get_route_table_path()
+    if not path:
+        return None
+
+    now = time.monotonic()
+    interval = getattr(settings, 'WAGTAIL_TRANSLATION_ROUTE_TABLE_CHECK_INTERVAL', 1)
+    if _table is not None and now - _table_checked_at < interval:
+        return _table
+
+    with _table_lock:
+        _table_checked_at = now
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return _table
+        if _table is None or _table.file_id != (stat.st_ino, stat.st_mtime_ns):
+            # previous table is left for garbage collection,
+            # other threads may still use it
+            _table = RouteTable(path)
+    return _table
+
+
+def lookup_route(site_id, lang_code, url_path):
+    """
+    Returns (page id, content type id) of a live page with `url_path`
+    in `lang_code` on a site, or None.
+    """
+    table = get_route_table()
+    if table is None:
+        return None
+    return table.lookup(site_id, lang_code, url_path)
+
+
+def _schedule_route_table_compile_receiver(sender, instance, **kwargs):
+    schedule_route_table_compile()
+
+
+def _page_deleted_receiver(sender, instance, **kwargs):
+    if instance.live:
+        schedule_route_table_compile()
+
+
+post_save.connect(_schedule_route_table_compile_receiver, sender=Site)
+post_delete.connect(_schedule_route_table_compile_receiver, sender=Site)
+post_delete.connect(_page_deleted_receiver, sender=Page)
@@ -1,8 +1,21 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_save
 from wagtail.core.models import Page
 from wagtail.search import index
+from wagtail.search import signal_handlers as search_signal_handlers
+from wagtail.search.backends import get_search_backends
+from wagtail.search.signal_handlers import post_save_signal_handler as _post_save_signal_handler
 
 from .utils import obj_per_lang
 
+logger = logging.getLogger('wagtail.search.index')
+
 
 # add localized titles to search index (this is used as patched Page.search_fields)
 search_fields = (
@@ -10,3 +23,155 @@ search_fields = (
     Page.search_fields +
     obj_per_lang(index.SearchField, 'title', partial_match=True, boost=2)
 )
+
+
+_indexed_fields = {}
+_pending = threading.local()
+
+
+def get_indexed_fields(model):
+    """
+    Returns a dict of concrete field names to attnames for fields used
+    by search fields of `model`, or None when some search fields
+    are not plain model fields (related fields, methods) and can't be compared.
+    """
+    if model not in _indexed_fields:
+        fields = {}
+        for search_field in model.get_search_fields():
+            if isinstance(search_field, index.RelatedFields):
+                fields = None
+                break
+            try:
+                field = model._meta.get_field(search_field.field_name)
+            except FieldDoesNotExist:
+                fields = None
+                break
+            if not field.concrete:
+                fields = None
+                break
+            fields[field.name] = field.attname
+        _indexed_fields[model] = fields
+    return _indexed_fields[model]
+
+
+def has_indexed_field_changes(instance, update_fields=None):
+    """
+    Checks whether saving `instance` changes any value stored in the search index.
+    """
+    fields = get_indexed_fields(type(instance))
+    if fields is None or instance.pk is None:
+        return True
+    if update_fields is not None:
+        fields = {name: attname for name, attname in fields.items() if name in update_fields}
+        if not fields:
+            return False
+
+    attnames = list(fields.values())
+    old_values = type(instance)._base_manager.filter(pk=instance.pk).values(*attnames).first()
+    if old_values is None:
+        return True
+    return any(old_values[attname] != getattr(instance, attname) for attname in attnames)
+
+
+def post_save_signal_handler(instance, update_fields=None, **kwargs):
+    """
+    Replaces wagtail search post_save signal handler.
+    Pages are indexed once per transaction and only if indexed values were changed.
+    """
+    if not isinstance(instance, Page):
+        return _post_save_signal_handler(instance, update_fields=update_fields, **kwargs)
+
+    if not getattr(instance, '_indexed_fields_changed', True):
+        return
+
+    schedule_index_update([instance.pk])
+
+
+def replace_signal_handlers():
+    """
+    Replaces wagtail search post_save signal handler with `post_save_signal_handler`,
+    whether `wagtail.search` app is ready before or after this app.
+    """
+    # used when wagtail.search app connects its handlers later
+    search_signal_handlers.post_save_signal_handler = post_save_signal_handler
+    # handlers connected already are swapped
+    for model in index.get_indexed_models():
+        if post_save.disconnect(_post_save_signal_handler, sender=model):
+            post_save.connect(post_save_signal_handler, sender=model)
+
+
+def schedule_index_update(pks):
+    """
+    Adds pages with `pks` to search index after current transaction is committed.
+    Pages saved in the same transaction are indexed together, pages saved in
+    rolled back transactions (or savepoints) are not indexed.
+    """
+    update = getattr(_pending, 'update', None)
+    if update is not None and update.is_pending():
+        update.pks.update(pks)
+    else:
+        update = _pending.update = _IndexUpdate(pks)
+        update.register()
+
+
+class _IndexUpdate(object):
+    """
+    on_commit callback indexing pages scheduled in one transaction.
+    """
+    def __init__(self, pks):
+        self.pks = set(pks)
+        self.done = False
+        self.run_on_commit = None
+
+    def register(self):
+        connection = transaction.get_connection()
+        # runs right away outside of transactions
+        transaction.on_commit(self)
+        self.run_on_commit = connection.run_on_commit
+
+    def is_pending(self):
+        """
+        Checks whether this callback is still to be run at commit
+        (it is dropped from on_commit callbacks when transaction or savepoint is rolled back).
+        """
+        if self.done:
+            return False
+        run_on_commit = transaction.get_connection().run_on_commit
+        if run_on_commit is not self.run_on_commit:
+            # callback list is replaced on rollback, see if this callback was left in it
+            if not any(entry[1] is self for entry in run_on_commit):
+                return False
+            self.run_on_commit = run_on_commit
+        return True
+
+    def __call__(self):
+        self.done = True
+        update_index(self.pks)
+
+
+def update_index(pks):
+    """
+    Adds pages with `pks` to search backends, in bulk per page model.
+    """
+    if not pks:
+        return
+
+    pks_by_type = defaultdict(list)
+    for pk, content_type in Page._base_manager.filter(pk__in=pks).values_list('pk', 'content_type'):
+        pks_by_type[content_type].append(pk)
+
+    objs_by_model = {}
+    for content_type, type_pks in pks_by_type.items():
+        model = ContentType.objects.get_for_id(content_type).model_class()
+        objs = list(model.get_indexed_objects().filter(pk__in=type_pks))
+        if objs:
+            objs_by_model[model] = objs
+
+    for backend in get_search_backends(with_auto_update=True):
+        for model, objs in objs_by_model.items():
+            try:
+                backend.add_bulk(model, objs)
+            except Exception:
+                # Catch and log all errors
+                logger.exception("Exception raised while adding %d %r objects into the search backend",
+                                 len(objs), model)
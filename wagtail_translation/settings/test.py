@@ -1,17 +1,59 @@
+import os
+
+from django.conf import global_settings
+
 from .base import *  # NOQA
 
 DEBUG = False
 
+# 'sync' is a second database for page tree sync tests, its tables are created without migrations
+# because wagtail data migrations always write to default database
 DATABASES = {
     'default': {
         'NAME': 'test.sqlite',
         'ENGINE': 'django.db.backends.sqlite3',
-    }
+    },
+    'sync': {
+        'NAME': 'test_sync.sqlite',
+        'ENGINE': 'django.db.backends.sqlite3',
+        'TEST': {'MIGRATE': False},
+    },
 }
+if os.environ.get('WAGTAIL_TRANSLATION_TEST_DATABASE') == 'postgresql':
+    # connection parameters are taken from libpq environment variables (PGHOST, PGPORT, PGUSER, ...)
+    DATABASES = {
+        'default': {
+            'NAME': 'wagtail_translation',
+            'ENGINE': 'django.db.backends.postgresql',
+        },
+        'sync': {
+            'NAME': 'wagtail_translation_sync',
+            'ENGINE': 'django.db.backends.postgresql',
+            'TEST': {'MIGRATE': False},
+        },
+    }
 
 INSTALLED_APPS += (
     'wagtail_translation.tests',
 )
 
+# number of translation languages can be changed to check how code scales with it, e.g.
+# WAGTAIL_TRANSLATION_TEST_LANGUAGES=32 django-admin test --settings=wagtail_translation.settings.test
+_extra_languages = [
+    (code, name) for code, name in global_settings.LANGUAGES
+    if '-' not in code and code not in dict(LANGUAGES)]
+LANGUAGES = (LANGUAGES + _extra_languages)[:int(os.environ.get('WAGTAIL_TRANSLATION_TEST_LANGUAGES', 2))]
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.locale.LocaleMiddleware',
+]
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 ROOT_URLCONF = 'wagtail_translation.tests.urls'
-WAGTAIL_SITE_NAME = 'Wagtail Translation Test'
\ No newline at end of file
+WAGTAIL_SITE_NAME = 'Wagtail Translation Test'
@@ -1,15 +1,20 @@
 import json
 import re
+import threading
 
-from django.db.models.signals import pre_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils.translation import get_language
 
 from modeltranslation.utils import build_localized_fieldname
-from wagtail.core.models import PageRevision
+from wagtail.core.models import Page, PageRevision
 
 
 from .page_patch import PREFIX
+from .revision_patch import (
+    DELTA_PREFIX, decode_content, encode_content_json, get_compact_revisions_mode, get_delta_base,
+    get_delta_base_id, get_stored_content_json)
 
 
 @receiver(pre_save, sender=PageRevision)
@@ -25,3 +30,93 @@ def pre_save_signal_handler(sender, instance, *args, **kwargs):
     for field in field_list:
         content[field] = xp.sub("", content[field])
     instance.content_json = json.dumps(content)
+
+    mode = get_compact_revisions_mode()
+    if mode:
+        # existing revisions may be base of other revisions, so they are never stored as deltas
+        base = None
+        if mode == 'delta' and instance.pk is None:
+            base = get_delta_base(instance.page_id, using=kwargs.get('using'))
+        instance._plain_content_json = instance.content_json
+        instance.content_json = encode_content_json(instance.content_json, content, mode, base)
+
+
+@receiver(post_save, sender=PageRevision)
+def post_save_signal_handler(sender, instance, *args, **kwargs):
+    # saved revision is used right away (e.g. published), so give it back plain content
+    plain_content_json = instance.__dict__.pop('_plain_content_json', None)
+    if plain_content_json is not None:
+        instance.content_json = plain_content_json
+
+
+# deleted revisions (id -> (page id, stored content)) which other revisions may be deltas of,
+# and pages being deleted, collected by pre_delete and handled by post_delete of the same deletion
+_deleting = threading.local()
+
+# revision ids per query matching delta prefixes
+DEPENDENT_LOOKUP_BATCH_SIZE = 100
+
+
+@receiver(pre_delete, sender=Page)
+def page_pre_delete_signal_handler(sender, instance, **kwargs):
+    # revisions of deleted pages are deleted along with them, so they aren't expanded
+    _deleting.__dict__.setdefault('page_ids', set()).add(instance.pk)
+
+
+@receiver(post_delete, sender=Page)
+def page_post_delete_signal_handler(sender, instance, **kwargs):
+    getattr(_deleting, 'page_ids', set()).discard(instance.pk)
+
+
+@receiver(pre_delete, sender=PageRevision)
+def pre_delete_signal_handler(sender, instance, using=None, **kwargs):
+    content_json = get_stored_content_json(instance)
+    if get_delta_base_id(content_json) is None:
+        # only revisions not stored as deltas can be delta bases
+        _deleting.__dict__.setdefault('revisions', {})[instance.pk] = (instance.page_id, content_json)
+
+
+@receiver(post_delete, sender=PageRevision)
+def post_delete_signal_handler(sender, instance, using=None, **kwargs):
+    # all revisions of a deletion are deleted before the first post_delete signal is sent
+    revisions = getattr(_deleting, 'revisions', None)
+    if not revisions:
+        return
+    _deleting.revisions = {}
+    deleted_page_ids = getattr(_deleting, 'page_ids', ())
+    expand_dependent_revisions({
+        revision_id: base for revision_id, base in revisions.items()
+        if base[0] not in deleted_page_ids
+    }, using=using)
+
+
+def expand_dependent_revisions(bases, using=None):
+    """
+    Stores revisions which are deltas of `bases` (a dict mapping deleted revision ids
+    to (page id, stored content json) tuples) with their full content.
+    Revisions deleted along with their bases are already gone.
+    """
+    if not bases:
+        return
+    base_ids = list(bases)
+    dependent = []
+    for start in range(0, len(base_ids), DEPENDENT_LOOKUP_BATCH_SIZE):
+        chunk = base_ids[start:start + DEPENDENT_LOOKUP_BATCH_SIZE]
+        query = Q()
+        for base_id in chunk:
+            query |= Q(content_json__startswith='{}{}:'.format(DELTA_PREFIX, base_id))
+        dependent.extend(PageRevision.objects.using(using).filter(
+            query, page_id__in={bases[base_id][0] for base_id in chunk}).values_list('id', 'content_json'))
+    if not dependent:
+        return
+
+    contents = {}
+    expanded = []
+    for revision_id, content_json in dependent:
+        base_id = get_delta_base_id(content_json)
+        if base_id not in contents:
+            contents[base_id] = decode_content(bases[base_id][1])
+        content_json = json.dumps(decode_content(content_json, contents=contents))
+        expanded.append(PageRevision(
+            id=revision_id, content_json=encode_content_json(content_json, None, 'compress')))
+    PageRevision.objects.using(using).bulk_update(expanded, ['content_json'])
@@ -2,7 +2,7 @@ from __future__ import absolute_import, unicode_literals
 
 from django.core.cache import cache
 from django.db.models.signals import post_delete, post_save
-from django.utils.translation import get_language
+from django.utils.translation import get_language, override
 from modeltranslation import settings as mt_settings
 from wagtail.core.models import Site
 
@@ -15,6 +15,9 @@ ROOT_PATHS_CACHE_KEY_FMT = 'wagtail_site_root_paths_{}'
 @staticmethod
 def get_site_root_paths():
     lang = get_language()
+    if lang in mt_settings.AVAILABLE_LANGUAGES:
+        # a cache miss loads root paths of all languages with one query
+        return get_lang_root_paths([lang])[lang]
     cache_key = ROOT_PATHS_CACHE_KEY_FMT.format(lang)
 
     result = cache.get(cache_key)
@@ -29,9 +32,35 @@ def get_site_root_paths():
     return result
 
 
+def get_lang_root_paths(languages=None):
+    """
+    Returns a dict mapping language codes to site root paths (see `Site.get_site_root_paths`),
+    reading all languages from cache at once. When any is missing, root paths of all languages
+    are loaded with a single query and cached.
+    """
+    languages = list(languages or mt_settings.AVAILABLE_LANGUAGES)
+    cache_keys = {lang: ROOT_PATHS_CACHE_KEY_FMT.format(lang) for lang in languages}
+    cached = cache.get_many(list(cache_keys.values()))
+    result = {lang: cached[cache_keys[lang]] for lang in languages if cache_keys[lang] in cached}
+
+    missing = [lang for lang in languages if lang not in result]
+    if missing:
+        sites = list(Site.objects.select_related('root_page'))
+        to_cache = {}
+        for lang in mt_settings.AVAILABLE_LANGUAGES:
+            with override(lang):
+                root_paths = [(site.id, site.root_page.url_path, site.root_url) for site in sites]
+            root_paths.sort(key=lambda root_path: root_path[1] or '', reverse=True)
+            to_cache[ROOT_PATHS_CACHE_KEY_FMT.format(lang)] = root_paths
+            if lang in cache_keys:
+                result[lang] = root_paths
+        cache.set_many(to_cache, 3600)
+
+    return result
+
+
 def delete_root_path_cache():
-    for lang in mt_settings.AVAILABLE_LANGUAGES:
-        cache.delete(ROOT_PATHS_CACHE_KEY_FMT.format(lang))
+    cache.delete_many([ROOT_PATHS_CACHE_KEY_FMT.format(lang) for lang in mt_settings.AVAILABLE_LANGUAGES])
 
 
 def _delete_root_path_cache_receiver(sender, instance, **kwargs):
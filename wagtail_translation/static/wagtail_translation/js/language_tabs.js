@@ -0,0 +1,30 @@
+$(document).ready(function() {
+    // language tabs which were not rendered with the page are loaded when opened
+    $('.wagtail-translation-lazy-panel').each(function() {
+        var $panel = $(this);
+        var tabId = $panel.closest('.tab-pane, section').attr('id');
+        var loaded = false;
+
+        function load() {
+            if (loaded) {
+                return;
+            }
+            loaded = true;
+            $.get($panel.data('url'), function(html) {
+                // inline scripts of widgets are run by jQuery
+                $panel.replaceWith(html);
+            }).fail(function() {
+                loaded = false;
+            });
+        }
+
+        if (!tabId) {
+            load();
+            return;
+        }
+        $('a[href="#' + tabId + '"]').on('click shown.bs.tab', load);
+        if ($('#' + tabId).hasClass('active')) {
+            load();
+        }
+    });
+});
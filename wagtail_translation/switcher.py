@@ -0,0 +1,186 @@
+from __future__ import absolute_import, unicode_literals
+
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import override
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site, get_page_models
+
+from .site_patch import get_lang_root_paths
+from .utils import get_url_from_url_parts, get_url_parts_for_url_path
+
+__all__ = ['get_lang_url_paths', 'get_lang_urls', 'get_lang_url', 'delete_lang_urls_cache']
+
+
+LANG_URLS_CACHE_KEY_FMT = 'wagtail_translation_lang_urls_{}_{}'
+LANG_URLS_GENERATION_KEY = 'wagtail_translation_lang_urls_generation'
+# larger subtrees are invalidated by changing cache key generation
+LANG_URLS_DELETE_LIMIT = 1000
+
+
+def _get_generation():
+    generation = cache.get(LANG_URLS_GENERATION_KEY)
+    if generation is None:
+        cache.add(LANG_URLS_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(LANG_URLS_GENERATION_KEY)
+    return generation
+
+
+def delete_lang_urls_cache(path=None):
+    """
+    Drops cached entries of pages in the subtree at `path`, or all entries
+    (by changing cache key generation) when `path` is not given or the subtree is large.
+    """
+    if path is not None:
+        page_ids = list(Page._base_manager.filter(path__startswith=path).values_list(
+            'id', flat=True)[:LANG_URLS_DELETE_LIMIT + 1])
+        if len(page_ids) <= LANG_URLS_DELETE_LIMIT:
+            generation = _get_generation()
+            cache.delete_many([LANG_URLS_CACHE_KEY_FMT.format(generation, page_id) for page_id in page_ids])
+            return
+    cache.set(LANG_URLS_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _get_lang_url_paths(page):
+    result = {}
+    fallback_url_paths = {}
+    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+        url_path = getattr(page, build_localized_fieldname('url_path', lang_code))
+        # find position of first non-translated page in path (if any)
+        non_trans_page = url_path.find('//') if url_path else 0
+        if non_trans_page < 0:
+            result[lang_code] = url_path
+        elif non_trans_page == 0:
+            # root page not translated!
+            result[lang_code] = None
+        else:
+            # use the nearest translated ancestor instead
+            fallback_url_paths[lang_code] = url_path[:non_trans_page + 1]
+            result[lang_code] = None
+
+    if fallback_url_paths:
+        query = Q()
+        for lang_code, url_path in fallback_url_paths.items():
+            query |= Q(**{build_localized_fieldname('url_path', lang_code): url_path})
+        live_url_paths = set()
+        for row in Page.objects.live().filter(query).values_list(*[
+                build_localized_fieldname('url_path', lang_code) for lang_code in fallback_url_paths]):
+            live_url_paths.update(row)
+        for lang_code, url_path in fallback_url_paths.items():
+            if url_path in live_url_paths:
+                result[lang_code] = url_path
+
+    return result
+
+
+def get_lang_url_paths(page):
+    """
+    Returns a dict mapping language codes to url paths of `page`,
+    or of its nearest live translated ancestor when the page itself is not translated,
+    or None when there's no such page. Result is cached.
+    """
+    if page.pk is None:
+        # e.g. preview of a new page
+        return _get_lang_url_paths(page)
+
+    cache_key = LANG_URLS_CACHE_KEY_FMT.format(_get_generation(), page.pk)
+    result = cache.get(cache_key)
+
+    if result is None:
+        result = _get_lang_url_paths(page)
+        cache.set(cache_key, result, 3600)
+
+    return result
+
+
+def build_lang_urls(lang_url_paths, lang_root_paths, current_site_id=None):
+    """
+    Returns a dict mapping language codes to urls of `lang_url_paths`
+    (see `get_lang_url_paths`) using root paths of every language.
+    """
+    result = {}
+    for lang_code, url_path in lang_url_paths.items():
+        if url_path is None:
+            result[lang_code] = None
+            continue
+        with override(lang_code):
+            root_paths = lang_root_paths[lang_code]
+            url_parts = get_url_parts_for_url_path(url_path, root_paths, current_site_id)
+            result[lang_code] = get_url_from_url_parts(url_parts, root_paths, current_site_id)
+    return result
+
+
+def get_lang_urls(page, request=None, languages=None):
+    """
+    Returns a dict mapping language codes (all or `languages`) to urls for a language switcher
+    (see `get_lang_url_paths`). Urls are relative when page belongs
+    to request site (or there is only one site).
+    """
+    site = getattr(request, 'site', None)
+    current_site_id = site.pk if site is not None else None
+
+    lang_url_paths = get_lang_url_paths(page)
+    if languages is not None:
+        lang_url_paths = {lang_code: lang_url_paths.get(lang_code) for lang_code in languages}
+    lang_root_paths = get_lang_root_paths(
+        [lang_code for lang_code, url_path in lang_url_paths.items() if url_path is not None])
+    return build_lang_urls(lang_url_paths, lang_root_paths, current_site_id)
+
+
+def _has_custom_urls(model):
+    return any(getattr(model, name) is not getattr(Page, name)
+               for name in ('url', 'get_url', 'get_url_parts', 'relative_url'))
+
+
+_custom_url_models = None
+
+
+def _get_custom_url_models():
+    global _custom_url_models
+    if _custom_url_models is None:
+        _custom_url_models = [model for model in get_page_models() if _has_custom_urls(model)]
+    return _custom_url_models
+
+
+def get_lang_url(page, lang_code, request=None):
+    """
+    Returns url of `page` (or of its nearest live translated ancestor, see `get_lang_url_paths`)
+    in `lang_code` or None. Page models overriding `url`, `get_url`, `get_url_parts`
+    or `relative_url` get their urls from these methods, others are built from cached url paths.
+    """
+    # urls of other languages are not built, switchers call this once per language
+    if not _get_custom_url_models():
+        return get_lang_urls(page, request, [lang_code]).get(lang_code)
+
+    url_path = get_lang_url_paths(page).get(lang_code)
+    if url_path is None:
+        return None
+    url_path_field = build_localized_fieldname('url_path', lang_code)
+    if url_path != getattr(page, url_path_field):
+        page = Page.objects.filter(**{url_path_field: url_path}).specific().first()
+        if page is None:
+            return None
+    if not _has_custom_urls(type(page)):
+        return get_lang_urls(page, request, [lang_code]).get(lang_code)
+    with override(lang_code):
+        if type(page).url is not Page.url:
+            return page.url
+        return page.get_url(request)
+
+
+def _delete_lang_urls_cache_receiver(sender, instance, **kwargs):
+    delete_lang_urls_cache()
+
+
+def _delete_page_lang_urls_receiver(sender, instance, **kwargs):
+    # descendants are deleted along with the page
+    cache.delete(LANG_URLS_CACHE_KEY_FMT.format(_get_generation(), instance.pk))
+
+
+post_save.connect(_delete_lang_urls_cache_receiver, sender=Site)
+post_delete.connect(_delete_lang_urls_cache_receiver, sender=Site)
+post_delete.connect(_delete_page_lang_urls_receiver, sender=Page)
@@ -0,0 +1,490 @@
+from __future__ import absolute_import, unicode_literals
+
+import bisect
+import copy
+import hashlib
+import json
+import logging
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from modeltranslation import settings as mt_settings
+from modeltranslation.translator import translator
+from modeltranslation.utils import build_localized_fieldname
+from modelcluster.models import get_all_child_relations
+from wagtail.core.models import Page
+
+from .menu import delete_menu_cache
+from .render_cache import delete_render_cache
+from .route_table import schedule_route_table_compile
+from .site_patch import delete_root_path_cache
+from .switcher import delete_lang_urls_cache
+
+try:
+    from wagtail.core.models import COMMENTS_RELATION_NAME
+except ImportError:  # wagtail < 2.13
+    COMMENTS_RELATION_NAME = None
+
+logger = logging.getLogger('wagtail.core')
+
+__all__ = ['get_sync_key_field', 'get_tree_state', 'diff_trees', 'write_diff', 'apply_diff']
+
+DIFF_VERSION = 3
+
+# page fields which are not copied to created pages: tree position and url paths
+# are set by the target tree, users and revisions don't exist in the target database
+_NON_SYNCED_FIELDS = {'pk', 'id', 'path', 'depth', 'numchild', 'url_path', 'content_type', 'owner',
+                      'locked', 'locked_by', 'locked_at', 'live_revision', 'latest_revision_created_at',
+                      'locale', 'alias_of'}
+
+
+def get_sync_key_field():
+    """
+    Returns the Page field pages are matched by in both trees: `translation_key` (Wagtail 2.11+),
+    which is kept when databases are copied and by created pages, or default language url path.
+    """
+    try:
+        Page._meta.get_field('translation_key')
+    except FieldDoesNotExist:
+        return build_localized_fieldname('url_path', mt_settings.DEFAULT_LANGUAGE)
+    return 'translation_key'
+
+
+def get_sync_fields(model=Page):
+    """
+    Returns localized names of translation fields of `model` (including inherited ones)
+    which are compared and synced.
+    url_path is derived, it is recomputed for moved or renamed subtrees instead.
+    """
+    return [
+        build_localized_fieldname(field_name, lang_code)
+        for field_name in sorted(translator.get_options_for_model(model).fields)
+        if field_name != 'url_path'
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES
+    ]
+
+
+def _get_sync_models():
+    # registered Page subclasses (registration is required for every Page model)
+    return [model for model in translator.get_registered_models()
+            if issubclass(model, Page) and not model._meta.abstract]
+
+
+def _to_json_value(field, value):
+    # e.g. StreamField values are stored as JSON strings
+    return json.loads(json.dumps(field.get_prep_value(value), cls=DjangoJSONEncoder))
+
+
+class TreeNode(object):
+    __slots__ = ('key', 'parent_key', 'model', 'values', 'own_hash', 'subtree_hash', 'children')
+
+    def __init__(self, key, parent_key, model, values):
+        self.key = key
+        self.parent_key = parent_key
+        self.model = model
+        self.values = values
+        self.children = []
+        self.own_hash = hashlib.sha1(
+            json.dumps([parent_key, sorted(values.items())]).encode('utf-8')).hexdigest()
+        self.subtree_hash = None
+
+
+def get_tree_state(using=None):
+    """
+    Returns a dict mapping page keys (see `get_sync_key_field`) to `TreeNode`s with hashes
+    of synced values and parent of every page (own hash) and of whole subtrees (subtree hash,
+    which depends on the order of children too).
+    Pages are read with a single query, translation fields of Page subclasses
+    with one more query per subclass having its own translation fields.
+    """
+    key_field = get_sync_key_field()
+    page_fields = get_sync_fields()
+    model_fields = {}
+    for model in _get_sync_models():
+        extra_fields = [field for field in get_sync_fields(model) if field not in page_fields]
+        if extra_fields:
+            model_fields[model] = extra_fields
+
+    rows = list(Page._base_manager.using(using).order_by('path').values_list(
+        'id', 'path', key_field, 'content_type_id', *page_fields))
+    content_types = ContentType.objects.db_manager(using)
+    models = {}
+    extra_values = {}
+    for content_type_id in {row[3] for row in rows}:
+        model = models[content_type_id] = content_types.get_for_id(content_type_id).model_class()
+        fields = model_fields.get(model) if model is not None else None
+        if fields:
+            field_objs = [model._meta.get_field(field) for field in fields]
+            for row in model._base_manager.using(using).values_list('pk', *fields).iterator():
+                extra_values[row[0]] = {
+                    field.name: _to_json_value(field, value) for field, value in zip(field_objs, row[1:])}
+
+    page_field_objs = [Page._meta.get_field(field) for field in page_fields]
+    nodes = {}
+    keys_by_path = {}
+    for row in rows:
+        page_id, path, key, content_type_id = row[:4]
+        key = str(key)
+        model = models[content_type_id]
+        values = {field.name: _to_json_value(field, value) for field, value in zip(page_field_objs, row[4:])}
+        values.update(extra_values.get(page_id, {}))
+        parent_key = keys_by_path.get(path[:-Page.steplen])
+        keys_by_path[path] = key
+        nodes[key] = TreeNode(key, parent_key, (model or Page)._meta.label, values)
+        if parent_key is not None:
+            nodes[parent_key].children.append(key)
+
+    # children come after parents in path order, so hash subtrees in reverse
+    for key in reversed(list(keys_by_path.values())):
+        node = nodes[key]
+        digest = hashlib.sha1(node.own_hash.encode('ascii'))
+        # children are in path order, so that sibling order changes are detected
+        for child_key in node.children:
+            digest.update(nodes[child_key].subtree_hash.encode('ascii'))
+        node.subtree_hash = digest.hexdigest()
+
+    return nodes
+
+
+def _get_survivors(target, key, source):
+    """
+    Returns keys of topmost pages in the subtree of `key` in `target`
+    which still exist in `source` (moved elsewhere).
+    """
+    survivors = []
+    stack = list(target[key].children)
+    while stack:
+        child_key = stack.pop()
+        if child_key in source:
+            survivors.append(child_key)
+        else:
+            stack.extend(target[child_key].children)
+    return survivors
+
+
+def _get_kept_in_place(keys, positions):
+    """
+    Returns the largest set of `keys` (children in source order) whose current
+    `positions` (a dict mapping keys to indexes among siblings) are already in that order,
+    i.e. their longest increasing subsequence. Keys without positions are never kept.
+    """
+    # smallest last position (and index of its key) of increasing subsequences of each length
+    tail_positions = []
+    tail_indexes = []
+    previous = [None] * len(keys)
+    for i, key in enumerate(keys):
+        position = positions.get(key)
+        if position is None:
+            continue
+        length = bisect.bisect_left(tail_positions, position)
+        if length:
+            previous[i] = tail_indexes[length - 1]
+        if length == len(tail_positions):
+            tail_positions.append(position)
+            tail_indexes.append(i)
+        else:
+            tail_positions[length] = position
+            tail_indexes[length] = i
+
+    kept = set()
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        kept.add(keys[i])
+        i = previous[i]
+    return kept
+
+
+def _get_moves(node, target):
+    """
+    Returns move records putting children of `node` in source order. Children which
+    are already in order are left in place, others are moved right after their previous
+    sibling (or first), so records have to be applied in the order they're returned.
+    """
+    target_node = target.get(node.key)
+    current = list(target_node.children) if target_node is not None else []
+    # created pages are added as last children in source order
+    current.extend(key for key in node.children if key not in target)
+    kept = _get_kept_in_place(node.children, {key: i for i, key in enumerate(current)})
+
+    moves = []
+    previous_key = None
+    for key in node.children:
+        if key not in kept:
+            moves.append({'type': 'move', 'key': key, 'parent': node.key, 'after': previous_key})
+        previous_key = key
+    return moves
+
+
+def _get_page_data(page):
+    """
+    Returns serializable data of `page` (specific) for creating it in another database.
+    """
+    data = page.serializable_data()
+    non_synced = set(_NON_SYNCED_FIELDS)
+    non_synced.update(build_localized_fieldname('url_path', lang_code)
+                      for lang_code in mt_settings.AVAILABLE_LANGUAGES)
+    # pointers to parent tables of multi-table inherited models
+    non_synced.update(field.name for field in type(page)._meta.parents.values() if field)
+    data = {name: value for name, value in data.items() if name not in non_synced}
+    data['pk'] = None
+    data.pop(COMMENTS_RELATION_NAME, None)
+    for relation in get_all_child_relations(type(page)):
+        for child_data in data.get(relation.get_accessor_name(), []):
+            child_data['pk'] = None
+    return data
+
+
+def diff_trees(source, target, using=None):
+    """
+    Yields diff records turning `target` tree state into `source` tree state
+    (see `get_tree_state`). Pages are matched by key, subtrees with equal hashes
+    are skipped without comparing their pages. Content of pages to be created
+    is read from `using` database (of `source` tree).
+
+    Records are ordered so that they can be applied in one pass:
+    deletes (pages still in `source` are moved out first), updates, creates (parents first)
+    and moves, so that freed slugs can be taken and pages are moved with their updated slugs.
+    Moved pages are put at their source position among siblings.
+    """
+    yield {'type': 'header', 'version': DIFF_VERSION, 'key': get_sync_key_field()}
+
+    deletes, updates, creates, moves = [], [], [], []
+    stack = sorted((node.key for node in source.values() if node.parent_key is None), reverse=True)
+    while stack:
+        node = source[stack.pop()]
+        target_node = target.get(node.key)
+        if target_node is None:
+            creates.append({'type': 'create', 'key': node.key, 'parent': node.parent_key, 'model': node.model})
+            # children may be moved in from other parents
+            moves.extend(_get_moves(node, target))
+            stack.extend(reversed(node.children))
+            continue
+        if node.subtree_hash == target_node.subtree_hash:
+            continue
+
+        if node.own_hash != target_node.own_hash:
+            changed = {
+                field: value for field, value in node.values.items()
+                if field not in target_node.values or target_node.values[field] != value
+            }
+            if changed:
+                updates.append({'type': 'update', 'key': node.key, 'model': node.model, 'fields': changed})
+
+        for child_key in target_node.children:
+            if child_key not in source:
+                deletes.append({'type': 'delete', 'key': child_key,
+                                'keep': _get_survivors(target, child_key, source)})
+        # children moved in from other parents or among siblings
+        moves.extend(_get_moves(node, target))
+        stack.extend(reversed(node.children))
+
+    # content of created pages is read in batches, one query per page model
+    # (PageQuerySet.specific() reads specific pages from default database)
+    key_field = get_sync_key_field()
+    for start in range(0, len(creates), 100):
+        batch = creates[start:start + 100]
+        keys_by_model = {}
+        for record in batch:
+            keys_by_model.setdefault(_get_model(record['model']), []).append(record['key'])
+        pages = {}
+        for model, keys in keys_by_model.items():
+            for page in model._base_manager.using(using).filter(**{key_field + '__in': keys}):
+                pages[str(getattr(page, key_field))] = page
+        for record in batch:
+            record['data'] = _get_page_data(pages[record['key']])
+
+    for records in (deletes, updates, creates, moves):
+        for record in records:
+            yield record
+
+
+def write_diff(records, f):
+    """
+    Writes diff `records` to file `f` as JSON lines. Returns number of change records.
+    """
+    count = 0
+    for record in records:
+        f.write(json.dumps(record))
+        f.write('\n')
+        if record['type'] != 'header':
+            count += 1
+    return count
+
+
+def _read_diff(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _get_model(label):
+    try:
+        model = apps.get_model(label)
+    except (LookupError, ValueError, TypeError):
+        model = None
+    if model is None or not issubclass(model, Page):
+        raise ValueError('Unknown page model: {}'.format(label))
+    return model
+
+
+def _get_pages(keys):
+    key_field = get_sync_key_field()
+    return {
+        str(getattr(page, key_field)): page
+        for page in Page._base_manager.filter(**{key_field + '__in': list(keys)})
+    }
+
+
+def _get_page(key):
+    return _get_pages([key]).get(key)
+
+
+def _apply_updates(records, slug_fields):
+    pages = _get_pages(record['key'] for record in records)
+    renamed = []
+    objs_by_fields = {}
+    for record in records:
+        page = pages.get(record['key'])
+        if page is None:
+            logger.warning('Sync: page %s not found, update skipped', record['key'])
+            continue
+        model = _get_model(record['model'])
+        if page.content_type_id != ContentType.objects.get_for_model(model).id:
+            logger.warning('Sync: page %s is not a %s, update skipped', record['key'], record['model'])
+            continue
+        fields = tuple(sorted(record['fields']))
+        obj = model(pk=page.id)
+        for field, value in record['fields'].items():
+            setattr(obj, field, model._meta.get_field(field).to_python(value))
+        objs_by_fields.setdefault((model, fields), []).append(obj)
+        if any(field in slug_fields for field in fields):
+            renamed.append(page)
+
+    for (model, fields), objs in objs_by_fields.items():
+        model._base_manager.bulk_update(objs, fields)
+    delete_render_cache([page.id for page in pages.values()])
+
+    # ancestors first, so that descendants get their final url paths
+    for page in sorted(renamed, key=lambda p: p.path):
+        page = Page._base_manager.get(id=page.id)
+        old_page = copy.copy(page)
+        page.set_url_path(page.get_parent())
+        Page._base_manager.filter(id=page.id).update(**{
+            build_localized_fieldname('url_path', lang_code): getattr(
+                page, build_localized_fieldname('url_path', lang_code))
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES
+        })
+        page._update_descendant_lang_url_paths(old_page)
+
+    return sum(len(objs) for objs in objs_by_fields.values())
+
+
+def _apply_create(record):
+    parent = _get_page(record['parent'])
+    if parent is None:
+        logger.warning('Sync: parent of page %s not found, create skipped', record['key'])
+        return 0
+    page = _get_model(record['model']).from_serializable_data(record['data'])
+    if hasattr(parent, 'locale_id'):
+        page.locale_id = parent.locale_id
+    try:
+        # slugs and url paths are checked and set by patched Page.save
+        parent.add_child(instance=page)
+    except ValidationError as e:
+        logger.warning('Sync: page %s not created: %s', record['key'], e)
+        return 0
+    return 1
+
+
+def _apply_delete(record):
+    page = _get_page(record['key'])
+    if page is None:
+        logger.warning('Sync: page %s not found, delete skipped', record['key'])
+        return 0
+    if record['keep']:
+        # pages moved out of the deleted subtree are moved to their new parents later
+        parent = page.get_parent()
+        for survivor in _get_pages(record['keep']).values():
+            survivor.move(parent, pos='last-child')
+        page = Page._base_manager.get(id=page.id)
+    page.delete()
+    return 1
+
+
+def _apply_move(record):
+    pages = _get_pages(key for key in (record['key'], record['parent'], record['after']) if key)
+    page = pages.get(record['key'])
+    parent = pages.get(record['parent'])
+    if page is None or parent is None:
+        logger.warning('Sync: page %s or its parent not found, move skipped', record['key'])
+        return 0
+
+    if record['after'] is None:
+        target, pos = parent, 'first-child'
+    else:
+        previous = pages.get(record['after'])
+        if previous is None or previous.path[:-Page.steplen] != parent.path:
+            logger.warning('Sync: previous sibling of page %s not found, page moved last', record['key'])
+            target, pos = parent, 'last-child'
+        else:
+            target, pos = previous, 'right'
+    # patched Page.move recomputes url paths of the moved subtree
+    page.move(target, pos=pos)
+    return 1
+
+
+def apply_diff(f, batch_size=500):
+    """
+    Applies diff read from file `f` to the default database, one transaction per batch.
+    Pages are matched by the key field named in the diff header.
+    Returns a dict of numbers of applied records by type.
+    """
+    records = _read_diff(f)
+    header = next(records, None)
+    if header is None or header.get('type') != 'header' or header.get('version') != DIFF_VERSION:
+        raise ValueError('Not a translation tree diff')
+    if header['key'] != get_sync_key_field():
+        raise ValueError('Diff pages are matched by {}, this database uses {}'.format(
+            header['key'], get_sync_key_field()))
+
+    slug_fields = {build_localized_fieldname('slug', lang_code)
+                   for lang_code in mt_settings.AVAILABLE_LANGUAGES}
+    counts = {'update': 0, 'move': 0, 'create': 0, 'delete': 0}
+    apply_record = {'create': _apply_create, 'delete': _apply_delete, 'move': _apply_move}
+
+    def flush(batch):
+        with transaction.atomic():
+            updates = []
+            for record in batch + [None]:
+                # consecutive updates are applied together, records keep their order
+                if record is not None and record['type'] == 'update':
+                    updates.append(record)
+                    continue
+                if updates:
+                    counts['update'] += _apply_updates(updates, slug_fields)
+                    updates = []
+                if record is not None:
+                    counts[record['type']] += apply_record[record['type']](record)
+            transaction.on_commit(delete_root_path_cache)
+            transaction.on_commit(delete_menu_cache)
+            transaction.on_commit(delete_lang_urls_cache)
+            schedule_route_table_compile()
+
+    batch = []
+    for record in records:
+        if record['type'] == 'update':
+            unknown = set(record['fields']) - set(get_sync_fields(_get_model(record['model'])))
+            if unknown:
+                raise ValueError('Fields missing in this database: {}'.format(', '.join(sorted(unknown))))
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    return counts
@@ -5,6 +5,9 @@ from django.utils.translation import get_language_from_path, override
 from django.utils.translation.trans_real import language_code_prefix_re
 from wagtail.core.models import PAGE_TEMPLATE_VAR, AbstractPage
 
+from ..menu import get_menu_tree as _get_menu_tree
+from ..switcher import get_lang_url as _get_lang_url
+
 register = template.Library()
 
 
@@ -16,26 +19,9 @@ def change_lang(context, lang_code):
         if PAGE_TEMPLATE_VAR in context and isinstance(context[PAGE_TEMPLATE_VAR], AbstractPage):
             # current request points to a Wagtail page
             page = context[PAGE_TEMPLATE_VAR]
-
-            with override(lang_code):
-                trans_url_path = page.url_path
-                # find position of first non-translated page in path (if any)
-                non_trans_page = trans_url_path.find('//')
-                if non_trans_page > 0:
-                    # non-translated page found in path
-                    root_page = request.site.root_page.specific
-                    # get part of path from root path to first non-translated page
-                    trans_url_path = trans_url_path[len(root_page.url_path):non_trans_page]
-                    path_components = [comp for comp in trans_url_path.split('/') if comp]
-                    # try to get that page
-                    try:
-                        page, args, kwargs = root_page.route(request, path_components)
-                    except:
-                        return ''
-                elif non_trans_page == 0:
-                    # root page not translated!
-                    return ''
-                return page.url
+            # falls back to the nearest translated ancestor
+            # when page is not translated to given language
+            return _get_lang_url(page, lang_code, request) or ''
         elif 'object' in context:
             # for cases when DetailView or similar is used
             obj = context['object']
@@ -52,3 +38,15 @@ def change_lang(context, lang_code):
             return language_code_prefix_re.sub('/{}/'.format(lang_code), request.path_info)
 
     return ''
+
+
+@register.simple_tag(takes_context=True)
+def get_menu_tree(context, lang_code=None):
+    """
+    Usage: {% get_menu_tree as menu_items %}
+    """
+    if 'request' in context:
+        site = getattr(context['request'], 'site', None)
+        if site is not None:
+            return _get_menu_tree(site, lang_code)
+    return []
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailtranslation', '0001_initial'),
+    ]
+
+    # translated fields depend on configured languages, like in 9999_wagtail_translation
+    operations = [
+        migrations.CreateModel(
+            name='TestPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(
+                    auto_created=True, on_delete=models.CASCADE, parent_link=True,
+                    primary_key=True, serialize=False, to='wagtailcore.Page')),
+                ('body', models.TextField(blank=True)),
+            ] + [
+                (build_localized_fieldname('body', lang_code), models.TextField(blank=True, null=True))
+                for lang_code in mt_settings.AVAILABLE_LANGUAGES
+            ],
+            options={'abstract': False},
+            bases=('wagtailcore.page',),
+        ),
+    ]
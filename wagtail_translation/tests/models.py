@@ -0,0 +1,6 @@
+from django.db import models
+from wagtail.core.models import Page
+
+
+class TestPage(Page):
+    body = models.TextField(blank=True)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from modeltranslation import settings as mt_settings
+from wagtail.core.models import Page
+
+from wagtail_translation.api import serialize_pages
+
+from .utils import add_page, get_home
+
+URL = '/api/pages/'
+
+
+class TranslatedPagesViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = get_home()
+        self.section = add_page(self.home, 'section', body='section body')
+        self.pages = [add_page(self.section, 'page-{}'.format(i)) for i in range(3)]
+        self.other = add_page(self.home, 'other')
+        add_page(self.section, 'draft', live=False)
+        self.lang_code = mt_settings.DEFAULT_LANGUAGE
+
+    def get(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def get_ids(self, **params):
+        return [item['id'] for item in self.get(**params)['items']]
+
+    def assertError(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 400)
+        return response.json()['message']
+
+    def test_fields_and_languages(self):
+        data = self.get(child_of=self.home.id, langs=self.lang_code, fields='title')
+        self.assertEqual(data['items'][0], {
+            'id': self.section.id,
+            'type': 'tests.TestPage',
+            'title': {self.lang_code: 'section-{}'.format(self.lang_code)},
+            'url': {self.lang_code: '/{0}/section-{0}/'.format(self.lang_code)},
+        })
+
+    def test_type_gives_access_to_model_fields(self):
+        self.assertIn('body', self.assertError(fields='body'))
+        data = self.get(type='tests.TestPage', fields='body', child_of=self.home.id)
+        self.assertEqual(data['items'][0]['body'][self.lang_code], 'section body')
+
+    def test_tree_filters(self):
+        self.assertEqual(self.get_ids(child_of=self.home.id), [self.section.id, self.other.id])
+        # drafts are left out
+        self.assertEqual(self.get_ids(descendant_of=self.section.id), [page.id for page in self.pages])
+
+    def test_pagination(self):
+        ids = []
+        for offset in range(0, 6, 2):
+            data = self.get(descendant_of=self.home.id, limit=2, offset=offset)
+            self.assertEqual(data['meta']['total_count'], 5)
+            ids += [item['id'] for item in data['items']]
+        # ordered by tree path, without repeated or skipped pages
+        self.assertEqual(ids, list(
+            Page.objects.live().descendant_of(self.home).order_by('path').values_list('id', flat=True)))
+
+    def test_errors(self):
+        for params in ({'offset': -1}, {'limit': -1}, {'limit': 'all'}, {'langs': 'xx'},
+                       {'fields': 'url_path'}, {'type': 'tests.Missing'}, {'type': 'auth.User'},
+                       {'child_of': 0}, {'descendant_of': 'home'}):
+            self.assertError(**params)
+
+    def test_queries_dont_depend_on_page_count(self):
+        # site root paths are cached on first use
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.get(descendant_of=self.section.id, limit=1)
+        with self.assertNumQueries(len(queries)):
+            self.get(descendant_of=self.section.id)
+
+    def test_listing_is_fetched_with_one_query(self):
+        serialize_pages(Page.objects.all())
+        with self.assertNumQueries(1):
+            items = serialize_pages(Page.objects.live().descendant_of(self.home).order_by('path'))
+        self.assertEqual(len(items), 5)
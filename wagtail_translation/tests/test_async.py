@@ -0,0 +1,109 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, tag
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from wagtail_translation import async_utils, switcher
+from wagtail_translation.async_utils import achange_lang, aget_lang_urls, aget_site_root_paths, aget_urls
+from wagtail_translation.switcher import get_lang_urls
+
+from .utils import add_page, get_home
+
+
+class AsyncHelpersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.page = add_page(self.section, 'page')
+        self.request = RequestFactory().get('/')
+        self.request.site = self.home.get_site()
+        # custom url models are collected once
+        patcher = mock.patch.object(switcher, '_custom_url_models', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def count_hops(self):
+        hops = []
+
+        def counting_sync_to_async(func, *args, **kwargs):
+            hops.append(func)
+            return sync_to_async(func, *args, **kwargs)
+
+        patcher = mock.patch.object(async_utils, 'sync_to_async', counting_sync_to_async)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return hops
+
+    async def test_results_match_sync_versions(self):
+        lang_urls = await sync_to_async(get_lang_urls)(self.page, self.request)
+        self.assertEqual(await aget_lang_urls(self.page, self.request), lang_urls)
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertEqual(await achange_lang(self.page, lang_code, self.request), lang_urls[lang_code])
+            self.assertEqual(await aget_urls([self.section, self.page], self.request, lang_code),
+                             ['/{0}/section-{0}/'.format(lang_code), lang_urls[lang_code]])
+
+    async def test_one_thread_hop_per_call(self):
+        hops = self.count_hops()
+        # cache misses are computed in the same hop
+        await aget_lang_urls(self.page, self.request)
+        await achange_lang(self.page, mt_settings.DEFAULT_LANGUAGE, self.request)
+        await aget_urls([self.home, self.section, self.page], self.request)
+        self.assertEqual(len(hops), 3)
+
+    def test_caches_are_shared(self):
+        get_lang_urls(self.page, self.request)
+        with self.assertNumQueries(0):
+            async_to_sync(aget_lang_urls)(self.page, self.request)
+            async_to_sync(aget_site_root_paths)(mt_settings.DEFAULT_LANGUAGE)
+
+    async def test_rename_invalidates(self):
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        await achange_lang(self.page, lang_code, self.request)
+
+        def rename():
+            setattr(self.section, build_localized_fieldname('slug', lang_code), 'renamed')
+            with self.captureOnCommitCallbacks(execute=True):
+                self.section.save()
+
+        await sync_to_async(rename)()
+        page = await sync_to_async(Page.objects.get)(id=self.page.id)
+        self.assertEqual(await achange_lang(page, lang_code, self.request),
+                         '/{0}/renamed/page-{0}/'.format(lang_code))
+
+    async def test_switcher_view(self):
+        response = await self.async_client.get('/switcher/{}/'.format(self.page.id))
+        self.assertEqual(response.json(), await sync_to_async(get_lang_urls)(self.page))
+
+
+@tag('benchmark')
+class AsyncSwitcherBenchmark(TestCase):
+    requests = 200
+    concurrency = 10
+
+    async def get_many(self, url):
+        start = time.perf_counter()
+        for i in range(self.requests // self.concurrency):
+            responses = await asyncio.gather(*[self.async_client.get(url) for j in range(self.concurrency)])
+        elapsed = time.perf_counter() - start
+        self.assertEqual(responses[0].status_code, 200)
+        return self.requests / elapsed, responses[0].json()
+
+    async def test_switcher(self):
+        home = await sync_to_async(get_home)()
+        page = await sync_to_async(add_page)(await sync_to_async(add_page)(home, 'section'), 'page')
+        # caches are warmed by first requests
+        await self.async_client.get('/switcher/{}/'.format(page.id))
+
+        batched, batched_urls = await self.get_many('/switcher/{}/'.format(page.id))
+        per_link, per_link_urls = await self.get_many('/per-link-switcher/{}/'.format(page.id))
+        self.assertEqual(batched_urls, per_link_urls)
+        print('\nASGI language switcher with {} languages: {:.0f} requests/s with aget_lang_urls, '
+              '{:.0f} requests/s with a thread hop per link'.format(
+                  len(mt_settings.AVAILABLE_LANGUAGES), batched, per_link))
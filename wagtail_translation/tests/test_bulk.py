@@ -0,0 +1,124 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, PageRevision
+from wagtail.core.signals import page_published
+
+from wagtail_translation.bulk import bulk_add_children, bulk_publish, bulk_publish_subtree
+
+from .models import TestPage
+from .utils import add_page, get_home, localized
+
+
+class BulkPublishTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.section = add_page(self.home, 'section', live=False)
+        self.pages = [add_page(self.section, 'page-{}'.format(i), live=False) for i in range(3)]
+
+    def test_publish_subtree(self):
+        published_ids = []
+
+        def receiver(instance, **kwargs):
+            published_ids.append(instance.pk)
+
+        page_published.connect(receiver)
+        self.addCleanup(page_published.disconnect, receiver)
+        published = bulk_publish_subtree(self.section)
+
+        self.assertEqual(len(published), 4)
+        self.assertEqual(sorted(published_ids), sorted(page.pk for page in published))
+        for page in Page.objects.descendant_of(self.section, inclusive=True):
+            self.assertTrue(page.live)
+            self.assertIsNotNone(page.live_revision_id)
+            self.assertEqual(page.specific_class.__name__, 'TestPage')
+
+    def test_latest_revisions_are_published(self):
+        for i, page in enumerate(self.pages):
+            for version in range(3):
+                page.body = 'version {}'.format(version)
+                page.save_revision()
+
+        with CaptureQueriesContext(connection) as queries:
+            bulk_publish(self.pages)
+        # only the latest revision of every page is loaded
+        revision_queries = [q['sql'] for q in queries
+                            if q['sql'].startswith('SELECT') and 'FROM "wagtailcore_pagerevision"' in q['sql']]
+        self.assertEqual(len(revision_queries), 1)
+
+        for page in self.pages:
+            page = Page.objects.get(pk=page.pk).specific
+            self.assertEqual(page.body, 'version 2')
+            self.assertEqual(page.live_revision, page.get_latest_revision())
+            self.assertFalse(page.has_unpublished_changes)
+
+    def test_missing_slugs_are_autogenerated(self):
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        slug_field = build_localized_fieldname('slug', lang_code)
+        title_field = build_localized_fieldname('title', lang_code)
+        # a sibling already uses the slug which would be generated from the title
+        page = add_page(self.section, 'draft', languages=[mt_settings.DEFAULT_LANGUAGE], live=False)
+        setattr(page, title_field, 'page-0-{}'.format(lang_code))
+        page.save_revision()
+
+        bulk_publish([page])
+
+        page = Page.objects.get(pk=page.pk)
+        self.assertTrue(page.live)
+        self.assertEqual(getattr(page, slug_field), 'page-0-{}-2'.format(lang_code))
+        self.assertEqual(
+            getattr(page, build_localized_fieldname('url_path', lang_code)),
+            '/home/section-{0}/page-0-{0}-2/'.format(lang_code))
+        self.assertEqual(PageRevision.objects.filter(page=page).count(), 1)
+
+
+class BulkAddChildrenTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+
+    def get_pages(self):
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        return [
+            TestPage(**localized('title', 'page')),
+            # slugs are autogenerated with suffixes of taken ones
+            TestPage(**localized('title', 'page')),
+            TestPage(**localized('title', 'existing')),
+            # not translated to the last language
+            TestPage(**localized('title', 'draft', languages=[mt_settings.DEFAULT_LANGUAGE])),
+            TestPage(**dict(localized('title', 'explicit'), **{
+                build_localized_fieldname('slug', lang_code): 'custom'})),
+        ]
+
+    def get_tree(self, parent):
+        """
+        Returns tree fields, slugs and url paths of `parent` children
+        relative to `parent`, so that trees under different parents can be compared.
+        """
+        tree = []
+        for page in Page.objects.child_of(parent).order_by('path'):
+            row = [page.path[len(parent.path):], page.depth - parent.depth, page.numchild, page.locale_id]
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+                url_path = getattr(page, build_localized_fieldname('url_path', lang_code))
+                parent_url_path = getattr(parent, build_localized_fieldname('url_path', lang_code))
+                row += [getattr(page, build_localized_fieldname('slug', lang_code)),
+                        url_path[len(parent_url_path):]]
+            tree.append(row)
+        return tree
+
+    def test_tree_matches_add_child(self):
+        saved = add_page(self.home, 'saved')
+        bulk = add_page(self.home, 'bulk')
+        for parent in (saved, bulk):
+            add_page(parent, 'existing')
+
+        for page in self.get_pages():
+            saved.add_child(instance=page)
+        pages = bulk_add_children(bulk, self.get_pages(), batch_size=2)
+
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(self.get_tree(bulk), self.get_tree(saved))
+        self.assertEqual(Page.objects.get(id=bulk.id).numchild, Page.objects.get(id=saved.id).numchild)
+        self.assertEqual(bulk.numchild, 6)
+        self.assertEqual(TestPage.objects.child_of(bulk).count(), 6)
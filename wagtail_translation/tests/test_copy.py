@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+
+from wagtail_translation.forms import CopyForm
+from wagtail_translation.utils import copy_preflight
+
+from .utils import add_page, get_home
+
+
+class CopyPreflightTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.page = add_page(self.home, 'page')
+        add_page(self.page, 'live-child')
+        add_page(self.page, 'draft-child', live=False)
+        self.other = add_page(self.home, 'other')
+
+    def test_counts(self):
+        with self.assertNumQueries(1):
+            preflight = copy_preflight(self.page)
+        self.assertEqual(preflight['subpage_count'], 2)
+        self.assertEqual(preflight['live_count'], 2)
+        self.assertEqual(preflight['conflicts'], {})
+
+    def test_preview_without_conflicts(self):
+        with self.assertNumQueries(1):
+            preflight = copy_preflight(self.page, self.other)
+        self.assertEqual(preflight['subpage_count'], 2)
+        self.assertEqual(preflight['conflicts'], {})
+        self.assertEqual(preflight['autogenerated_slugs'], {})
+        self.assertEqual(preflight['slugs'], {
+            lang_code: 'page-{}'.format(lang_code) for lang_code in mt_settings.AVAILABLE_LANGUAGES})
+        self.assertEqual(preflight['url_paths'], {
+            lang_code: '/home/other-{0}/page-{0}/'.format(lang_code)
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES})
+
+    def test_preview_of_conflicts(self):
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        # next suffixed slug is taken in default language only
+        add_page(self.home, 'taken', **{
+            build_localized_fieldname('slug', lang_code): 'page-{}-2'.format(lang_code)})
+
+        # suffixed slugs are loaded when some slug is taken
+        with self.assertNumQueries(2):
+            preflight = copy_preflight(self.page, self.home)
+        slugs = {code: 'page-{}'.format(code) for code in mt_settings.AVAILABLE_LANGUAGES}
+        self.assertEqual(preflight['conflicts'], slugs)
+        autogenerated_slugs = {code: '{}-2'.format(slug) for code, slug in slugs.items()}
+        autogenerated_slugs[lang_code] = 'page-{}-3'.format(lang_code)
+        self.assertEqual(preflight['autogenerated_slugs'], autogenerated_slugs)
+        self.assertEqual(preflight['slugs'], autogenerated_slugs)
+        self.assertEqual(preflight['url_paths'], {
+            code: '/home/{}/'.format(slug) for code, slug in autogenerated_slugs.items()})
+
+    def test_given_slugs(self):
+        slugs = {code: None for code in mt_settings.AVAILABLE_LANGUAGES}
+        slugs[mt_settings.DEFAULT_LANGUAGE] = 'new'
+        preflight = copy_preflight(self.page, self.home, slugs)
+        self.assertEqual(preflight['conflicts'], {})
+        # languages without slugs are left out
+        self.assertEqual(preflight['slugs'], {mt_settings.DEFAULT_LANGUAGE: 'new'})
+        self.assertEqual(preflight['url_paths'], {mt_settings.DEFAULT_LANGUAGE: '/home/new/'})
+
+
+class CopyFormTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.page = add_page(self.home, 'page')
+        add_page(self.page, 'child')
+        self.other = add_page(self.home, 'other')
+        self.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def get_form(self, parent, **slugs):
+        data = {'new_parent_page': parent.id, 'copy_subpages': True}
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            data[build_localized_fieldname('new_title', lang_code)] = 'Copy'
+            data[build_localized_fieldname('new_slug', lang_code)] = slugs.get(lang_code, 'page-' + lang_code)
+        return CopyForm(data, page=self.page, user=self.user, can_publish=True)
+
+    def test_preflight_query(self):
+        # parent and a single aggregate query
+        with self.assertNumQueries(2):
+            form = CopyForm(page=self.page, user=self.user, can_publish=True)
+        self.assertEqual(form.preflight['subpage_count'], 1)
+        self.assertIn('copy_subpages', form.fields)
+
+    def test_conflicts_at_source_parent_are_reused(self):
+        form = self.get_form(self.home)
+        with self.assertNumQueries(1):
+            # new parent page only, slugs are checked by preflight already
+            self.assertFalse(form.is_valid())
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertIn('"page-{}-2" is available'.format(lang_code),
+                          form.errors[build_localized_fieldname('new_slug', lang_code)][0])
+
+    def test_other_parent(self):
+        form = self.get_form(self.other)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.preflight['url_paths'], {
+            lang_code: '/home/other-{0}/page-{0}/'.format(lang_code)
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES})
+
+    def test_changed_slugs(self):
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        form = self.get_form(self.home, **{lang_code: 'copy'})
+        self.assertFalse(form.is_valid())
+        self.assertNotIn(build_localized_fieldname('new_slug', lang_code), form.errors)
+        self.assertEqual(form.preflight['slugs'][lang_code], 'copy')
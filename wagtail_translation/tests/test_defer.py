@@ -0,0 +1,83 @@
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import override
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+class DeferTranslationsTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.page = add_page(self.home, 'page', body_lt='body')
+
+    def _count_save_queries(self, page):
+        page.title_lt = 'changed'
+        with CaptureQueriesContext(connection) as queries:
+            page.save()
+        return len(queries)
+
+    def test_specific_keeps_deferred_fields(self):
+        with override('lt'):
+            page = Page.objects.filter(id=self.page.id).defer_translations().specific().get()
+        self.assertIsInstance(page, TestPage)
+        deferred = page.get_deferred_fields()
+        self.assertNotIn('title_lt', deferred)
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            if lang_code != 'lt':
+                self.assertIn(build_localized_fieldname('body', lang_code), deferred)
+
+    def test_save_loads_deferred_fields_at_once(self):
+        with override('lt'):
+            full_count = self._count_save_queries(TestPage.objects.get(id=self.page.id))
+            deferred_page = TestPage.objects.filter(id=self.page.id).defer_translations().get()
+            deferred_count = self._count_save_queries(deferred_page)
+        self.assertEqual(deferred_count, full_count + 1)
+        self.assertFalse(deferred_page.get_deferred_fields())
+
+    def test_save_keeps_other_languages(self):
+        with override('lt'):
+            page = TestPage.objects.filter(id=self.page.id).defer_translations().get()
+            page.slug_lt = 'new-slug'
+            page.save()
+        page = TestPage.objects.get(id=self.page.id)
+        self.assertEqual(page.url_path_lt, '/home/new-slug/')
+        self.assertEqual(page.slug_en, 'page-en')
+        self.assertEqual(page.url_path_en, '/home/page-en/')
+
+
+@tag('benchmark')
+class DeferTranslationsBenchmark(TestCase):
+    pages = 300
+
+    def setUp(self):
+        home = get_home()
+        for i in range(self.pages):
+            add_page(home, 'page-{}'.format(i), body_lt='body ' * 50)
+
+    def _measure(self, qs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        pages = list(qs.specific())
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(len(pages), self.pages)
+        return elapsed, peak
+
+    def test_listing(self):
+        with override('lt'):
+            qs = Page.objects.filter(depth=3).order_by('path')
+            full_time, full_memory = self._measure(qs)
+            deferred_time, deferred_memory = self._measure(qs.defer_translations())
+        print('\n{} languages, {} pages: all fields {:.1f} ms / {} KiB, deferred {:.1f} ms / {} KiB'.format(
+            len(mt_settings.AVAILABLE_LANGUAGES), self.pages,
+            full_time * 1000, full_memory // 1024, deferred_time * 1000, deferred_memory // 1024))
+        self.assertLessEqual(deferred_memory, full_memory)
@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from wagtail.core.models import Page
+
+from wagtail_translation import indexes
+from wagtail_translation.indexes import (
+    _get_index_name, _get_unique_slug_index_name, create_lang_indexes, get_lang_indexes)
+
+from .utils import add_page, get_home
+
+
+class IndexNameTest(TestCase):
+    def test_short_names_are_kept(self):
+        self.assertEqual(_get_index_name('slug_en'), 'wtt_slug_en_idx')
+        self.assertEqual(_get_unique_slug_index_name('slug_en'), 'wtt_uniq_slug_en')
+
+    def test_long_names_are_unique(self):
+        names = [
+            _get_index_name('url_path_zh_hant_routable'),
+            _get_index_name('url_path_zh_hans_routable'),
+            _get_unique_slug_index_name('slug_zh_hant_extra'),
+            _get_unique_slug_index_name('slug_zh_hans_extra'),
+        ]
+        self.assertEqual(len(set(names)), len(names))
+        for name in names:
+            self.assertLessEqual(len(name), 30)
+
+
+class IndexVendorsTest(TestCase):
+    def test_url_path_index_vendors(self):
+        for vendor in ('postgresql', 'sqlite'):
+            self.assertEqual([index.name for index in get_lang_indexes('en', vendor)],
+                             ['wtt_slug_en_idx', 'wtt_url_path_en_idx'])
+        # url_path is a text column
+        for vendor in ('mysql', 'microsoft'):
+            self.assertEqual([index.name for index in get_lang_indexes('en', vendor)], ['wtt_slug_en_idx'])
+
+    def test_text_columns_are_not_indexed_on_mysql(self):
+        schema_editor = connection.schema_editor(collect_sql=True)
+        with mock.patch.object(indexes, '_get_existing_index_names', return_value=set()), \
+                mock.patch.object(connection, 'vendor', 'mysql'):
+            created = create_lang_indexes(schema_editor, Page, ['en'])
+        self.assertEqual(created, ['wtt_slug_en_idx'])
+        self.assertEqual(len(schema_editor.collected_sql), 1)
+
+
+class IndexUsageTest(TestCase):
+    """
+    Checks with EXPLAIN that lookups on translation fields use per-language indexes.
+    """
+    def setUp(self):
+        self.home = get_home()
+        for i in range(20):
+            add_page(self.home, 'page-{}'.format(i))
+
+    def _get_plan(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # tables are too small for the planner to prefer indexes on its own
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+                return ' '.join(row[0] for row in cursor.fetchall())
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                return ' '.join(row[-1] for row in cursor.fetchall())
+        self.skipTest('EXPLAIN output of {} is not checked'.format(connection.vendor))
+
+    def test_sibling_slug_lookup(self):
+        qs = self.home.get_children().filter(slug_en='page-1-en').values('id')
+        self.assertIn('wtt_slug_en_idx', self._get_plan(qs))
+
+    def test_url_path_lookup(self):
+        qs = Page.objects.filter(url_path_en='/home/page-1-en/').values('id')
+        self.assertIn('wtt_url_path_en_idx', self._get_plan(qs))
+
+    def test_url_path_prefix_lookup(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('LIKE prefix lookups use indexes only with pattern operator classes')
+        qs = Page.objects.filter(url_path_en__startswith='/home/page-1').values('id')
+        self.assertIn('wtt_url_path_en_idx', self._get_plan(qs))
+
+    def test_routable_lookup(self):
+        qs = Page.objects.all().translated('en').descendant_of(self.home).values('id')
+        self.assertIn('wtt_url_path_en_routable_idx', self._get_plan(qs))
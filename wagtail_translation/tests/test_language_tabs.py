@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.admin.edit_handlers import FieldPanel, ObjectList, TabbedInterface
+from wagtail.tests.utils.form_data import inline_formset, nested_form_data
+
+from wagtail_translation.edit_handlers import LOADED_LANGUAGE_FIELD_FMT, language_tabs
+from wagtail_translation.utils import obj_per_lang
+from wagtail_translation.views import language_panel
+
+from .models import TestPage
+from .utils import add_page, get_home, localized
+
+
+class LanguageTabsTest(TestCase):
+    def setUp(self):
+        edit_handler = TabbedInterface(
+            [ObjectList(obj_per_lang(FieldPanel, 'title') + obj_per_lang(FieldPanel, 'slug'), heading='Content')] +
+            language_tabs(['body']),
+            base_form_class=TestPage.base_form_class)
+        patcher = mock.patch.object(TestPage, 'edit_handler', edit_handler, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        TestPage.get_edit_handler.cache_clear()
+        self.addCleanup(TestPage.get_edit_handler.cache_clear)
+
+        self.home = get_home()
+        self.page = add_page(self.home, 'page', **localized('body', 'body'))
+        self.lang_code = mt_settings.DEFAULT_LANGUAGE
+        self.other_lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        self.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+
+    def get_form(self, data):
+        form_class = TestPage.get_edit_handler().get_form_class()
+        data = dict(data, comments=inline_formset([]))
+        return form_class(nested_form_data(data), instance=self.page, parent_page=self.home)
+
+    def test_partial_post_keeps_fields_outside_language_tabs(self):
+        data = {LOADED_LANGUAGE_FIELD_FMT.format(self.lang_code): '1'}
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            data[build_localized_fieldname('title', lang_code)] = 'Changed'
+            data[build_localized_fieldname('slug', lang_code)] = 'page-{}'.format(lang_code)
+            data[build_localized_fieldname('body', lang_code)] = 'changed'
+        form = self.get_form(data)
+
+        # only fields of the tab which wasn't loaded are left out
+        other_body = build_localized_fieldname('body', self.other_lang_code)
+        self.assertNotIn(other_body, form.fields)
+        self.assertIn(build_localized_fieldname('title', self.other_lang_code), form.fields)
+        self.assertTrue(form.is_valid(), form.errors)
+        page = form.save()
+
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertEqual(getattr(page, build_localized_fieldname('title', lang_code)), 'Changed')
+        self.assertEqual(getattr(page, build_localized_fieldname('body', self.lang_code)), 'changed')
+        self.assertEqual(getattr(TestPage.objects.get(id=self.page.id), other_body),
+                         'body-{}'.format(self.other_lang_code))
+
+    def test_post_without_language_tabs_binds_everything(self):
+        form = self.get_form({})
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertIn(build_localized_fieldname('body', lang_code), form.fields)
+
+    def test_edit_view_renders_active_language_only(self):
+        with self.settings(LANGUAGE_CODE=self.lang_code):
+            response = self.client.get(reverse('wagtailadmin_pages:edit', args=(self.page.id,)),
+                                       HTTP_ACCEPT_LANGUAGE=self.lang_code)
+        self.assertContains(response, 'name="{}"'.format(LOADED_LANGUAGE_FIELD_FMT.format(self.lang_code)))
+        self.assertNotContains(response, 'name="{}"'.format(build_localized_fieldname('body', self.other_lang_code)))
+        self.assertContains(response, reverse(
+            'wagtail_translation_language_panel', args=(self.other_lang_code,)))
+
+    def test_language_panel_of_page(self):
+        url = reverse('wagtail_translation_language_panel', args=(self.other_lang_code,))
+        response = self.client.get(url, {'page': self.page.id})
+        self.assertContains(response, 'name="{}"'.format(LOADED_LANGUAGE_FIELD_FMT.format(self.other_lang_code)))
+        self.assertContains(response, 'name="{}"'.format(build_localized_fieldname('body', self.other_lang_code)))
+        self.assertNotContains(response, 'name="{}"'.format(build_localized_fieldname('body', self.lang_code)))
+
+    def test_language_panel_of_new_page(self):
+        url = reverse('wagtail_translation_language_panel', args=(self.other_lang_code,))
+        response = self.client.get(url, {
+            'content_type': ContentType.objects.get_for_model(TestPage).id, 'parent': self.home.id})
+        self.assertContains(response, 'name="{}"'.format(build_localized_fieldname('body', self.other_lang_code)))
+
+    def test_language_panel_errors(self):
+        # called directly, LocaleMiddleware redirects 404 responses of test urls
+        for lang_code, params in (('xx', {'page': self.page.id}), (self.lang_code, {}),
+                                  (self.lang_code, {'page': 'x'}), (self.lang_code, {'page': 0}),
+                                  (self.lang_code, {'content_type': 0, 'parent': self.home.id})):
+            request = RequestFactory().get('/', params)
+            request.user = self.user
+            with self.assertRaises(Http404):
+                language_panel(request, lang_code)
+
+        self.client.logout()
+        response = self.client.get(
+            reverse('wagtail_translation_language_panel', args=(self.lang_code,)), {'page': self.page.id})
+        self.assertEqual(response.status_code, 302)
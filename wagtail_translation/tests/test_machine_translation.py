@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.test import TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from wagtail_translation.machine_translation import DummyTranslationBackend, fill_empty_translations
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+def get_field(page, field_name, lang_code):
+    return getattr(page, build_localized_fieldname(field_name, lang_code))
+
+
+class FillEmptyTranslationsTest(TestCase):
+    def setUp(self):
+        self.source = mt_settings.DEFAULT_LANGUAGE
+        self.target = mt_settings.AVAILABLE_LANGUAGES[-1]
+        # only pages added below are left to be translated
+        Page.objects.filter(depth=1).update(**{build_localized_fieldname('title', self.target): 'Root'})
+        # runs index updates of added pages, so that they are not merged with updates of tests
+        with self.captureOnCommitCallbacks(execute=True):
+            self.home = get_home()
+            # translated already, slug is the one autogenerated from translation of 'new-<source>'
+            self.translated = add_page(self.home, 'translated', **{
+                build_localized_fieldname('title', self.target): 'Translated',
+                build_localized_fieldname('slug', self.target): self.new_slug,
+                build_localized_fieldname('body', self.source): 'source body',
+                build_localized_fieldname('body', self.target): 'target body',
+            })
+            self.new = add_page(self.home, 'new', languages=[self.source], **{
+                build_localized_fieldname('body', self.source): 'body'})
+            self.child = add_page(self.new, 'child', languages=[self.source])
+
+    @property
+    def new_slug(self):
+        return '{}-new-{}'.format(self.target, self.source)
+
+    def fill(self, **kwargs):
+        return fill_empty_translations(
+            source_lang=self.source, target_langs=[self.target], backend=DummyTranslationBackend(), **kwargs)
+
+    def test_empty_fields_are_filled(self):
+        self.assertEqual(self.fill(), {self.target: 3})
+
+        new = TestPage.objects.get(id=self.new.id)
+        self.assertEqual(get_field(new, 'title', self.target), '[{}] new-{}'.format(self.target, self.source))
+        self.assertEqual(get_field(new, 'body', self.target), '[{}] body'.format(self.target))
+        child = Page.objects.get(id=self.child.id)
+        self.assertEqual(get_field(child, 'title', self.target), '[{}] child-{}'.format(self.target, self.source))
+
+    def test_translations_are_not_overwritten(self):
+        self.fill()
+        translated = TestPage.objects.get(id=self.translated.id)
+        self.assertEqual(get_field(translated, 'title', self.target), 'Translated')
+        self.assertEqual(get_field(translated, 'slug', self.target), self.new_slug)
+        self.assertEqual(get_field(translated, 'body', self.target), 'target body')
+
+    def test_slugs_and_url_paths_are_derived(self):
+        self.fill()
+        new = Page.objects.get(id=self.new.id)
+        # slug autogenerated from translated title is used by a sibling
+        slug = '{}-2'.format(self.new_slug)
+        self.assertEqual(get_field(new, 'slug', self.target), slug)
+        self.assertEqual(get_field(new, 'url_path', self.target), '/home/{}/'.format(slug))
+        child = Page.objects.get(id=self.child.id)
+        self.assertEqual(get_field(child, 'url_path', self.target), '/home/{}/{}-child-{}/'.format(
+            slug, self.target, self.source))
+
+    def test_dry_run(self):
+        self.assertEqual(self.fill(dry_run=True), {self.target: 3})
+        self.assertIsNone(get_field(Page.objects.get(id=self.new.id), 'title', self.target))
+
+    @mock.patch('wagtail_translation.search.update_index')
+    def test_pages_with_filled_search_fields_are_indexed(self, update_index):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fill(fields=['body'])
+        # body is not a search field
+        update_index.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fill()
+        update_index.assert_called_once_with({self.new.id, self.child.id})
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site
+
+from wagtail_translation.menu import delete_menu_cache, get_menu_tree
+
+from .utils import add_page, get_home
+
+
+def get_titles(nodes):
+    return [(node['title'], get_titles(node['children'])) for node in nodes]
+
+
+class MenuTreeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.source = mt_settings.DEFAULT_LANGUAGE
+        self.target = mt_settings.AVAILABLE_LANGUAGES[-1]
+        self.site = Site.objects.get(is_default_site=True)
+        self.home = get_home()
+        self.about = add_page(self.home, 'about', show_in_menus=True)
+        self.team = add_page(self.about, 'team', show_in_menus=True)
+        # not translated to target language
+        self.news = add_page(self.home, 'news', languages=[self.source], show_in_menus=True)
+
+    def get_menu_tree(self, lang_code):
+        # site is loaded like in a new request
+        return get_menu_tree(Site.objects.get(id=self.site.id), lang_code)
+
+    def title(self, name, lang_code):
+        return '{}-{}'.format(name, lang_code)
+
+    def test_tree_per_language(self):
+        self.assertEqual(get_titles(self.get_menu_tree(self.source)), [
+            (self.title('about', self.source), [(self.title('team', self.source), [])]),
+            (self.title('news', self.source), []),
+        ])
+        tree = self.get_menu_tree(self.target)
+        self.assertEqual(get_titles(tree), [
+            (self.title('about', self.target), [(self.title('team', self.target), [])]),
+        ])
+        team = tree[0]['children'][0]
+        self.assertEqual(team['id'], self.team.id)
+        self.assertEqual(team['depth'], 2)
+        self.assertTrue(team['url'].endswith('/about-{0}/team-{0}/'.format(self.target)))
+
+    def test_hidden_and_draft_pages_are_left_out(self):
+        add_page(self.home, 'hidden', show_in_menus=False)
+        add_page(self.about, 'draft', show_in_menus=True, live=False)
+        # descendants of pages not in menus are left out too
+        self.team.show_in_menus = False
+        self.team.save()
+        add_page(self.team, 'member', show_in_menus=True)
+
+        self.assertEqual(get_titles(self.get_menu_tree(self.source)), [
+            (self.title('about', self.source), []),
+            (self.title('news', self.source), []),
+        ])
+
+    def test_tree_is_cached_per_language(self):
+        site = Site.objects.get(id=self.site.id)
+        source_tree = get_menu_tree(site, self.source)
+        with self.assertNumQueries(1):
+            target_tree = get_menu_tree(site, self.target)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_menu_tree(site, self.source), source_tree)
+            self.assertEqual(get_menu_tree(site, self.target), target_tree)
+
+    def test_cache_deletion_runs_no_queries(self):
+        self.get_menu_tree(self.source)
+        with self.assertNumQueries(0):
+            delete_menu_cache()
+        # site root page and the tree
+        with self.assertNumQueries(2):
+            get_menu_tree(self.site, self.source)
+
+    def test_cache_is_deleted_on_save(self):
+        self.get_menu_tree(self.source)
+        self.get_menu_tree(self.target)
+        with self.captureOnCommitCallbacks(execute=True):
+            setattr(self.about, build_localized_fieldname('title', self.target), 'About')
+            self.about.save()
+        self.assertEqual(self.get_menu_tree(self.target)[0]['title'], 'About')
+        # other languages are rebuilt too (site, its root page and the tree)
+        with self.assertNumQueries(3):
+            self.get_menu_tree(self.source)
+
+    def test_cache_is_deleted_on_move(self):
+        self.get_menu_tree(self.source)
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(id=self.team.id).move(self.news, pos='last-child')
+        self.assertEqual(get_titles(self.get_menu_tree(self.source)), [
+            (self.title('about', self.source), []),
+            (self.title('news', self.source), [(self.title('team', self.source), [])]),
+        ])
+
+    def test_cache_is_deleted_on_delete(self):
+        self.get_menu_tree(self.source)
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(id=self.about.id).delete()
+        self.assertEqual(get_titles(self.get_menu_tree(self.source)), [
+            (self.title('news', self.source), []),
+        ])
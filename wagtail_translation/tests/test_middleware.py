@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.http import Http404
+from django.test import TestCase, modify_settings
+from modeltranslation import settings as mt_settings
+from wagtail.core.models import Page
+
+from wagtail_translation import middleware
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+@modify_settings(MIDDLEWARE={'append': 'wagtail_translation.middleware.TranslatedPageMiddleware'})
+class TranslatedPageMiddlewareTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.section = add_page(self.home, 'section', body='section body')
+        self.page = add_page(self.section, 'page', body='page body')
+        self.lang_code = mt_settings.DEFAULT_LANGUAGE
+        self.url = '/{0}/section-{0}/page-{0}/'.format(self.lang_code)
+        # custom route models are collected once
+        patcher = mock.patch.object(middleware, '_custom_route_models', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_page_is_resolved(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'page body')
+        self.assertEqual(response.wsgi_request.translated_page, self.page)
+
+    def test_stale_route_table_entry_is_ignored(self):
+        # the route table still points to the section at the page's url path
+        route = (self.section.id, self.section.content_type_id)
+        with mock.patch.object(middleware, 'lookup_route', return_value=route):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'page body')
+        self.assertNotContains(response, 'section body')
+
+    def test_custom_route_of_ancestor_is_used(self):
+        def route(page, request, path_components):
+            if page.id == self.section.id and path_components:
+                raise Http404
+            return Page.route(page, request, path_components)
+
+        with mock.patch.object(TestPage, 'route', route):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(response.wsgi_request.translated_page)
+
+    def test_custom_route_of_page_is_used(self):
+        def route(page, request, path_components):
+            if page.id == self.page.id:
+                return page, ['custom'], {}
+            return Page.route(page, request, path_components)
+
+        def serve(page, request, *args, **kwargs):
+            self.assertEqual(args, ('custom',))
+            return Page.serve(page, request)
+
+        with mock.patch.object(TestPage, 'route', route), mock.patch.object(TestPage, 'serve', serve):
+            self.assertContains(self.client.get(self.url), 'page body')
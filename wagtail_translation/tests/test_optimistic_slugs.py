@@ -0,0 +1,146 @@
+import threading
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from wagtail_translation.checks import check_optimistic_slugs, check_unique_slug_indexes
+from wagtail_translation.indexes import create_unique_slug_indexes, drop_unique_slug_indexes
+
+from .models import TestPage
+from .test_locking import _check_url_paths
+from .utils import add_page, get_home, localized
+
+
+def get_slugs(page, lang_code):
+    slug_field = build_localized_fieldname('slug', lang_code)
+    return sorted(Page.objects.child_of(page).values_list(slug_field, flat=True))
+
+
+@override_settings(WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS=True)
+class OptimisticSlugsTest(TestCase):
+    def setUp(self):
+        # indexes are dropped with the rollback of the test
+        create_unique_slug_indexes(connection.schema_editor(), Page)
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.other = add_page(self.home, 'other')
+        self.page = add_page(self.section, 'page')
+
+    def test_autogenerated_slugs_get_free_suffix(self):
+        for i in range(2):
+            self.section.add_child(instance=TestPage(**localized('title', 'page')))
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertEqual(get_slugs(self.section, lang_code), [
+                'page-{}'.format(lang_code), 'page-{}-2'.format(lang_code), 'page-{}-3'.format(lang_code)])
+
+    def test_explicit_slug_in_use(self):
+        with self.assertRaises(ValidationError):
+            add_page(self.section, 'page')
+        self.assertEqual(Page.objects.child_of(self.section).count(), 1)
+
+    def test_move_to_parent_with_same_slug(self):
+        page = add_page(self.other, 'page')
+        add_page(page, 'child')
+        page.move(self.section, pos='last-child')
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertEqual(get_slugs(self.section, lang_code),
+                             ['page-{}'.format(lang_code), 'page-{}-2'.format(lang_code)])
+        _check_url_paths(self)
+
+
+class OptimisticSlugsChecksTest(TestCase):
+    def get_error_ids(self):
+        errors = check_optimistic_slugs(None) + check_unique_slug_indexes(None, databases=['default'])
+        return [error.id for error in errors]
+
+    def test_disabled(self):
+        self.assertEqual(self.get_error_ids(), [])
+
+    @override_settings(WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS=True)
+    def test_missing_indexes(self):
+        self.assertEqual(self.get_error_ids(), ['wagtail_translation.E002'])
+        create_unique_slug_indexes(connection.schema_editor(), Page)
+        self.assertEqual(self.get_error_ids(), [])
+
+    @override_settings(WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS=True)
+    def test_unsupported_database(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            self.assertEqual(create_unique_slug_indexes(connection.schema_editor(), Page), [])
+            self.assertEqual(self.get_error_ids(), ['wagtail_translation.E001'])
+
+
+@tag('stress')
+@skipUnless(connection.vendor == 'postgresql', 'parallel writers need PostgreSQL')
+@override_settings(WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS=True)
+class ConcurrentOptimisticSlugsTest(TransactionTestCase):
+    """
+    Import workers retitle sibling pages to the same title (slugs are autogenerated)
+    and move pages with the same slugs into their parent in parallel.
+    Every write must succeed and leave unique sibling slugs.
+    """
+    serialized_rollback = True
+    # truncating with cascade, wagtail leaves tables of removed models behind;
+    # content types are kept, as post_migrate would recreate them with other ids
+    # before the serialized ones are restored for the next test case
+    available_apps = [
+        'wagtail_translation', 'wagtail_translation.tests', 'wagtail.core', 'wagtail.search',
+        'wagtail.contrib.redirects', 'wagtail.users', 'django.contrib.auth']
+    workers = 8
+    iterations = 5
+
+    def setUp(self):
+        with connection.schema_editor() as schema_editor:
+            create_unique_slug_indexes(schema_editor, Page)
+        self.addCleanup(self.drop_indexes)
+        home = get_home()
+        self.target = add_page(home, 'target')
+        # sibling pages are imported by their own worker only
+        self.imported = [
+            [add_page(self.target, 'item-{}-{}'.format(i, j)).id for j in range(self.iterations)]
+            for i in range(self.workers)]
+        # one page to move per worker, all with the same slugs
+        self.moved = [add_page(add_page(home, 'folder-{}'.format(i)), 'page').id for i in range(self.workers)]
+
+    def drop_indexes(self):
+        with connection.schema_editor() as schema_editor:
+            drop_unique_slug_indexes(schema_editor, Page)
+
+    def _worker(self, index, errors):
+        try:
+            for page_id in self.imported[index]:
+                with transaction.atomic():
+                    page = TestPage.objects.get(id=page_id)
+                    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+                        setattr(page, build_localized_fieldname('title', lang_code), 'Imported')
+                        setattr(page, build_localized_fieldname('slug', lang_code), '')
+                    page.save()
+            with transaction.atomic():
+                Page.objects.get(id=self.moved[index]).move(
+                    Page.objects.get(id=self.target.id), pos='last-child')
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_imports_and_moves(self):
+        errors = []
+        threads = [
+            threading.Thread(target=self._worker, args=(i, errors)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        imported = self.workers * self.iterations
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            slugs = get_slugs(self.target, lang_code)
+            self.assertEqual(len(set(slugs)), imported + self.workers)
+            self.assertEqual(len([slug for slug in slugs if slug.startswith('imported')]), imported)
+            self.assertEqual(len([slug for slug in slugs if slug.startswith('page-')]), self.workers)
+        _check_url_paths(self)
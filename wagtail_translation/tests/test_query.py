@@ -0,0 +1,36 @@
+from django.db import connection
+from django.test import TestCase
+from wagtail.core.models import Page
+
+from .utils import add_page, get_home
+
+
+class TranslatedFilterTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.both = add_page(self.home, 'both')
+        self.lt_only = add_page(self.home, 'lt-only', languages=['lt'])
+        self.child = add_page(self.lt_only, 'child')
+
+    def test_translated(self):
+        self.assertEqual(
+            set(Page.objects.child_of(self.home).translated('en').specific()), {self.both})
+        self.assertEqual(
+            set(Page.objects.descendant_of(self.home).translated('lt').specific()),
+            {self.both, self.lt_only, self.child})
+
+    def test_untranslated(self):
+        self.assertEqual(
+            set(Page.objects.descendant_of(self.home).untranslated('en').specific()),
+            {self.lt_only, self.child})
+        self.assertFalse(Page.objects.descendant_of(self.home).untranslated('lt').exists())
+
+    def test_uses_routable_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output is SQLite specific')
+        for qs in (Page.objects.all().translated('en'), Page.objects.all().untranslated('en')):
+            sql, params = qs.values('id').query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            self.assertIn('wtt_url_path_en_routable_idx', plan)
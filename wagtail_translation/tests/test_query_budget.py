@@ -0,0 +1,201 @@
+"""
+Query and time budgets of hot paths. Query budgets are the same for any number of languages,
+so the suite fails when a path starts running a query per language. `LanguageScalingTest`
+runs `QueryBudgetTest` with 2, 8 and 32 languages and fails when latency grows faster
+than the number of languages, or at all for paths called once per language.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, modify_settings, tag
+from django.urls import reverse
+from django.utils import translation
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.tests.utils.form_data import inline_formset, nested_form_data
+
+from wagtail_translation.templatetags.wagtail_translation import change_lang
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+# (SQLite, PostgreSQL) budgets, subtree locks take advisory lock queries on PostgreSQL
+QUERY_BUDGETS = {
+    'save': (14, 15),
+    'rename': (14, 16),
+    'move': (21, 23),
+    'copy': (52, 55),
+    'form_clean': (2, 2),
+    'get_url_parts': (0, 0),
+    'change_lang': (0, 0),
+    'publish': (33, 34),
+    'serve': (4, 4),
+}
+
+# seconds per call, paths looping over languages are timed per language
+TIME_BUDGET = 0.2
+TIME_BUDGET_PER_LANGUAGE = 0.01
+
+# paths called once per language (e.g. for every link of a language switcher)
+# are run in rounds over all languages and must take constant time per call
+PER_LANGUAGE_PATHS = {'get_url_parts', 'change_lang'}
+ROUNDS = 10
+# allowed slowdown of constant time calls between fewest and most languages
+CONSTANT_TIME_TOLERANCE = 4
+
+TIMINGS_ENV = 'WAGTAIL_TRANSLATION_TEST_TIMINGS'
+SCALING_LANGUAGES = (2, 8, 32)
+
+
+class QueryBudgetTest(TestCase):
+    timings = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super(QueryBudgetTest, cls).setUpClass()
+        # translation catalogs and url reversing of a language are loaded on first use
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            with translation.override(lang_code):
+                reverse('wagtail_serve', args=('',))
+
+    @classmethod
+    def tearDownClass(cls):
+        super(QueryBudgetTest, cls).tearDownClass()
+        if os.environ.get(TIMINGS_ENV):
+            with open(os.environ[TIMINGS_ENV], 'w') as f:
+                json.dump(cls.timings, f)
+
+    def setUp(self):
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.other = add_page(self.home, 'other')
+        self.page = add_page(self.section, 'page', body='body')
+        add_page(self.section, 'sibling')
+        self.request = RequestFactory().get('/')
+        self.request.site = self.home.get_site()
+
+    @contextmanager
+    def assertBudget(self, path, calls=1):
+        queries = QUERY_BUDGETS[path][connection.vendor == 'postgresql']
+        time_budget = TIME_BUDGET + TIME_BUDGET_PER_LANGUAGE * len(mt_settings.AVAILABLE_LANGUAGES)
+        with self.assertNumQueries(queries):
+            start = time.perf_counter()
+            yield
+            elapsed = (time.perf_counter() - start) / calls
+        self.timings[path] = elapsed
+        self.assertLess(elapsed, time_budget, '{} took {:.1f} ms'.format(path, elapsed * 1000))
+
+    def get_page(self):
+        return TestPage.objects.get(id=self.page.id)
+
+    def test_save(self):
+        page = self.get_page()
+        page.body = 'changed'
+        with self.assertBudget('save'):
+            page.save()
+
+    def test_rename(self):
+        page = self.get_page()
+        setattr(page, build_localized_fieldname('slug', mt_settings.DEFAULT_LANGUAGE), 'renamed')
+        with self.assertBudget('rename'):
+            page.save()
+
+    def test_move(self):
+        page = self.get_page()
+        with self.assertBudget('move'):
+            page.move(self.other, pos='last-child')
+
+    def test_copy(self):
+        page = self.get_page()
+        with self.assertBudget('copy'):
+            page.copy(to=self.other)
+
+    def test_form_clean(self):
+        data = {'comments': inline_formset([])}
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            data[build_localized_fieldname('title', lang_code)] = 'Changed'
+            data[build_localized_fieldname('slug', lang_code)] = 'changed-{}'.format(lang_code)
+        form_class = TestPage.get_edit_handler().get_form_class()
+        form = form_class(nested_form_data(data), instance=self.get_page(), parent_page=self.section)
+        with self.assertBudget('form_clean'):
+            self.assertTrue(form.is_valid(), form.errors)
+
+    def test_get_url_parts(self):
+        page = self.get_page()
+        # root paths are cached on first use
+        page.get_url_parts(self.request)
+        languages = mt_settings.AVAILABLE_LANGUAGES
+        with self.assertBudget('get_url_parts', ROUNDS * len(languages)):
+            for i in range(ROUNDS):
+                for lang_code in languages:
+                    with translation.override(lang_code):
+                        page.get_url_parts(self.request)
+
+    def test_change_lang(self):
+        page = self.get_page()
+        context = {'request': self.request, 'page': page}
+        languages = mt_settings.AVAILABLE_LANGUAGES
+        # url paths and root paths are cached on first use
+        change_lang(context, mt_settings.DEFAULT_LANGUAGE)
+        with self.assertBudget('change_lang', ROUNDS * len(languages)):
+            for i in range(ROUNDS):
+                for lang_code in languages:
+                    change_lang(context, lang_code)
+
+    def test_publish(self):
+        page = self.get_page()
+        page.body = 'changed'
+        revision = page.save_revision()
+        with self.assertBudget('publish'):
+            revision.publish()
+
+    @modify_settings(MIDDLEWARE={'append': 'wagtail_translation.middleware.TranslatedPageMiddleware'})
+    def test_serve(self):
+        url = '/{0}/section-{0}/page-{0}/'.format(mt_settings.DEFAULT_LANGUAGE)
+        # site root paths are cached on first use
+        self.client.get(url)
+        with self.assertBudget('serve'):
+            response = self.client.get(url)
+        self.assertContains(response, 'body')
+
+
+@tag('scaling')
+class LanguageScalingTest(SimpleTestCase):
+    """
+    Runs `QueryBudgetTest` in subprocesses configured with 2, 8 and 32 languages
+    (on in-memory SQLite, to leave databases of this test run alone).
+    """
+    def run_budget_tests(self, languages, timings_path):
+        env = dict(os.environ, WAGTAIL_TRANSLATION_TEST_LANGUAGES=str(languages))
+        env[TIMINGS_ENV] = timings_path
+        env.pop('WAGTAIL_TRANSLATION_TEST_DATABASE', None)
+        process = subprocess.run(
+            [sys.executable, '-m', 'django', 'test', '--noinput', '--settings', settings.SETTINGS_MODULE,
+             'wagtail_translation.tests.test_query_budget.QueryBudgetTest'],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        self.assertEqual(process.returncode, 0, 'budgets exceeded with {} languages:\n{}'.format(
+            languages, process.stdout))
+        with open(timings_path) as f:
+            return json.load(f)
+
+    def test_scaling(self):
+        timings = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for languages in SCALING_LANGUAGES:
+                timings[languages] = self.run_budget_tests(
+                    languages, os.path.join(tmp_dir, '{}.json'.format(languages)))
+
+        fewest, most = SCALING_LANGUAGES[0], SCALING_LANGUAGES[-1]
+        for path in QUERY_BUDGETS:
+            limit = CONSTANT_TIME_TOLERANCE if path in PER_LANGUAGE_PATHS else most / fewest
+            self.assertLess(
+                timings[most][path], timings[fewest][path] * limit,
+                '{} takes {:.2f} ms with {} languages, {:.2f} ms with {}'.format(
+                    path, timings[most][path] * 1000, most, timings[fewest][path] * 1000, fewest))
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils.translation import override
+from modeltranslation import settings as mt_settings
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.core.models import Page
+
+from wagtail_translation import redirects
+
+from .utils import add_page, get_home
+
+
+@override_settings(WAGTAIL_TRANSLATION_CREATE_REDIRECTS=True)
+class UrlPathRedirectsTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.page = add_page(self.section, 'page')
+        self.site = self.home.get_site()
+
+    def rename(self, page, name):
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            setattr(page, 'slug_' + lang_code, '{}-{}'.format(name, lang_code))
+        page.save()
+
+    def test_disabled_by_default(self):
+        with override_settings():
+            del settings.WAGTAIL_TRANSLATION_CREATE_REDIRECTS
+            self.rename(self.section, 'renamed')
+        self.assertFalse(Redirect.objects.exists())
+
+    def test_redirects_in_every_language(self):
+        self.rename(self.section, 'renamed')
+        old_paths = set(Redirect.objects.filter(redirect_page=self.page).values_list('old_path', flat=True))
+        self.assertEqual(old_paths, {
+            '/{0}/section-{0}/page-{0}'.format(lang_code) for lang_code in mt_settings.AVAILABLE_LANGUAGES
+        })
+
+    def test_redirect_links_are_collapsed(self):
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        links = [
+            '/{0}/section-{0}/page-{0}/'.format(lang_code),
+            '{1}/{0}/section-{0}/page-{0}'.format(lang_code, self.site.root_url),
+        ]
+        for i, link in enumerate(links):
+            Redirect.objects.create(old_path='/old-{}'.format(i), site=self.site, redirect_link=link)
+        Redirect.objects.create(old_path='/unrelated', site=self.site, redirect_link='/elsewhere/')
+
+        self.rename(self.section, 'renamed')
+
+        chained = Redirect.objects.filter(old_path__startswith='/old-')
+        self.assertEqual({(r.redirect_page_id, r.redirect_link) for r in chained}, {(self.page.id, '')})
+        self.assertEqual(Redirect.objects.get(old_path='/unrelated').redirect_link, '/elsewhere/')
+        with override(lang_code):
+            self.assertEqual(chained[0].link, Page.objects.get(id=self.page.id).url)
+
+    def test_lookups_are_chunked(self):
+        for i in range(5):
+            add_page(self.section, 'child-{}'.format(i))
+        with mock.patch.object(redirects, 'LOOKUP_BATCH_SIZE', 2):
+            self.rename(self.section, 'renamed')
+        self.rename(self.section, 'section')
+        # renaming back drops redirects from the current urls
+        self.assertFalse(Redirect.objects.filter(old_path__contains='/section-').exists())
+        self.assertEqual(
+            Redirect.objects.filter(old_path__contains='/renamed-').count(),
+            7 * len(mt_settings.AVAILABLE_LANGUAGES))
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, modify_settings, override_settings
+from modeltranslation import settings as mt_settings
+from wagtail.core.models import Page, PageViewRestriction
+
+from wagtail_translation.render_cache import get_cached_response
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+@override_settings(WAGTAIL_TRANSLATION_RENDER_CACHE=True)
+class RenderCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.page = add_page(self.section, 'page', body='secret body')
+        self.site_id = self.home.get_site().id
+        self.lang_code = mt_settings.DEFAULT_LANGUAGE
+        self.url = '/{0}/section-{0}/page-{0}/'.format(self.lang_code)
+
+    def is_cached(self):
+        return get_cached_response(self.site_id, self.lang_code, self.page.url_path) is not None
+
+    def check_restriction_invalidates_descendants(self):
+        self.assertContains(self.client.get(self.url), 'secret body')
+        self.assertTrue(self.is_cached())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction = PageViewRestriction.objects.create(
+                page=self.section, restriction_type=PageViewRestriction.PASSWORD, password='password')
+        self.assertFalse(self.is_cached())
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'secret body')
+        self.assertFalse(self.is_cached())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction.delete()
+        self.assertContains(self.client.get(self.url), 'secret body')
+        self.assertTrue(self.is_cached())
+
+    def test_restriction_invalidates_descendants(self):
+        self.check_restriction_invalidates_descendants()
+
+    @modify_settings(MIDDLEWARE={'append': 'wagtail_translation.middleware.TranslatedPageMiddleware'})
+    def test_restriction_invalidates_descendants_with_middleware(self):
+        self.check_restriction_invalidates_descendants()
+
+    def test_headers_are_replayed(self):
+        def serve(page, request, *args, **kwargs):
+            response = Page.serve(page, request, *args, **kwargs)
+            response['Cache-Control'] = 'max-age=60'
+            response['X-Frame-Options'] = 'DENY'
+            return response
+
+        with mock.patch.object(TestPage, 'serve', serve):
+            rendered = self.client.get(self.url)
+        self.assertTrue(self.is_cached())
+        cached = self.client.get(self.url)
+        for header in ('Content-Type', 'Cache-Control', 'X-Frame-Options', 'Content-Language'):
+            self.assertEqual(cached[header], rendered[header])
+        self.assertEqual(cached.content, rendered.content)
@@ -0,0 +1,118 @@
+import json
+import time
+
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from wagtail.core.models import PageRevision
+
+from wagtail_translation.revision_patch import COMPRESSED_PREFIX, DELTA_PREFIX, get_delta_base_id
+
+from .utils import add_page, get_home
+
+
+def get_stored(revision_id):
+    return PageRevision.objects.filter(id=revision_id).values_list('content_json', flat=True).get()
+
+
+@override_settings(WAGTAIL_TRANSLATION_COMPACT_REVISIONS='delta')
+class CompactRevisionsTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+
+    def add_revisions(self, page, count):
+        revisions = []
+        for i in range(count):
+            page.body = 'version {}'.format(i)
+            revisions.append(page.save_revision())
+        return revisions
+
+    def test_revisions_are_deltas_of_first(self):
+        page = add_page(self.home, 'page')
+        base, *deltas = self.add_revisions(page, 3)
+        self.assertTrue(get_stored(base.id).startswith(COMPRESSED_PREFIX))
+        for revision in deltas:
+            self.assertEqual(get_delta_base_id(get_stored(revision.id)), base.id)
+        self.assertEqual(PageRevision.objects.get(id=deltas[-1].id).as_page_object().body, 'version 2')
+
+    def test_listing_doesnt_load_bases(self):
+        page = add_page(self.home, 'page')
+        self.add_revisions(page, 4)
+        with self.assertNumQueries(1):
+            revisions = list(PageRevision.objects.filter(page=page))
+        # bases are loaded when content is read
+        with self.assertNumQueries(3):
+            contents = [json.loads(revision.content_json) for revision in revisions]
+        self.assertEqual([content['body'] for content in contents],
+                         ['version {}'.format(i) for i in range(4)])
+
+    def test_deleting_base_expands_dependents(self):
+        page = add_page(self.home, 'page')
+        base, *deltas = self.add_revisions(page, 3)
+        base.delete()
+        for i, revision in enumerate(deltas, 1):
+            self.assertTrue(get_stored(revision.id).startswith(COMPRESSED_PREFIX))
+            self.assertEqual(PageRevision.objects.get(id=revision.id).as_page_object().body,
+                             'version {}'.format(i))
+
+    def test_deleted_dependents_are_not_expanded(self):
+        page = add_page(self.home, 'page')
+        base, delta, kept = self.add_revisions(page, 3)
+        with CaptureQueriesContext(connection) as queries:
+            PageRevision.objects.filter(id__in=[base.id, delta.id]).delete()
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE')]), 1)
+        self.assertFalse(PageRevision.objects.filter(id=delta.id).exists())
+        self.assertEqual(PageRevision.objects.get(id=kept.id).as_page_object().body, 'version 2')
+
+    def test_deleting_many_bases_is_batched(self):
+        pages = [add_page(self.home, 'page-{}'.format(i)) for i in range(3)]
+        bases = [self.add_revisions(page, 2)[0] for page in pages]
+        with CaptureQueriesContext(connection) as queries:
+            PageRevision.objects.filter(id__in=[base.id for base in bases]).delete()
+        lookups = [q for q in queries if DELTA_PREFIX in q['sql'] or 'LIKE' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertFalse(PageRevision.objects.filter(content_json__startswith=DELTA_PREFIX).exists())
+
+    def test_page_deletion_doesnt_expand_revisions(self):
+        small = add_page(self.home, 'small')
+        self.add_revisions(small, 2)
+        large = add_page(self.home, 'large')
+        self.add_revisions(large, 10)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            small.delete()
+        with CaptureQueriesContext(connection) as large_queries:
+            large.delete()
+        # no query per revision, no lookups of dependents or delta bases
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertFalse(any(DELTA_PREFIX in q['sql'] for q in large_queries))
+        self.assertFalse(PageRevision.objects.exists())
+
+
+@tag('benchmark')
+@override_settings(WAGTAIL_TRANSLATION_COMPACT_REVISIONS='delta')
+class RevisionDeletionBenchmark(TestCase):
+    revisions = 200
+
+    def test_delete(self):
+        home = get_home()
+        page = add_page(home, 'page')
+        for i in range(self.revisions):
+            page.body = 'version {}'.format(i)
+            page.save_revision()
+        revision_ids = list(PageRevision.objects.filter(page=page).order_by('id').values_list('id', flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            # bases of every other revision
+            PageRevision.objects.filter(id__in=revision_ids[:self.revisions // 2]).delete()
+            purge_time = time.perf_counter() - start
+        purge_queries = len(queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            page.delete()
+            delete_time = time.perf_counter() - start
+
+        print('\n{} revisions: purging half {:.1f} ms ({} queries), deleting page {:.1f} ms ({} queries)'.format(
+            self.revisions, purge_time * 1000, purge_queries, delete_time * 1000, len(queries)))
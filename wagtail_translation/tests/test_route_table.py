@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from modeltranslation import settings as mt_settings
+
+from wagtail_translation import route_table
+from wagtail_translation.route_table import HEADER, MAGIC, _read_generation, compile_route_table
+
+from .utils import add_page, get_home
+
+
+class RouteTableTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'routes')
+        settings_override = override_settings(
+            WAGTAIL_TRANSLATION_ROUTE_TABLE=self.path,
+            WAGTAIL_TRANSLATION_ROUTE_TABLE_CHECK_INTERVAL=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        table_patcher = mock.patch.object(route_table, '_table', None)
+        table_patcher.start()
+        self.addCleanup(table_patcher.stop)
+
+
+class RouteTableCompileTriggerTest(RouteTableTestCase):
+    def setUp(self):
+        super(RouteTableCompileTriggerTest, self).setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.home = get_home()
+            self.page = add_page(self.home, 'page')
+        self.site_id = self.home.get_site().id
+
+    @contextmanager
+    def assertCompiles(self, compiles=True):
+        with mock.patch.object(route_table, 'compile_route_table', wraps=compile_route_table) as compile:
+            with self.captureOnCommitCallbacks(execute=True):
+                yield
+        self.assertEqual(compile.called, compiles)
+
+    def test_draft_save_does_not_compile(self):
+        with self.assertCompiles(False):
+            self.page.title = 'changed'
+            self.page.save_revision()
+        with self.assertCompiles(False):
+            self.page.body = 'changed'
+            self.page.save()
+
+    def test_slug_change_compiles(self):
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        with self.assertCompiles():
+            setattr(self.page, 'slug_' + lang_code, 'renamed')
+            self.page.save()
+        self.assertIsNotNone(route_table.lookup_route(self.site_id, lang_code, '/home/renamed/'))
+
+    def test_unpublish_compiles(self):
+        with self.assertCompiles():
+            self.page.unpublish()
+        self.assertIsNone(route_table.lookup_route(
+            self.site_id, mt_settings.DEFAULT_LANGUAGE, self.page.url_path))
+
+    def test_draft_children_do_not_compile(self):
+        with self.assertCompiles(False):
+            add_page(self.page, 'draft', live=False)
+
+    def test_move_of_draft_with_live_children_compiles(self):
+        draft = add_page(self.home, 'draft', live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            child = add_page(draft, 'child')
+        with self.assertCompiles():
+            draft.move(self.page, pos='last-child')
+        lang_code = mt_settings.DEFAULT_LANGUAGE
+        self.assertEqual(
+            route_table.lookup_route(self.site_id, lang_code, '/home/page-{0}/draft-{0}/child-{0}/'.format(lang_code)),
+            (child.id, child.content_type_id))
+
+
+class RouteTableCompileTest(RouteTableTestCase):
+    def test_concurrent_compiles_are_serialized(self):
+        def get_entries():
+            # gives other threads a chance to read the same generation
+            threading.Event().wait(0.01)
+            return {}
+
+        with mock.patch.object(route_table, '_get_entries', side_effect=get_entries):
+            threads = [threading.Thread(target=compile_route_table) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(_read_generation(self.path), 8)
+
+    def test_table_replaced_while_compiling_is_not_overwritten(self):
+        def get_entries():
+            if get_entries.calls == 0:
+                # another writer installs a newer table
+                with open(self.path, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, 5, 0))
+            get_entries.calls += 1
+            return {}
+        get_entries.calls = 0
+
+        with mock.patch.object(route_table, '_get_entries', side_effect=get_entries):
+            compile_route_table()
+        self.assertEqual(get_entries.calls, 2)
+        self.assertEqual(_read_generation(self.path), 6)
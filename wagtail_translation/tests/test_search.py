@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from wagtail_translation import search
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+# original wagtail handler, module attribute is replaced by this app
+wagtail_post_save_signal_handler = search._post_save_signal_handler
+
+
+class Rollback(Exception):
+    pass
+
+
+class SignalHandlerTest(TestCase):
+    def _receivers(self, model):
+        return post_save._live_receivers(model)
+
+    def test_wagtail_handler_is_replaced(self):
+        receivers = self._receivers(TestPage)
+        self.assertIn(search.post_save_signal_handler, receivers)
+        self.assertNotIn(wagtail_post_save_signal_handler, receivers)
+
+    def test_replaces_handlers_connected_before(self):
+        # as if wagtail.search app was ready before this app
+        post_save.disconnect(search.post_save_signal_handler, sender=TestPage)
+        post_save.connect(wagtail_post_save_signal_handler, sender=TestPage)
+        try:
+            search.replace_signal_handlers()
+            receivers = self._receivers(TestPage)
+            self.assertIn(search.post_save_signal_handler, receivers)
+            self.assertNotIn(wagtail_post_save_signal_handler, receivers)
+        finally:
+            post_save.disconnect(wagtail_post_save_signal_handler, sender=TestPage)
+            post_save.connect(search.post_save_signal_handler, sender=TestPage)
+
+
+@mock.patch('wagtail_translation.search.update_index')
+class ScheduleIndexUpdateTest(TestCase):
+    def test_coalesced_per_transaction(self, update_index):
+        with self.captureOnCommitCallbacks(execute=True):
+            search.schedule_index_update([1])
+            search.schedule_index_update([2, 3])
+        update_index.assert_called_once_with({1, 2, 3})
+
+    def test_rolled_back_savepoint_is_not_indexed(self, update_index):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    search.schedule_index_update([1])
+                    raise Rollback
+            except Rollback:
+                pass
+            search.schedule_index_update([2])
+        update_index.assert_called_once_with({2})
+
+    def test_only_changed_pages_are_indexed(self, update_index):
+        with self.captureOnCommitCallbacks(execute=True):
+            page = add_page(get_home(), 'page')
+        update_index.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            page.body_lt = 'not indexed'
+            page.save()
+        update_index.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            page.title_lt = 'indexed'
+            page.save()
+        update_index.assert_called_once_with({page.pk})
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from wagtail_translation import switcher
+from wagtail_translation.switcher import LANG_URLS_CACHE_KEY_FMT, _get_generation, get_lang_url_paths
+from wagtail_translation.templatetags.wagtail_translation import change_lang
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+class LanguageSwitcherTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.page = add_page(self.section, 'page')
+        self.other = add_page(self.home, 'other')
+        self.request = RequestFactory().get('/')
+        self.request.site = self.home.get_site()
+        # custom url models are collected once
+        patcher = mock.patch.object(switcher, '_custom_url_models', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def change_lang(self, page, lang_code):
+        return change_lang({'request': self.request, 'page': page}, lang_code)
+
+    def is_cached(self, page):
+        return cache.get(LANG_URLS_CACHE_KEY_FMT.format(_get_generation(), page.pk)) is not None
+
+    def test_change_lang(self):
+        for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+            self.assertEqual(self.change_lang(self.page, lang_code),
+                             '/{0}/section-{0}/page-{0}/'.format(lang_code))
+
+    def test_untranslated_page_falls_back_to_ancestor(self):
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        page = add_page(self.section, 'untranslated', languages=[mt_settings.DEFAULT_LANGUAGE])
+        self.assertEqual(self.change_lang(page, lang_code), '/{0}/section-{0}/'.format(lang_code))
+
+    def test_get_url_parts_override_is_honoured(self):
+        def get_url_parts(page, request=None):
+            site_id, root_url, page_path = Page.get_url_parts(page, request)
+            return site_id, root_url, page_path + 'custom/'
+
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        with mock.patch.object(TestPage, 'get_url_parts', get_url_parts, create=True):
+            self.assertEqual(self.change_lang(self.page, lang_code),
+                             '/{0}/section-{0}/page-{0}/custom/'.format(lang_code))
+
+            # fallback ancestors use overrides too
+            page = add_page(self.section, 'untranslated', languages=[mt_settings.DEFAULT_LANGUAGE])
+            self.assertEqual(self.change_lang(page, lang_code), '/{0}/section-{0}/custom/'.format(lang_code))
+
+    def test_draft_save_keeps_cached_entries(self):
+        get_lang_url_paths(self.page)
+        self.page.title = 'changed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision()
+            self.page.save()
+        self.assertTrue(self.is_cached(self.page))
+
+    def test_rename_drops_subtree_entries_only(self):
+        for page in (self.section, self.page, self.other):
+            get_lang_url_paths(page)
+        slug_field = build_localized_fieldname('slug', mt_settings.DEFAULT_LANGUAGE)
+        setattr(self.section, slug_field, 'renamed')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.save()
+        self.assertFalse(self.is_cached(self.section))
+        self.assertFalse(self.is_cached(self.page))
+        self.assertTrue(self.is_cached(self.other))
+        self.assertEqual(get_lang_url_paths(Page.objects.get(id=self.page.id))[mt_settings.DEFAULT_LANGUAGE],
+                         '/home/renamed/page-{}/'.format(mt_settings.DEFAULT_LANGUAGE))
+
+    def test_unpublish_drops_descendant_fallbacks(self):
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+        page = add_page(self.page, 'untranslated', languages=[mt_settings.DEFAULT_LANGUAGE])
+        self.assertEqual(get_lang_url_paths(page)[lang_code], '/home/section-{0}/page-{0}/'.format(lang_code))
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(id=self.page.id).specific.unpublish()
+        self.assertFalse(self.is_cached(page))
+        self.assertIsNone(get_lang_url_paths(page)[lang_code])
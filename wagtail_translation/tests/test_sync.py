@@ -0,0 +1,178 @@
+import io
+
+from django.core import serializers
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Locale, Page
+
+from wagtail_translation.sync import apply_diff, diff_trees, get_tree_state, write_diff
+
+from .models import TestPage
+from .utils import add_page, get_home
+
+
+def copy_tree(using):
+    """
+    Replaces the page tree of `using` database with the one of default database,
+    like restoring a staging database from a production dump.
+    """
+    for model in (Locale, Page, TestPage):
+        # content types are matched by natural keys, pages keep their ids
+        data = serializers.serialize(
+            'python', model._base_manager.order_by('pk'), use_natural_foreign_keys=True)
+        for obj in serializers.deserialize('python', data, using=using):
+            obj.save(using=using)
+
+
+def get_field(page, field_name, lang_code=None):
+    return getattr(page, build_localized_fieldname(field_name, lang_code or mt_settings.DEFAULT_LANGUAGE))
+
+
+class SyncTest(TestCase):
+    databases = {'default', 'sync'}
+
+    def setUp(self):
+        home = get_home()
+        self.about = add_page(home, 'about', body='About')
+        self.team = add_page(self.about, 'team')
+        self.news = add_page(home, 'news')
+        self.old = add_page(self.news, 'old')
+        self.kept = add_page(self.old, 'kept')
+        cache.clear()
+
+    def edit_staging(self, edit):
+        """
+        Runs `edit` on default database and copies the result to 'sync' database (staging),
+        leaving default database (production) as it was.
+        """
+        with transaction.atomic():
+            edit()
+            copy_tree('sync')
+            transaction.set_rollback(True)
+        cache.clear()
+
+    def sync(self):
+        diff = io.StringIO()
+        write_diff(diff_trees(get_tree_state('sync'), get_tree_state('default'), using='sync'), diff)
+        diff.seek(0)
+        counts = apply_diff(diff)
+        cache.clear()
+        return counts
+
+    def assertInSync(self):
+        source = get_tree_state('sync')
+        target = get_tree_state('default')
+        roots = [key for key, node in source.items() if node.parent_key is None]
+        self.assertEqual([source[key].subtree_hash for key in roots], [target[key].subtree_hash for key in roots])
+
+    def test_unchanged_trees(self):
+        self.edit_staging(lambda: None)
+        self.assertEqual(self.sync(), {'update': 0, 'move': 0, 'create': 0, 'delete': 0})
+
+    def test_updates_and_subclass_fields(self):
+        lang_code = mt_settings.AVAILABLE_LANGUAGES[-1]
+
+        def edit():
+            page = TestPage.objects.get(id=self.about.id)
+            setattr(page, build_localized_fieldname('slug', lang_code), 'about-us')
+            setattr(page, build_localized_fieldname('body', lang_code), 'Changed')
+            page.save()
+
+        self.edit_staging(edit)
+        self.assertEqual(self.sync()['update'], 1)
+        self.assertInSync()
+        about = TestPage.objects.get(id=self.about.id)
+        self.assertEqual(get_field(about, 'body', lang_code), 'Changed')
+        self.assertEqual(get_field(Page.objects.get(id=self.team.id), 'url_path', lang_code),
+                         '/home/about-us/team-{}/'.format(lang_code))
+
+    def test_created_pages(self):
+        def edit():
+            events = add_page(Page.objects.get(id=self.news.id), 'events', body='Events')
+            add_page(events, 'party')
+
+        self.edit_staging(edit)
+        self.assertFalse(Page.objects.filter(**{build_localized_fieldname('slug', mt_settings.DEFAULT_LANGUAGE):
+                                                 'events-' + mt_settings.DEFAULT_LANGUAGE}).exists())
+        self.assertEqual(self.sync()['create'], 2)
+        self.assertInSync()
+
+        events = TestPage.objects.get(**{'url_path_' + mt_settings.DEFAULT_LANGUAGE: '/home/news-{0}/events-{0}/'.format(
+            mt_settings.DEFAULT_LANGUAGE)})
+        self.assertEqual(events.body, 'Events')
+        self.assertEqual(events.get_children().count(), 1)
+        staging_events = Page._base_manager.using('sync').get(translation_key=events.translation_key)
+        self.assertEqual(staging_events.title, events.title)
+
+    def test_deleted_and_moved_pages(self):
+        def edit():
+            # a page moved out of a deleted subtree is kept
+            Page.objects.get(id=self.kept.id).move(Page.objects.get(id=self.about.id), pos='last-child')
+            Page.objects.get(id=self.old.id).delete()
+            Page.objects.get(id=self.team.id).move(Page.objects.get(id=self.news.id), pos='last-child')
+
+        self.edit_staging(edit)
+        counts = self.sync()
+        self.assertEqual((counts['delete'], counts['move']), (1, 2))
+        self.assertInSync()
+        self.assertFalse(Page.objects.filter(id=self.old.id).exists())
+        self.assertEqual(Page.objects.get(id=self.kept.id).get_parent().id, self.about.id)
+        self.assertEqual(Page.objects.get(id=self.team.id).get_parent().id, self.news.id)
+
+    def test_pages_are_matched_by_key(self):
+        # staging page ids differ from production ones, e.g. when pages were created on both
+        def edit():
+            page = Page.objects.get(id=self.team.id)
+            page.title = get_field(page, 'title')
+            setattr(page, build_localized_fieldname('title', mt_settings.DEFAULT_LANGUAGE), 'Our team')
+            page.save()
+
+        self.edit_staging(edit)
+        Page._base_manager.using('sync').filter(id=self.team.id).update(id=self.team.id + 1000)
+        TestPage._base_manager.using('sync').filter(page_ptr_id=self.team.id).update(
+            page_ptr_id=self.team.id + 1000)
+        counts = self.sync()
+        self.assertEqual((counts['update'], counts['create'], counts['delete']), (1, 0, 0))
+        self.assertEqual(get_field(Page.objects.get(id=self.team.id), 'title'), 'Our team')
+
+    def test_sibling_order(self):
+        news = Page.objects.get(id=self.news.id)
+        for name in ('a', 'b', 'c', 'd'):
+            add_page(news, name)
+
+        def get_order(using='default'):
+            news = Page._base_manager.using(using).get(id=self.news.id)
+            return [get_field(page, 'slug') for page in news.get_children().using(using)]
+
+        def edit():
+            def get(name):
+                return Page.objects.get(**{build_localized_fieldname('slug', mt_settings.DEFAULT_LANGUAGE):
+                                           '{}-{}'.format(name, mt_settings.DEFAULT_LANGUAGE)})
+            # old, a, b, c, d -> c, d, e, old, team, a, b
+            get('c').move(get('old'), pos='left')
+            get('d').move(get('c'), pos='right')
+            add_page(get('news'), 'e').move(get('old'), pos='left')
+            Page.objects.get(id=self.team.id).move(get('old'), pos='right')
+
+        self.edit_staging(edit)
+        expected = get_order('sync')
+        self.assertEqual(expected, ['{}-{}'.format(name, mt_settings.DEFAULT_LANGUAGE)
+                                    for name in ('c', 'd', 'e', 'old', 'team', 'a', 'b')])
+        counts = self.sync()
+        self.assertEqual(counts['create'], 1)
+        self.assertInSync()
+        self.assertEqual(get_order(), expected)
+        self.assertEqual(get_field(Page.objects.get(id=self.team.id), 'url_path'), '/home/news-{0}/team-{0}/'.format(
+            mt_settings.DEFAULT_LANGUAGE))
+
+    def test_sibling_order_changes_subtree_hash(self):
+        self.edit_staging(lambda: Page.objects.get(id=self.news.id).move(
+            Page.objects.get(id=self.about.id), pos='left'))
+        home_key = get_tree_state('default')[str(self.news.translation_key)].parent_key
+        self.assertNotEqual(get_tree_state('sync')[home_key].subtree_hash,
+                            get_tree_state('default')[home_key].subtree_hash)
+        self.assertEqual(self.sync()['move'], 1)
+        self.assertInSync()
@@ -0,0 +1,105 @@
+from django.test import TestCase
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+from wagtail_translation.tree_cache import clear, get_children_slugs, get_parent, tree_cache
+from wagtail_translation.utils import page_slug_is_available
+
+from .utils import add_page, get_home
+
+
+class TreeCacheTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.section = add_page(self.home, 'section')
+        self.other = add_page(self.home, 'other')
+        self.page = add_page(self.section, 'page')
+        self.sibling = add_page(self.section, 'sibling')
+
+    def is_available(self, slug, parent, page=None):
+        """
+        Returns whether `slug` suffixed by language code is available in every language.
+        """
+        available = [
+            page_slug_is_available('{}-{}'.format(slug, lang_code), lang_code, parent, page)
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES
+        ]
+        self.assertEqual(len(set(available)), 1)
+        return available[0]
+
+    def test_parent_lookups_hit_cache(self):
+        with tree_cache():
+            with self.assertNumQueries(1):
+                self.assertEqual(get_parent(self.page).id, self.section.id)
+                self.assertEqual(get_parent(self.page).id, self.section.id)
+                # siblings share the parent
+                self.assertIs(get_parent(self.sibling), get_parent(self.page))
+
+    def test_parent_has_translation_fields(self):
+        with tree_cache():
+            parent = get_parent(self.page)
+        with self.assertNumQueries(0):
+            for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+                getattr(parent, build_localized_fieldname('url_path', lang_code))
+
+    def test_sibling_lookups_hit_cache(self):
+        with tree_cache():
+            # one query for slugs of every language
+            with self.assertNumQueries(1):
+                self.assertFalse(self.is_available('sibling', self.section))
+                self.assertTrue(self.is_available('new', self.section))
+                # page itself doesn't take its slug
+                self.assertTrue(self.is_available('page', self.section, self.page))
+
+    def test_nested_scopes_share_cache(self):
+        with tree_cache():
+            get_parent(self.page)
+            get_children_slugs(self.section)
+            with tree_cache():
+                with self.assertNumQueries(0):
+                    get_parent(self.page)
+                    get_children_slugs(self.section)
+            # outer scope is not closed by nested one
+            with self.assertNumQueries(0):
+                get_parent(self.page)
+
+    def test_lookups_outside_scope_are_not_cached(self):
+        self.assertIsNone(get_children_slugs(self.section))
+        with self.assertNumQueries(2):
+            get_parent(self.page)
+            get_parent(self.page)
+        with tree_cache():
+            get_parent(self.page)
+        # cache is dropped when scope ends
+        with self.assertNumQueries(1):
+            get_parent(self.page)
+
+    def test_clear_after_move(self):
+        with tree_cache():
+            get_parent(self.page)
+            self.assertTrue(self.is_available('page', self.other))
+
+            # move below other page without going through patched Page.move
+            super(Page, Page.objects.get(id=self.page.id)).move(self.other, pos='last-child')
+            page = Page.objects.get(id=self.page.id)
+            # stale lookups are served until the cache is cleared
+            with self.assertNumQueries(0):
+                self.assertEqual(get_parent(self.page).id, self.section.id)
+                self.assertTrue(self.is_available('page', self.other))
+
+            clear()
+            with self.assertNumQueries(2):
+                self.assertEqual(get_parent(page).id, self.other.id)
+                self.assertFalse(self.is_available('page', self.other))
+
+    def test_patched_move_clears_cache(self):
+        with tree_cache():
+            get_parent(self.page)
+            self.assertTrue(self.is_available('page', self.other))
+            Page.objects.get(id=self.page.id).move(self.other, pos='last-child')
+            page = Page.objects.get(id=self.page.id)
+            # new parent is loaded by move itself after clearing the cache
+            with self.assertNumQueries(1):
+                self.assertEqual(get_parent(page).id, self.other.id)
+                self.assertFalse(self.is_available('page', self.other))
@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from wagtail.core.models import Page
+
+from wagtail_translation.management.commands import update_translation_index
+from wagtail_translation.management.commands.update_translation_index import (
+    ROOT_PARTITION, _filter_partition, get_partitions)
+
+from .utils import add_page, get_home
+
+
+class PartitionsTest(TestCase):
+    def setUp(self):
+        self.home = get_home()
+        self.sections = [add_page(self.home, 'section-{}'.format(i)) for i in range(3)]
+        for section in self.sections:
+            for j in range(5):
+                add_page(section, 'page-{}'.format(j))
+
+    def get_partition_ids(self, partitions):
+        subtree_paths = [partition for partition, count in partitions if partition != ROOT_PARTITION]
+        return {
+            partition: set(_filter_partition(Page._base_manager.all(), partition, subtree_paths)
+                           .values_list('id', flat=True))
+            for partition, count in partitions
+        }
+
+    def assertCoversTree(self, partitions):
+        ids = self.get_partition_ids(partitions)
+        for partition, count in partitions:
+            self.assertEqual(len(ids[partition]), count)
+        self.assertEqual(sum(count for partition, count in partitions), Page._base_manager.count())
+        self.assertEqual(set.union(*ids.values()), set(Page._base_manager.values_list('id', flat=True)))
+
+    def test_split_below_site_root(self):
+        partitions = get_partitions(workers=3)
+        self.assertEqual(partitions, [(ROOT_PARTITION, 2)] + [(section.path, 6) for section in self.sections])
+        self.assertCoversTree(partitions)
+
+    def test_large_subtrees_are_split(self):
+        large = self.sections[0]
+        for j in range(10):
+            add_page(large, 'extra-{}'.format(j))
+        partitions = get_partitions(workers=4)
+
+        paths = [partition for partition, count in partitions]
+        self.assertNotIn(large.path, paths)
+        self.assertEqual(len([path for path in paths if path.startswith(large.path)]), 15)
+        # large section root is left to root partition
+        self.assertEqual(partitions[0], (ROOT_PARTITION, 3))
+        self.assertEqual(paths[1:3], [section.path for section in self.sections[1:]])
+        self.assertCoversTree(partitions)
+
+    def test_split_depth(self):
+        partitions = get_partitions(workers=1, split_depth=2)
+        self.assertEqual(partitions, [(ROOT_PARTITION, 1), (self.home.path, 19)])
+        self.assertCoversTree(partitions)
+
+
+class ResumeTest(TestCase):
+    def setUp(self):
+        home = get_home()
+        self.sections = [add_page(home, 'section-{}'.format(i)) for i in range(3)]
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        self.state_file = os.path.join(state_dir.name, 'state.json')
+
+    def update_index(self, fail=None, **options):
+        indexed = []
+
+        def index_partition(partition, *args):
+            if partition == fail:
+                raise Exception('backend is down')
+            indexed.append(partition)
+            return 1
+
+        with mock.patch.object(update_translation_index, 'index_partition', index_partition):
+            call_command('update_translation_index', workers=1, state_file=self.state_file,
+                         stdout=io.StringIO(), stderr=io.StringIO(), **options)
+        return indexed
+
+    def test_pages_are_indexed(self):
+        stdout = io.StringIO()
+        call_command('update_translation_index', workers=1, state_file=self.state_file, stdout=stdout)
+        self.assertIn('{} pages indexed'.format(Page._base_manager.count()), stdout.getvalue())
+
+    def test_resume(self):
+        failed = self.sections[1].path
+        indexed = self.update_index(fail=failed)
+        self.assertNotIn(failed, indexed)
+        self.assertEqual(len(indexed), 3)
+        with open(self.state_file) as f:
+            self.assertEqual(json.load(f)['completed'], sorted(indexed))
+
+        # partitions of the failed run are reused
+        add_page(self.sections[0], 'new')
+        self.assertEqual(self.update_index(resume=True), [failed])
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_without_resume_everything_is_indexed(self):
+        self.update_index(fail=self.sections[1].path)
+        self.assertEqual(len(self.update_index()), 4)
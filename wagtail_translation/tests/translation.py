@@ -0,0 +1,8 @@
+from modeltranslation.translator import TranslationOptions, register
+
+from .models import TestPage
+
+
+@register(TestPage)
+class TestPageTranslationOptions(TranslationOptions):
+    fields = ('body',)
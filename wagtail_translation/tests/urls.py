@@ -0,0 +1,21 @@
+from django.conf.urls import include, url
+from django.conf.urls.i18n import i18n_patterns
+from wagtail.admin import urls as wagtailadmin_urls
+from wagtail.core import urls as wagtail_urls
+
+from wagtail_translation.api import TranslatedPagesView
+from wagtail_translation.views import serve
+
+from . import views
+
+urlpatterns = [
+    url(r'^admin/', include(wagtailadmin_urls)),
+    url(r'^api/pages/$', TranslatedPagesView.as_view()),
+    url(r'^switcher/(\d+)/$', views.switcher),
+    url(r'^per-link-switcher/(\d+)/$', views.per_link_switcher),
+]
+
+urlpatterns += i18n_patterns(
+    url(r'^((?:[\w\-]+/)*)$', serve, name='wagtail_serve'),
+    url(r'', include(wagtail_urls)),
+)
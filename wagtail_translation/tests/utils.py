@@ -0,0 +1,37 @@
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page, Site
+
+from .models import TestPage
+
+
+def localized(field_name, value, languages=None):
+    """
+    Returns kwargs setting `field_name` translations to `value` suffixed by language code.
+    """
+    return {
+        build_localized_fieldname(field_name, lang_code): '{}-{}'.format(value, lang_code)
+        for lang_code in languages or mt_settings.AVAILABLE_LANGUAGES
+    }
+
+
+def get_home():
+    """
+    Returns default site root page with slugs in every language.
+    """
+    home = Site.objects.get(is_default_site=True).root_page
+    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+        setattr(home, build_localized_fieldname('slug', lang_code), 'home')
+        setattr(home, build_localized_fieldname('title', lang_code), 'Home')
+    home.save()
+    return Page.objects.get(id=home.id)
+
+
+def add_page(parent, name, languages=None, **kwargs):
+    """
+    Adds a TestPage under `parent` with title and slug translated to `languages`.
+    """
+    fields = localized('title', name, languages)
+    fields.update(localized('slug', name, languages))
+    fields.update(kwargs)
+    return parent.add_child(instance=TestPage(**fields))
@@ -0,0 +1,21 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from modeltranslation import settings as mt_settings
+from wagtail.core.models import Page
+
+from wagtail_translation.async_utils import aget_lang_urls
+from wagtail_translation.switcher import get_lang_url
+
+
+async def switcher(request, page_id):
+    page = await sync_to_async(Page.objects.get)(id=page_id)
+    return JsonResponse(await aget_lang_urls(page, request))
+
+
+async def per_link_switcher(request, page_id):
+    # what async views had to do before async helpers: a thread hop per link
+    page = await sync_to_async(Page.objects.get)(id=page_id)
+    urls = {}
+    for lang_code in mt_settings.AVAILABLE_LANGUAGES:
+        urls[lang_code] = await sync_to_async(get_lang_url)(page, lang_code, request)
+    return JsonResponse(urls)
@@ -0,0 +1,112 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from modeltranslation import settings as mt_settings
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+
+__all__ = ['tree_cache', 'get_parent', 'get_children_slugs', 'forget_parent', 'forget_children', 'clear']
+
+
+_local = threading.local()
+
+
+def _get_cache():
+    return getattr(_local, 'cache', None)
+
+
+@contextmanager
+def tree_cache():
+    """
+    Memoizes parent and children slug lookups done while validating
+    and saving pages (in forms, `full_clean`, `clean` and `save`).
+    Nested scopes share the cache of the outermost one.
+    """
+    if _get_cache() is not None:
+        yield
+        return
+
+    _local.cache = {'parents': {}, 'children_slugs': {}}
+    try:
+        yield
+    finally:
+        _local.cache = None
+
+
+def get_parent(page):
+    """
+    Same as `page.get_parent()`, but memoized within current `tree_cache` scope
+    and with all translation fields loaded.
+    """
+    cache = _get_cache()
+    if not page.path:
+        return page.get_parent()
+    if cache is None:
+        return _load_parent(page)
+
+    parent_path = page.path[:-page.steplen]
+    if parent_path not in cache['parents']:
+        cache['parents'][parent_path] = _load_parent(page)
+    return cache['parents'][parent_path]
+
+
+def _load_parent(page):
+    # default manager may defer translation fields (see `defer_translations`),
+    # which would be loaded one query per field when url paths are computed
+    parent_path = page.path[:-page.steplen]
+    if not parent_path:
+        return None
+    return Page._base_manager.get(path=parent_path)
+
+
+def get_children_slugs(parent_page):
+    """
+    Returns a dict mapping language codes to dicts of slug -> ids of `parent_page`
+    children using it, loaded with a single query per `tree_cache` scope.
+    Returns None outside of `tree_cache` scope.
+    """
+    cache = _get_cache()
+    if cache is None:
+        return None
+
+    if parent_page.path not in cache['children_slugs']:
+        slug_fields = [build_localized_fieldname('slug', lang_code)
+                       for lang_code in mt_settings.AVAILABLE_LANGUAGES]
+        children_slugs = defaultdict(lambda: defaultdict(set))
+        for row in parent_page.get_children().values_list('id', *slug_fields):
+            for lang_code, slug in zip(mt_settings.AVAILABLE_LANGUAGES, row[1:]):
+                if slug:
+                    children_slugs[lang_code][slug].add(row[0])
+        cache['children_slugs'][parent_page.path] = children_slugs
+    return cache['children_slugs'][parent_page.path]
+
+
+def forget_parent(page):
+    """
+    Drops memoized parent of a page (e.g. when it may have changed meanwhile).
+    """
+    cache = _get_cache()
+    if cache is not None and page.path:
+        cache['parents'].pop(page.path[:-page.steplen], None)
+
+
+def forget_children(parent_path):
+    """
+    Drops memoized children slugs of a page (e.g. after one of its children is saved).
+    """
+    cache = _get_cache()
+    if cache is not None:
+        cache['children_slugs'].pop(parent_path, None)
+
+
+def clear():
+    """
+    Drops everything memoized in current scope (e.g. after pages are moved).
+    """
+    cache = _get_cache()
+    if cache is not None:
+        cache['parents'].clear()
+        cache['children_slugs'].clear()
@@ -1,9 +1,17 @@
 from __future__ import absolute_import, unicode_literals
 
 import warnings
+from collections import defaultdict
 
+from django.conf import settings
+from django.db.models import Count, Q
+from django.urls import reverse
 from modeltranslation import settings as mt_settings
 from modeltranslation.utils import build_localized_fieldname
+from wagtail.core.models import Page
+from wagtail.core.utils import WAGTAIL_APPEND_SLASH
+
+from .tree_cache import get_children_slugs
 
 
 def get_lang_obj(lang_code, cls, field_name, *args, **kwargs):
@@ -43,6 +51,14 @@ def obj_per_lang(cls, field_name, *args, **kwargs):
     return ret
 
 
+def optimistic_slugs_enabled():
+    """
+    In optimistic slug mode sibling slug uniqueness is enforced by unique indexes
+    (see `indexes.create_unique_slug_indexes`) instead of checking it before saving.
+    """
+    return getattr(settings, 'WAGTAIL_TRANSLATION_OPTIMISTIC_SLUGS', False)
+
+
 def page_slug_is_available(slug, lang_code, parent_page, page=None):
     """
     Determines whether a slug is available for a page in
@@ -51,6 +67,13 @@ def page_slug_is_available(slug, lang_code, parent_page, page=None):
     if parent_page is None:
         return True
 
+    # avoid a query per language when validating and saving pages
+    children_slugs = get_children_slugs(parent_page)
+    if children_slugs is not None:
+        page_id = page.pk if page else None
+        return not any(
+            child_id != page_id for child_id in children_slugs[lang_code].get(slug, ()))
+
     siblings = parent_page.get_children()
     if page:
         siblings = siblings.not_page(page)
@@ -59,6 +82,205 @@ def page_slug_is_available(slug, lang_code, parent_page, page=None):
     return not siblings.filter(**{slug_f: slug}).exists()
 
 
+def _get_slug_conflict_aggregates(parent_page, slugs):
+    """
+    Returns aggregates counting children of `parent_page` using `slugs`
+    (a dict mapping language codes to slugs), keyed by 'conflict_<language code>'.
+    """
+    children = Q(path__startswith=parent_page.path, depth=parent_page.depth + 1)
+    return {
+        'conflict_' + lang_code: Count('id', filter=children & Q(**{build_localized_fieldname('slug', lang_code): slug}))
+        for lang_code, slug in slugs.items() if slug
+    }
+
+
+def _get_copy_slug_preview(parent_page, slugs, counts):
+    """
+    Builds the slug conflict preview of a page copy from `counts` of
+    `_get_slug_conflict_aggregates`. Children using suffixed slugs are
+    only loaded (with a single query) when some slug is taken.
+    """
+    conflicts = {
+        lang_code: slug for lang_code, slug in slugs.items() if counts.get('conflict_' + lang_code)}
+
+    taken_slugs = defaultdict(set)
+    if conflicts:
+        slug_fields = [build_localized_fieldname('slug', lang_code) for lang_code in conflicts]
+        suffixed = Q()
+        for slug_field, slug in zip(slug_fields, conflicts.values()):
+            suffixed |= Q(**{slug_field + '__startswith': slug + '-'})
+        for row in parent_page.get_children().filter(suffixed).values_list(*slug_fields):
+            for lang_code, slug in zip(conflicts, row):
+                taken_slugs[lang_code].add(slug)
+
+    autogenerated_slugs = {}
+    for lang_code, slug in conflicts.items():
+        suffix = 2
+        candidate_slug = '%s-%d' % (slug, suffix)
+        while candidate_slug in taken_slugs[lang_code]:
+            suffix += 1
+            candidate_slug = '%s-%d' % (slug, suffix)
+        autogenerated_slugs[lang_code] = candidate_slug
+
+    new_slugs = {}
+    url_paths = {}
+    for lang_code, slug in slugs.items():
+        if slug:
+            new_slugs[lang_code] = autogenerated_slugs.get(lang_code, slug)
+            # same as Page.set_url_path does
+            base_path = getattr(parent_page, build_localized_fieldname('url_path', lang_code)) or ''
+            url_paths[lang_code] = base_path + new_slugs[lang_code] + '/'
+
+    return {
+        'conflicts': conflicts,
+        'autogenerated_slugs': autogenerated_slugs,
+        'slugs': new_slugs,
+        'url_paths': url_paths,
+    }
+
+
+def get_copy_slug_conflicts(parent_page, slugs):
+    """
+    Checks `slugs` (a dict mapping language codes to slugs) of a page copy
+    against children of `parent_page`, with a single aggregate query for all languages.
+    Returns a dict of:
+    - `conflicts` mapping language codes to slugs used by children already
+    - `autogenerated_slugs` mapping them to the next free slugs
+    - `slugs` and `url_paths` the copy would get for every language having a slug
+    """
+    aggregates = _get_slug_conflict_aggregates(parent_page, slugs)
+    counts = parent_page.get_children().aggregate(**aggregates) if aggregates else {}
+    return _get_copy_slug_preview(parent_page, slugs, counts)
+
+
+def copy_preflight(page, parent_page=None, slugs=None):
+    """
+    Returns a dict describing a copy of `page` and its subpages:
+    - `subpage_count` and `live_count` of the subtree
+    - slug conflict preview at `parent_page` (see `get_copy_slug_conflicts`)
+      when it's given, for `slugs` or slugs of `page` by default
+    Both are computed with a single aggregate query.
+    """
+    subtree = Q(path__startswith=page.path)
+    aggregates = {
+        'subpage_count': Count('id', filter=subtree),
+        'live_count': Count('id', filter=subtree & Q(live=True)),
+    }
+    pages = subtree
+    if parent_page is not None:
+        if slugs is None:
+            slugs = {
+                lang_code: getattr(page, build_localized_fieldname('slug', lang_code))
+                for lang_code in mt_settings.AVAILABLE_LANGUAGES
+            }
+        aggregates.update(_get_slug_conflict_aggregates(parent_page, slugs))
+        pages |= Q(path__startswith=parent_page.path, depth=parent_page.depth + 1)
+
+    counts = Page.objects.filter(pages).aggregate(**aggregates)
+    result = {
+        'subpage_count': counts.pop('subpage_count') - 1,
+        'live_count': counts.pop('live_count'),
+        'conflicts': {},
+        'autogenerated_slugs': {},
+        'slugs': {},
+        'url_paths': {},
+    }
+    if parent_page is not None:
+        result.update(_get_copy_slug_preview(parent_page, slugs, counts))
+    return result
+
+
+def has_route_changes(page, update_fields=None):
+    """
+    Checks whether saving `page` changes where it's served, i.e. whether it's published,
+    unpublished or its content type or url paths change while it's live.
+    Url paths of descendants are not checked.
+    """
+    if page.pk is None:
+        return page.live
+    attnames = ['live', 'content_type_id'] + [
+        build_localized_fieldname('url_path', lang_code) for lang_code in mt_settings.AVAILABLE_LANGUAGES]
+    if update_fields is not None:
+        attnames = [attname for attname in attnames if attname in update_fields or (
+            attname.endswith('_id') and attname[:-3] in update_fields)]
+        if not attnames:
+            return False
+
+    old_values = type(page)._base_manager.filter(pk=page.pk).values(*attnames).first()
+    if old_values is None:
+        return page.live
+    if not page.live and not old_values.get('live', page.live):
+        return False
+    return any(old_values[attname] != getattr(page, attname) for attname in attnames)
+
+
+def get_serve_path(url_path, root_path):
+    """
+    Returns the path `wagtail_serve` is reversed to for a page with
+    `url_path` on a site having its root page at `root_path`.
+    Active language determines the language prefix of the path.
+    """
+    page_path = reverse('wagtail_serve', args=(url_path[len(root_path):],))
+
+    # Remove the trailing slash from the URL reverse generates if
+    # WAGTAIL_APPEND_SLASH is False and we're not trying to serve
+    # the root path
+    if not WAGTAIL_APPEND_SLASH and page_path != '/':
+        page_path = page_path.rstrip('/')
+
+    return page_path
+
+
+def get_url_parts_for_url_path(url_path, root_paths, current_site_id=None):
+    """
+    Returns (site_id, root_url, page_path) for a page with `url_path`
+    using `root_paths` as returned by `Site.get_site_root_paths()`
+    or None if the page is not routable.
+    Site with `current_site_id` is preferred when the page belongs to multiple sites.
+    """
+    # if '//' exists in url_path, it means that some
+    # page in the path is not translated, therefore
+    # this page is not routable in current language
+    if not url_path or '//' in url_path:
+        return None
+
+    possible_sites = [
+        (pk, path, url)
+        for pk, path, url in root_paths
+        if url_path.startswith(path)
+    ]
+
+    if not possible_sites:
+        return None
+
+    site_id, root_path, root_url = possible_sites[0]
+
+    if current_site_id is not None:
+        for site_id, root_path, root_url in possible_sites:
+            if site_id == current_site_id:
+                break
+        else:
+            site_id, root_path, root_url = possible_sites[0]
+
+    return (site_id, root_url, get_serve_path(url_path, root_path))
+
+
+def get_url_from_url_parts(url_parts, root_paths, current_site_id=None):
+    """
+    Same as `Page.get_url` for already known `url_parts`:
+    returns relative url when page belongs to current site
+    (or there is only one site) and absolute url otherwise.
+    """
+    if url_parts is None:
+        return None
+
+    site_id, root_url, page_path = url_parts
+    num_sites = len(set(root_path[0] for root_path in root_paths))
+    if site_id == current_site_id or num_sites == 1:
+        return page_path
+    return root_url + page_path
+
+
 def deprecated(obj):
     if isinstance(obj, type):
         return _deprecated_cls(cls=obj)
@@ -0,0 +1,127 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import get_language
+from modeltranslation import settings as mt_settings
+from wagtail.admin.auth import user_has_any_page_permission, user_passes_test
+from wagtail.core import hooks
+from wagtail.core.models import Page, Site
+from wagtail.core.views import serve as wagtail_serve
+
+from .edit_handlers import find_language_panel
+from .render_cache import (
+    cache_response, get_cached_response, get_render_tokens, is_cacheable_request, render_cache_enabled)
+
+__all__ = [
+    "language_panel",
+    "serve",
+]
+
+
+@user_passes_test(user_has_any_page_permission)
+def language_panel(request, lang_code):
+    """
+    Renders fields of a single language tab of page edit form (see `LanguageObjectList`).
+    """
+    if lang_code not in mt_settings.AVAILABLE_LANGUAGES:
+        raise Http404
+
+    try:
+        if request.GET.get("page"):
+            page = get_object_or_404(Page, id=int(request.GET["page"])).get_latest_revision_as_page()
+            parent_page = page.get_parent()
+            if not page.permissions_for_user(request.user).can_edit():
+                raise PermissionDenied
+        else:
+            content_type = ContentType.objects.get_for_id(int(request.GET["content_type"]))
+            page_class = content_type.model_class()
+            if page_class is None or not issubclass(page_class, Page):
+                raise Http404
+            parent_page = get_object_or_404(Page, id=int(request.GET["parent"])).specific
+            if not parent_page.permissions_for_user(request.user).can_add_subpage():
+                raise PermissionDenied
+            page = page_class(owner=request.user)
+    except (KeyError, ValueError, ContentType.DoesNotExist):
+        raise Http404
+
+    edit_handler = page.get_edit_handler()
+    form_class = edit_handler.get_form_class()
+    form = form_class(instance=page, parent_page=parent_page)
+    form.loaded_languages = {lang_code}
+    edit_handler = edit_handler.bind_to(instance=page, request=request, form=form)
+
+    panel = find_language_panel(edit_handler, lang_code)
+    if panel is None:
+        raise Http404
+    return HttpResponse(panel.render())
+
+
+def _is_cacheable_response(page, response):
+    return (
+        response.status_code == 200 and
+        not response.streaming and
+        not response.cookies and
+        "private" not in response.get("Cache-Control", "") and
+        not page.get_view_restrictions().exists()
+    )
+
+
+def _get_url_path(site_id, path_components):
+    for root_site_id, root_path, root_url in Site.get_site_root_paths():
+        if root_site_id == site_id:
+            return root_path + "".join(component + "/" for component in path_components)
+    # site root page is not translated
+    raise Http404
+
+
+def serve(request, path):
+    """
+    Replacement of `wagtail.core.views.serve`.
+
+    Serves the page already resolved by `TranslatedPageMiddleware` without routing,
+    and caches responses of anonymous GET requests per site, language and
+    localized url path (see `WAGTAIL_TRANSLATION_RENDER_CACHE`).
+    """
+    translated_page = getattr(request, "translated_page", None)
+    use_cache = render_cache_enabled() and is_cacheable_request(request)
+    if translated_page is None and not use_cache:
+        return wagtail_serve(request, path)
+
+    lang_code = get_language()
+    path_components = [component for component in path.split("/") if component]
+    if translated_page is not None:
+        site_id = request.translated_site_id
+        url_path = request.translated_url_path
+    else:
+        site = Site.find_for_request(request)
+        if not site:
+            raise Http404
+        site_id = site.id
+        url_path = _get_url_path(site_id, path_components)
+
+        if use_cache:
+            response = get_cached_response(site_id, lang_code, url_path)
+            if response is not None:
+                return response
+
+    if translated_page is not None:
+        page, args, kwargs = translated_page, [], {}
+    else:
+        page, args, kwargs = site.root_page.specific.route(request, path_components)
+
+    for fn in hooks.get_hooks("before_serve_page"):
+        result = fn(page, request, args, kwargs)
+        if isinstance(result, HttpResponse):
+            return result
+
+    if not use_cache:
+        return page.serve(request, *args, **kwargs)
+
+    tokens = get_render_tokens(page.id, lang_code)
+    response = page.serve(request, *args, **kwargs)
+    if hasattr(response, "render") and not response.is_rendered:
+        response.render()
+    if _is_cacheable_response(page, response):
+        cache_response(site_id, lang_code, url_path, page, response, tokens)
+    return response
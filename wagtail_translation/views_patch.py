@@ -91,7 +91,7 @@ def copy(request, page_id):
                     request,
                     _("Page '{0}' and {1} subpages copied.").format(
                         page.get_admin_display_title(),
-                        new_page.get_descendants().count(),
+                        form.preflight["subpage_count"],
                     ),
                 )
             else:
@@ -1,14 +1,26 @@
 import json
 
 from django.conf import settings
+from django.conf.urls import url
 from django.utils.html import format_html, format_html_join
 from wagtail.core import hooks
 
+from . import views
+
+
+@hooks.register('register_admin_urls')
+def register_admin_urls():
+    return [
+        url(r'^wagtail_translation/language_panel/(?P<lang_code>[\w-]+)/$', views.language_panel,
+            name='wagtail_translation_language_panel'),
+    ]
+
 
 @hooks.register('insert_editor_js')
 def translated_slugs():
     js_files = [
         'wagtail_translation/js/wagtail_translated_slugs.js',
+        'wagtail_translation/js/language_tabs.js',
     ]
 
     js_includes = format_html_join('\n', '<script src="{0}{1}"></script>', (